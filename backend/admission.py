@@ -0,0 +1,147 @@
+"""
+Admission control for the Investment Simulation API
+Per-client rate limits, per-endpoint concurrency limits and early load shedding
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.routing import Router
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from backend.metrics import route_template
+from backend.workers import BoundedExecutor
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second up to ``burst``"""
+
+    def __init__(self, rate: float, burst: float, now: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic() if now is None else now
+
+    def take(self, now: Optional[float] = None) -> float:
+        """Take one token; returns 0 on success, else the seconds until one is available"""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    One token bucket per client, least recently seen clients evicted first.
+
+    A ``rate`` of 0 disables limiting. Evicting an idle client only resets its
+    bucket to full, which it would have refilled to anyway.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def check(self, client: str, now: Optional[float] = None) -> float:
+        """Seconds the client must wait (0 if the request is admitted)"""
+        if self.rate <= 0:
+            return 0.0
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket.take(now)
+
+
+def client_id(scope: Scope) -> str:
+    """
+    Client address of the connection.
+
+    X-Forwarded-For is not read here: its leftmost entries are whatever the
+    client sent. Behind a proxy, uvicorn's proxy_headers replaces the
+    address with the last hop not added by a trusted proxy
+    (FORWARDED_ALLOW_IPS, see backend.serve).
+    """
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class AdmissionMiddleware:
+    """
+    Reject work early instead of queueing it without bound.
+
+    In order, a request is rejected with:
+
+    * 429 when its client exceeded the rate limit (routes in ``exempt``,
+      such as health checks and metrics, are never limited);
+    * 503 when the executor of its lane is already at capacity, before the
+      body is even read or validated;
+    * 503 when its route already has ``concurrency[route]`` requests in flight.
+
+    Every rejection carries Retry-After. ``lanes`` maps route templates to the
+    executor that will run their work.
+    """
+
+    def __init__(self, app: ASGIApp, router: Router, rate_limiter: RateLimiter,
+                 concurrency: Dict[str, int], lanes: Dict[str, BoundedExecutor],
+                 exempt: Iterable[str] = (), on_reject: Optional[Callable[[str, str], None]] = None):
+        self.app = app
+        self.router = router
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.lanes = lanes
+        self.exempt = frozenset(exempt)
+        self.on_reject = on_reject
+        self.in_flight: Dict[str, int] = {}
+
+    def check(self, route: str, scope: Scope) -> Optional[Tuple[int, str, str, int]]:
+        """(status, reason, detail, retry_after) if the request must be rejected"""
+        if route in self.exempt:
+            return None
+
+        wait = self.rate_limiter.check(client_id(scope))
+        if wait > 0:
+            return 429, "rate_limited", "Rate limit exceeded", math.ceil(wait)
+
+        executor = self.lanes.get(route)
+        if executor is not None and executor.queue_depth >= executor.capacity:
+            return 503, "shed", f"{executor.name} executor queue is full", 1
+
+        limit = self.concurrency.get(route)
+        if limit is not None and self.in_flight.get(route, 0) >= limit:
+            return 503, "concurrency", "Too many concurrent requests for this endpoint", 1
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # CORS preflights neither spend tokens nor take concurrency slots
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(self.router, scope)
+        rejection = self.check(route, scope)
+        if rejection is not None:
+            status, reason, detail, retry_after = rejection
+            if self.on_reject is not None:
+                self.on_reject(route, reason)
+            response = JSONResponse({"detail": detail}, status_code=status,
+                                    headers={"Retry-After": str(retry_after)})
+            await response(scope, receive, send)
+            return
+
+        self.in_flight[route] = self.in_flight.get(route, 0) + 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight[route] -= 1
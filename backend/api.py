@@ -3,12 +3,17 @@ FastAPI backend for Investment Simulation System
 Provides REST API endpoints for the investment simulation engine
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Any
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Annotated, AsyncIterator, Callable, Dict, List, Literal, Optional, Any, Union
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+import asyncio
+import functools
 import os
+import time
 import sys
 import json
 from pathlib import Path
@@ -17,23 +22,259 @@ from pathlib import Path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core import OptimizedInvestment
-from visualization import plotar_historico_planta_pronto, plotar_cenarios
+from backend import tasks, warmup
+from backend.workers import BoundedExecutor, QueueFullError, ClientDisconnectedError, available_cpus, env_int
+from backend.compression import CompressionMiddleware
+from backend.metrics import CallbackCounter, MetricsMiddleware, Registry
+from backend.admission import AdmissionMiddleware, RateLimiter
+from backend.jobs import JobStore, JobWorkers
+from backend.persistence import SQLiteStatusStore, WriteBehindQueue
+from backend.cache import CacheEntry, ResponseCache, canonical_key, etag_for, etag_matches
+from backend.shaping import parse_fields, shape_payload
+from backend.progress import RunningBands, sse_event
+from backend.singleflight import SingleFlight
+from backend.formats import (
+    JSON, ARROW, MSGPACK, FLOAT32, EVENT_STREAM, ETAG_SUFFIXES, SIMULATION_MEDIA_TYPES, FRONTIER_MEDIA_TYPES, BATCH_MEDIA_TYPES,
+    BatchEncoder, is_available, negotiate, render_frontier, render_json, render_simulation, simulation_headers
+)
+
+@functools.lru_cache(maxsize=None)
+def supabase_integration():
+    """Optional Supabase helpers, imported on first use; None when unavailable"""
+    try:
+        import supabase_integration
+    except ImportError:
+        print("⚠️  Supabase integration not available")
+        return None
+    return supabase_integration
+
+# Simulations run on a pool sized from the CPU count; the pure-Python kernels
+# hold the GIL, so a process pool is needed for throughput to scale with cores
+simulation_executor = BoundedExecutor(
+    name="simulation",
+    kind=os.environ.get("SIMULATION_EXECUTOR", "process"),
+    max_workers=env_int("SIMULATION_WORKERS", available_cpus()),
+    max_queue=env_int("SIMULATION_QUEUE_DEPTH", 64)
+)
+SIMULATION_TIMEOUT = float(os.environ.get("SIMULATION_TIMEOUT", 30))
+
+# Cheap lane: CDI and IPCA+ runs take about a millisecond, less than a round
+# trip to a worker process, so they run on a small thread pool of their own
+# and never wait behind real estate, mixed or batch work
+fast_simulation_executor = BoundedExecutor(
+    name="simulation-fast",
+    kind=os.environ.get("FAST_SIMULATION_EXECUTOR", "thread"),
+    max_workers=env_int("FAST_SIMULATION_WORKERS", 2),
+    max_queue=env_int("FAST_SIMULATION_QUEUE_DEPTH", 128)
+)
+FAST_STRATEGIES = ("cdi", "ipca")
+
+# Optimization runs on its own process pool so it can never stall /simulate/*
+optimization_executor = BoundedExecutor(
+    name="optimization",
+    kind=os.environ.get("OPTIMIZATION_EXECUTOR", "process"),
+    max_workers=env_int("OPTIMIZATION_WORKERS", max(1, available_cpus() // 2)),
+    max_queue=env_int("OPTIMIZATION_QUEUE_DEPTH", 8)
+)
+OPTIMIZATION_TIMEOUT = float(os.environ.get("OPTIMIZATION_TIMEOUT", 30))
+
+EXECUTORS = (fast_simulation_executor, simulation_executor, optimization_executor)
+
+def shutdown_executors() -> None:
+    """Cancel queued work and join every pool, so no worker process outlives this one"""
+    for executor in EXECUTORS:
+        executor.shutdown()
+
+# Repeated /simulate/* requests are answered from memory; with SIMULATION_CACHE_DIR
+# results are also shared on disk between the worker processes of backend.serve
+response_cache = ResponseCache(
+    max_entries=env_int("RESPONSE_CACHE_SIZE", 1024),
+    ttl=float(os.environ.get("RESPONSE_CACHE_TTL", 300)),
+    directory=os.environ.get("SIMULATION_CACHE_DIR")
+)
+
+# Concurrent identical simulations share one computation and one database write
+simulation_flights = SingleFlight()
+
+# Batch simulations are computed in fixed-size chunks so memory stays flat
+BATCH_CHUNK_SIZE = env_int("BATCH_CHUNK_SIZE", 256)
+BATCH_MAX_ITEMS = env_int("BATCH_MAX_ITEMS", 10000)
+SSE_AGGREGATE_INTERVAL = float(os.environ.get("SSE_AGGREGATE_INTERVAL", 0.5))
+
+# Charts rendered by POST /charts are stored under a hash of their request,
+# so a repeated chart is a file read; shared by all backend.serve workers
+CHARTS_DIR = Path(os.environ.get("CHARTS_DIR", "outputs/charts"))
+CHART_TIMEOUT = float(os.environ.get("CHART_TIMEOUT", 60))
+CHART_MEDIA_TYPES = {"png": "image/png", "jpg": "image/jpeg", "svg": "image/svg+xml"}
+chart_flights = SingleFlight()
+
+def save_simulations(records: List[Dict[str, Any]]) -> List[bool]:
+    """Write a batch of queued simulations to Supabase; runs on a thread of the write-behind task"""
+    return supabase_integration().save_simulation_results([
+        {
+            "strategy": record["strategy"],
+            "parameters": record["parameters"],
+            "result": record["result"],
+            "session_id": record.get("session_id"),
+            "simulation_id": record["id"]
+        }
+        for record in records
+    ])
+
+# Simulations are saved behind the response: the id is assigned up front and
+# a background task writes queued records in batches (PERSISTENCE_* settings).
+# Statuses go to PERSISTENCE_DB so any backend.serve worker can report them.
+persistence_queue = WriteBehindQueue(
+    save_simulations,
+    max_size=env_int("PERSISTENCE_QUEUE_SIZE", 1000),
+    batch_size=env_int("PERSISTENCE_BATCH_SIZE", 50),
+    flush_interval=float(os.environ.get("PERSISTENCE_FLUSH_INTERVAL", 0.5)),
+    on_flush=lambda count, seconds: stage_duration.observe(seconds, operation="write_behind", stage="persistence"),
+    status_store=SQLiteStatusStore(os.environ.get("PERSISTENCE_DB", "persistence.db"))
+)
+PERSISTENCE_DRAIN_TIMEOUT = float(os.environ.get("PERSISTENCE_DRAIN_TIMEOUT", 10))
+
+# Heavy requests can be submitted as durable jobs run by separate worker processes
+job_store = JobStore(
+    os.environ.get("JOBS_DB", "jobs.db"),
+    result_ttl=float(os.environ.get("JOB_RESULT_TTL", 86400))
+)
+JOB_WORKERS = env_int("JOB_WORKERS", 1)
 
-# Supabase integration (optional)
-try:
-    from supabase_integration import supabase_client, save_simulation_result, get_simulation_history
-    SUPABASE_ENABLED = True
-except ImportError:
-    SUPABASE_ENABLED = False
-    print("⚠️  Supabase integration not available")
+# Startup warm-up; /health/ready answers 503 until it has finished
+WARMUP_ENABLED = os.environ.get("WARMUP", "1") != "0"
+warmup_state: Dict[str, Any] = {"ready": False, "duration": None, "steps": {}, "presets": 0, "error": None}
+
+# In-process metrics exposed on /metrics in the Prometheus text format
+metrics = Registry()
+request_duration = metrics.histogram(
+    "http_request_duration_seconds", "Request latency by route template", ("route", "method"))
+requests_total = metrics.counter(
+    "http_requests_total", "Requests by route template and status", ("route", "method", "status"))
+requests_in_flight = metrics.gauge(
+    "http_requests_in_flight", "Requests being handled by route template", ("route",))
+requests_rejected = metrics.counter(
+    "http_requests_rejected_total", "Requests refused by admission control", ("route", "reason"))
+stage_duration = metrics.histogram(
+    "simulation_stage_seconds",
+    "Time per request stage: queue (waiting for a worker), kernel, serialization and persistence",
+    ("operation", "stage"))
+metrics.gauge(
+    "executor_queue_depth", "Tasks submitted and not yet finished", ("executor",),
+    callback=lambda: [({"executor": e.name}, e.queue_depth) for e in EXECUTORS])
+metrics.gauge(
+    "executor_capacity", "Maximum tasks held by the executor", ("executor",),
+    callback=lambda: [({"executor": e.name}, e.capacity) for e in EXECUTORS])
+metrics.register(CallbackCounter(
+    "response_cache_requests_total", "Response cache lookups by result", ("result",),
+    callback=lambda: [({"result": "hit"}, response_cache.hits), ({"result": "miss"}, response_cache.misses)]))
+metrics.register(CallbackCounter(
+    "response_cache_disk_hits_total", "Response cache hits served from the shared disk tier",
+    callback=lambda: [({}, response_cache.disk_hits)]))
+metrics.gauge(
+    "response_cache_hit_ratio", "Share of response cache lookups answered from cache (memory or disk)",
+    callback=lambda: [({}, response_cache.hits / max(1, response_cache.hits + response_cache.misses))])
+metrics.gauge(
+    "response_cache_entries", "Entries held by the response cache",
+    callback=lambda: [({}, response_cache.stats()["entries"])])
+# Refreshed on a thread by each /metrics scrape, so rendering never queries SQLite on the event loop
+job_counts: Dict[str, int] = {}
+metrics.gauge(
+    "jobs", "Background jobs by status", ("status",),
+    callback=lambda: [({"status": status}, count) for status, count in job_counts.items()])
+metrics.gauge(
+    "persistence_queue_depth", "Simulations waiting to be written to the database",
+    callback=lambda: [({}, persistence_queue.depth)])
+metrics.register(CallbackCounter(
+    "persistence_records_total", "Simulations handed to the write-behind queue by outcome", ("status",),
+    callback=lambda: [({"status": status}, getattr(persistence_queue, status))
+                      for status in ("saved", "failed", "dropped")]))
+metrics.gauge(
+    "warmup_duration_seconds", "Duration of the startup warm-up (0 until it has finished)",
+    callback=lambda: [({}, warmup_state["duration"] or 0.0)])
+metrics.register(CallbackCounter(
+    "single_flight_requests_total", "Simulation requests that started (leader) or joined (waiter) a flight",
+    ("role",),
+    callback=lambda: [({"role": "leader"}, simulation_flights.leaders), ({"role": "waiter"}, simulation_flights.waiters)]))
+metrics.gauge(
+    "single_flight_coalesce_ratio", "Share of simulation requests that joined a running computation",
+    callback=lambda: [({}, simulation_flights.stats()["coalesce_ratio"])])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background resources"""
+    job_workers = JobWorkers(job_store, processes=JOB_WORKERS)
+    job_workers.start()
+    persistence_queue.start()
+    if WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(warm_up())
+    else:
+        warmup_state["ready"] = True
+    yield
+    if WARMUP_ENABLED and not warmup_task.done():
+        warmup_task.cancel()
+    await persistence_queue.stop(timeout=PERSISTENCE_DRAIN_TIMEOUT)
+    job_workers.stop()
+    await asyncio.to_thread(shutdown_executors)
 
 app = FastAPI(
     title="Investment Simulation API",
     description="API for real estate and fixed income investment simulations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    """Shed load when a worker pool is saturated"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+# Compress large JSON/NDJSON/binary responses; see benchmark_api.py for the level trade-offs
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=env_int("COMPRESSION_MIN_SIZE", 1024),
+    gzip_level=env_int("COMPRESSION_GZIP_LEVEL", 1),
+    brotli_quality=env_int("COMPRESSION_BROTLI_QUALITY", 4)
+)
+
+rate_limiter = RateLimiter(
+    rate=float(os.environ.get("RATE_LIMIT_PER_SECOND", 20)),
+    burst=float(os.environ.get("RATE_LIMIT_BURST", 40))
+)
+
+# Admission control: per-client token buckets, then early shedding when the
+# lane's executor is full, then per-endpoint concurrency limits
+app.add_middleware(
+    AdmissionMiddleware,
+    router=app.router,
+    rate_limiter=rate_limiter,
+    concurrency={
+        "/simulate/batch": env_int("BATCH_CONCURRENCY", 4),
+        "/optimize": env_int("OPTIMIZE_CONCURRENCY", 8),
+        "/optimize/frontier": env_int("OPTIMIZE_CONCURRENCY", 8),
+        "/charts": env_int("CHART_CONCURRENCY", 4),
+    },
+    lanes={
+        "/simulate/cdi": fast_simulation_executor,
+        "/simulate/ipca": fast_simulation_executor,
+        "/simulate/real-estate/under-construction": simulation_executor,
+        "/simulate/real-estate/ready": simulation_executor,
+        "/simulate/mixed-strategy": simulation_executor,
+        "/simulate/batch": simulation_executor,
+        "/optimize": optimization_executor,
+        "/optimize/frontier": optimization_executor,
+        "/charts": simulation_executor,
+    },
+    exempt=("/", "/health", "/health/ready", "/health/database", "/metrics"),
+    on_reject=lambda route, reason: requests_rejected.inc(route=route, reason=reason)
 )
 
-# CORS middleware
+# CORS wraps admission control so that 429/503 responses carry CORS headers
+# and preflights are answered before they reach it
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Will be configured for Heroku
@@ -42,6 +283,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it is outermost and times the whole response, compression included
+app.add_middleware(
+    MetricsMiddleware,
+    router=app.router,
+    duration=request_duration,
+    requests=requests_total,
+    in_flight=requests_in_flight
+)
+
 # Pydantic models for request/response
 class SimulationParams(BaseModel):
     """Base parameters for investment simulations"""
@@ -74,16 +324,56 @@ class MixedStrategyParams(RealEstateParams):
     """Parameters for mixed strategy (real estate + CDI)"""
     taxa_cdi: float = Field(..., gt=0, le=50, description="CDI annual rate (%)")
 
+class CDIBatchItem(BaseModel):
+    """CDI entry of a batch simulation"""
+    strategy: Literal["cdi"]
+    params: CDIParams
+
+class IPCABatchItem(BaseModel):
+    """IPCA+ entry of a batch simulation"""
+    strategy: Literal["ipca"]
+    params: IPCAParams
+
+class RealEstateBatchItem(BaseModel):
+    """Real estate entry of a batch simulation (planta = under construction, pronto = ready)"""
+    strategy: Literal["planta", "pronto"]
+    params: RealEstateParams
+
+class MixedStrategyBatchItem(BaseModel):
+    """Mixed strategy entry of a batch simulation"""
+    strategy: Literal["mixed"]
+    params: MixedStrategyParams
+
+BatchItem = Annotated[
+    Union[CDIBatchItem, IPCABatchItem, RealEstateBatchItem, MixedStrategyBatchItem],
+    Field(discriminator="strategy")
+]
+
+class BatchSimulationParams(BaseModel):
+    """Heterogeneous list of simulations"""
+    simulacoes: List[BatchItem] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS,
+                                        description="Simulations to run")
+
 class OptimizationParams(BaseModel):
     """Parameters for portfolio optimization"""
     estrategias: Dict[str, Any] = Field(..., description="Investment strategies to optimize")
     anos: int = Field(..., gt=0, le=100, description="Investment period in years")
     optimize_aportes: bool = Field(False, description="Whether to optimize contribution amounts")
     aporte_bounds: Optional[List[tuple]] = Field(None, description="Bounds for contribution optimization")
+    inflacao_anual: float = Field(4.5, ge=0, le=50, description="Annual inflation rate (%)")
+
+class FrontierParams(BaseModel):
+    """Parameters for efficient frontier computation"""
+    cenarios: Dict[str, List[float]] = Field(..., description="Final value per scenario for each strategy")
+    num_pontos: int = Field(50, ge=2, le=500, description="Number of frontier points")
+    aversao_min: Optional[float] = Field(None, gt=0, description="Lowest risk aversion of the sweep")
+    aversao_max: Optional[float] = Field(None, gt=0, description="Highest risk aversion of the sweep")
+    inflacao_anual: float = Field(4.5, ge=0, le=50, description="Annual inflation rate (%)")
 
 class SimulationResult(BaseModel):
     """Result of an investment simulation"""
     historico: List[float]
+    meses: Optional[List[int]] = Field(None, description="1-based month of each history point when downsampled")
     patrimonio_final: float
     rentabilidade_total: float
     rentabilidade_anual: float
@@ -97,182 +387,580 @@ class OptimizationResult(BaseModel):
     aporte_mensal_otimo: Optional[float]
     retorno_final: float
 
-# Global simulator instance
-simulator = None
+class FrontierResult(BaseModel):
+    """Efficient frontier, ordered from lowest risk to highest return"""
+    estrategias: List[str]
+    aversoes: List[float]
+    pesos: List[List[float]]
+    valores_esperados: List[float]
+    riscos: List[float]
 
-def get_simulator(params: SimulationParams) -> OptimizedInvestment:
-    """Get or create simulator instance with given parameters"""
-    return OptimizedInvestment(
-        inflacao=params.inflacao_anual,
-        ir_renda_fixa=params.ir_renda_fixa,
-        ir_aluguel=params.ir_aluguel
-    )
+class ChartRequest(BaseModel):
+    """Chart drawn by the visualization module from simulations run on demand"""
+    chart: Literal["comparacao_imoveis", "cenarios_investimento"] = Field(
+        ..., description="comparacao_imoveis takes one planta and one pronto simulation")
+    simulacoes: List[BatchItem] = Field(..., min_length=1, max_length=7, description="Simulations to plot")
+    format: Literal["png", "jpg", "svg"] = Field("png", description="Image format")
+    dpi: int = Field(100, ge=50, le=300, description="Resolution of raster formats")
+
+class JobRequest(BaseModel):
+    """Background job: a simulation strategy, a batch, an optimization or a frontier"""
+    kind: Literal["cdi", "ipca", "planta", "pronto", "mixed", "batch", "optimize", "frontier"]
+    params: Dict[str, Any] = Field(..., description="Request body of the matching synchronous endpoint")
+
+class JobStatus(BaseModel):
+    """State of a background job"""
+    id: str
+    kind: str
+    status: Literal["queued", "running", "done", "failed", "expired"]
+    progress: float
+    attempts: int
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None
+
+# Parameters of each job kind are validated like the synchronous endpoints
+JOB_MODELS = {
+    "cdi": CDIParams, "ipca": IPCAParams, "planta": RealEstateParams, "pronto": RealEstateParams,
+    "mixed": MixedStrategyParams, "batch": BatchSimulationParams, "optimize": OptimizationParams,
+    "frontier": FrontierParams
+}
 
 @app.get("/")
 async def root():
     """Health check endpoint"""
     return {"message": "Investment Simulation API is running"}
 
-@app.post("/simulate/cdi", response_model=SimulationResult)
-async def simulate_cdi(params: CDIParams):
-    """Simulate CDI investment"""
+@app.get("/health")
+async def health():
+    """Liveness check; answers from the event loop while workers are busy"""
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "executors": {executor.name: executor.stats() for executor in EXECUTORS},
+        "response_cache": response_cache.stats(),
+        "persistence": persistence_queue.stats(),
+        "single_flight": simulation_flights.stats()
+    }
+
+async def warm_up() -> None:
+    """
+    Prepare the process for traffic before reporting ready
+
+    Runs each kernel, a batch, an optimization and a frontier once in this
+    process (SciPy imports, first-call allocations) without starting any pool
+    process: pools start lazily on demand. Then computes the preset scenarios
+    into the response cache so the most common requests are hits from the
+    first one.
+    """
+    start = time.perf_counter()
+    steps: Dict[str, float] = {}
     try:
-        simulator = get_simulator(params)
-        historico = simulator.investimento_cdi(
-            aporte_inicial=params.aporte_inicial,
-            aporte_mensal=params.aporte_mensal,
-            taxa_cdi=params.taxa_cdi,
-            anos=params.anos
-        )
-        
-        patrimonio_final = historico[-1]
-        total_investido = params.aporte_inicial + (params.aporte_mensal * params.anos * 12)
-        rentabilidade_total = ((patrimonio_final / total_investido) - 1) * 100
-        rentabilidade_anual = ((patrimonio_final / total_investido) ** (1/params.anos) - 1) * 100
-        
-        result = SimulationResult(
-            historico=historico,
-            patrimonio_final=patrimonio_final,
-            rentabilidade_total=rentabilidade_total,
-            rentabilidade_anual=rentabilidade_anual
-        )
-        
-        # Save to Supabase if available
-        if SUPABASE_ENABLED:
-            saved = save_simulation_result(
-                strategy="CDI",
-                parameters=params.dict(),
-                result=result.dict()
-            )
-            result.saved_to_database = saved
-        
-        return result
+        step_start = time.perf_counter()
+        await asyncio.to_thread(warmup.warm_up_kernels)
+        steps["kernels"] = time.perf_counter() - step_start
+
+        step_start = time.perf_counter()
+        presets = warmup.load_presets()
+        for strategy, values in presets:
+            params = JOB_MODELS[strategy](**values)
+            await simulate_and_store(strategy, params, canonical_key(strategy, params.model_dump()))
+        steps["presets"] = time.perf_counter() - step_start
+        warmup_state["presets"] = len(presets)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        # A failed warm-up only costs latency; serve anyway and report why
+        warmup_state["error"] = str(e)
+        print(f"⚠️  Warm-up failed: {e}")
+    warmup_state["steps"] = steps
+    warmup_state["duration"] = time.perf_counter() - start
+    warmup_state["ready"] = True
+    print(f"Warm-up finished in {warmup_state['duration']:.2f}s")
 
-@app.post("/simulate/ipca", response_model=SimulationResult)
-async def simulate_ipca(params: IPCAParams):
-    """Simulate IPCA+ investment"""
+@app.get("/health/ready")
+async def readiness():
+    """Readiness check; 503 until the startup warm-up has finished"""
+    if not warmup_state["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming"}, headers={"Retry-After": "1"})
+    return {"status": "ready", "warmup": warmup_state}
+
+def output_options(
+    resolution: Literal["monthly", "quarterly", "annual"] = Query(
+        "monthly", description="Keep the last month of each period of the history"),
+    points: Optional[int] = Query(
+        None, ge=2, le=1200, description="Downsample the history to at most this many points"),
+    downsample: Literal["lttb", "minmax"] = Query(
+        "lttb", description="Downsampling method used with points"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return; 'summary' drops the history")
+) -> Dict[str, Any]:
+    """Output shaping options for simulate endpoints, keeping only non-defaults"""
     try:
-        simulator = get_simulator(params)
-        historico = simulator.investimento_ipca(
-            aporte_inicial=params.aporte_inicial,
-            aporte_mensal=params.aporte_mensal,
-            taxa_ipca=params.taxa_ipca,
-            anos=params.anos
-        )
-        
-        patrimonio_final = historico[-1]
-        total_investido = params.aporte_inicial + (params.aporte_mensal * params.anos * 12)
-        rentabilidade_total = ((patrimonio_final / total_investido) - 1) * 100
-        rentabilidade_anual = ((patrimonio_final / total_investido) ** (1/params.anos) - 1) * 100
-        
-        return SimulationResult(
-            historico=historico,
-            patrimonio_final=patrimonio_final,
-            rentabilidade_total=rentabilidade_total,
-            rentabilidade_anual=rentabilidade_anual
-        )
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-@app.post("/simulate/real-estate/under-construction", response_model=SimulationResult)
-async def simulate_real_estate_under_construction(params: RealEstateParams):
-    """Simulate real estate investment (under construction)"""
+    options: Dict[str, Any] = {}
+    if resolution != "monthly":
+        options["resolution"] = resolution
+    if points is not None:
+        options["points"] = points
+        options["downsample"] = downsample
+    if selected is not None:
+        options["fields"] = selected
+    return options
+
+async def run_timed(executor: BoundedExecutor, operation: str, fn: Callable, *args: Any,
+                    timeout: Optional[float] = None, request: Optional[Request] = None) -> Any:
+    """Run ``fn`` on ``executor``, recording kernel time and time spent waiting for a worker"""
+    start = time.perf_counter()
+    result, kernel = await executor.run(tasks.timed, fn, *args, timeout=timeout, request=request)
+    stage_duration.observe(kernel, operation=operation, stage="kernel")
+    stage_duration.observe(max(0.0, time.perf_counter() - start - kernel), operation=operation, stage="queue")
+    return result
+
+async def run_simulation(strategy: str, params: SimulationParams, request: Optional[Request]) -> SimulationResult:
+    """Run a simulation on the simulation executor and map failures to HTTP errors"""
     try:
-        simulator = get_simulator(params)
-        historico = simulator.compra_financiada_planta(
-            valor_imovel=params.valor_imovel,
-            entrada=params.entrada,
-            parcelas=params.parcelas,
-            taxa_juros=params.taxa_juros,
-            valorizacao=params.valorizacao,
-            aluguel=params.aluguel_mensal,
-            anos_construcao=params.anos_construcao or 3
-        )
-        
-        patrimonio_final = historico[-1]
-        total_investido = params.entrada + (params.aporte_mensal * params.anos * 12)
-        rentabilidade_total = ((patrimonio_final / total_investido) - 1) * 100 if total_investido > 0 else 0
-        rentabilidade_anual = ((patrimonio_final / total_investido) ** (1/params.anos) - 1) * 100 if total_investido > 0 else 0
-        
-        return SimulationResult(
-            historico=historico,
-            patrimonio_final=patrimonio_final,
-            rentabilidade_total=rentabilidade_total,
-            rentabilidade_anual=rentabilidade_anual
+        result = await run_timed(
+            fast_simulation_executor if strategy in FAST_STRATEGIES else simulation_executor,
+            strategy,
+            tasks.run_simulation,
+            strategy,
+            params.model_dump(),
+            timeout=SIMULATION_TIMEOUT,
+            request=request
         )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Simulation timed out")
+    except ClientDisconnectedError:
+        raise HTTPException(status_code=499, detail="Client disconnected")
+    except QueueFullError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    # Worker output is trusted: skip per-element validation of the history
+    return SimulationResult.model_construct(**result)
+
+def negotiate_media_type(request: Request, offered: tuple) -> str:
+    """Response media type from the Accept header, or 406"""
+    media_type = negotiate(request.headers.get("accept"), offered)
+    if media_type is None:
+        available = ", ".join(m for m in offered if is_available(m))
+        raise HTTPException(status_code=406, detail=f"Acceptable formats: {available}")
+    return media_type
+
+# Alternate representations documented next to the JSON schema
+SIMULATION_RESPONSES = {200: {"content": {
+    ARROW: {}, MSGPACK: {}, FLOAT32: {"schema": {"type": "string", "format": "binary"}}
+}}}
+FRONTIER_RESPONSES = {200: {"content": {ARROW: {}, MSGPACK: {}}}}
+
+async def cached_simulation(strategy: str, params: SimulationParams, request: Request,
+                            options: Dict[str, Any],
+                            persist: Optional[Callable[[SimulationParams, Dict[str, Any]], str]] = None
+                            ) -> Response:
+    """
+    Answer a simulation from the response cache, running it on a miss
+
+    A matching If-None-Match gets 304 without touching the cache. Hits reuse
+    the body stored for the negotiated media type, skipping both the
+    simulation and serialization.
+    Shaped responses (``options``) are cached on their own and derived from
+    the cached full result when present. Concurrent misses for the same
+    parameters are coalesced into one simulation. Cached payloads carry no
+    simulation_id: ``persist`` runs for every request, hit or miss, with the
+    full result, and the id it returns is added to this response only.
+    The ETag hashes the parameters, never the simulation_id, so a response
+    carrying an id gets a weak ETag and is never answered with 304: every
+    such request is saved and gets its own id.
+    """
+    base_key = canonical_key(strategy, params.model_dump())
+    key = canonical_key(strategy, params.model_dump(), **options) if options else base_key
+    media_type = negotiate_media_type(request, SIMULATION_MEDIA_TYPES)
+    etag = etag_for(key, ETAG_SUFFIXES[media_type])
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+
+    if persist is None and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    entry = response_cache.get(key)
+    headers["X-Cache"] = "HIT" if entry is not None else "MISS"
+    # Persisting needs the full result even when the shaped response is cached
+    base = entry if key == base_key else None
+    if base is None and (entry is None or persist is not None):
+        base = response_cache.get(base_key)
+        if base is None:
+            try:
+                base = await simulation_flights.do(
+                    base_key,
+                    lambda: simulate_and_store(strategy, params, base_key),
+                    is_disconnected=request.is_disconnected
+                )
+            except ClientDisconnectedError:
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    if entry is None:
+        entry = base if key == base_key else response_cache.put(key, shape_payload(base.payload, **options))
+
+    def render(payload: Dict[str, Any]) -> bytes:
+        with stage_duration.time(operation=strategy, stage="serialization"):
+            return render_simulation(payload, media_type)
+
+    simulation_id = persist(params, base.payload) if persist is not None else None
+    if simulation_id is None:
+        payload = entry.payload
+        body = entry.body(media_type, render)
+    else:
+        # The id belongs to this request, so its body is rendered instead of shared
+        payload = dict(entry.payload, simulation_id=simulation_id) if "simulation_id" in entry.payload \
+            else entry.payload
+        body = render(payload)
+        headers["ETag"] = f"W/{etag}"
+        headers["X-Simulation-Id"] = simulation_id
+    headers.update(simulation_headers(payload, media_type))
+    return Response(body, media_type=media_type, headers=headers)
+
+async def simulate_and_store(strategy: str, params: SimulationParams, key: str) -> CacheEntry:
+    """Run a simulation shared by all coalesced callers and cache it"""
+    result = await run_simulation(strategy, params, None)
+    return response_cache.put(key, dict(result))
+
+def save_cdi_simulation(params: SimulationParams, payload: Dict[str, Any],
+                        session_id: Optional[str] = None) -> str:
+    """
+    Queue a CDI simulation for saving to Supabase, returning its id
+
+    Called once per request, so every session saves its own copy of a shared
+    result. The response carries the simulation_id at once; saved_to_database
+    stays false and GET /simulations/{simulation_id}/status reports the
+    outcome. Anonymous simulations of one ``session_id`` share a single user;
+    without one, each gets its own anonymous user.
+    """
+    return persistence_queue.submit({
+        "strategy": "CDI",
+        "parameters": params.model_dump(),
+        "result": {k: v for k, v in payload.items() if k not in ("saved_to_database", "simulation_id")},
+        "session_id": session_id
+    })
+
+@app.post("/simulate/cdi", response_model=SimulationResult, responses=SIMULATION_RESPONSES)
+async def simulate_cdi(params: CDIParams, request: Request, options: Dict[str, Any] = Depends(output_options),
+        session_id: Optional[str] = Header(None, alias="X-Session-Id", max_length=64, pattern=r"^[A-Za-z0-9_-]+$",
+                                           description="Client session; its anonymous simulations share one user")):
+    """Simulate CDI investment"""
+    persist = functools.partial(save_cdi_simulation, session_id=session_id) \
+        if supabase_integration() is not None else None
+    return await cached_simulation("cdi", params, request, options, persist=persist)
 
-@app.post("/simulate/real-estate/ready", response_model=SimulationResult)
-async def simulate_real_estate_ready(params: RealEstateParams):
+@app.post("/simulate/ipca", response_model=SimulationResult, responses=SIMULATION_RESPONSES)
+async def simulate_ipca(params: IPCAParams, request: Request,
+        options: Dict[str, Any] = Depends(output_options)):
+    """Simulate IPCA+ investment"""
+    return await cached_simulation("ipca", params, request, options)
+
+@app.post("/simulate/real-estate/under-construction", response_model=SimulationResult, responses=SIMULATION_RESPONSES)
+async def simulate_real_estate_under_construction(params: RealEstateParams, request: Request,
+        options: Dict[str, Any] = Depends(output_options)):
+    """Simulate real estate investment (under construction)"""
+    return await cached_simulation("planta", params, request, options)
+
+@app.post("/simulate/real-estate/ready", response_model=SimulationResult, responses=SIMULATION_RESPONSES)
+async def simulate_real_estate_ready(params: RealEstateParams, request: Request,
+        options: Dict[str, Any] = Depends(output_options)):
     """Simulate real estate investment (ready property)"""
-    try:
-        simulator = get_simulator(params)
-        historico = simulator.compra_financiada_pronto(
-            valor_imovel=params.valor_imovel,
-            entrada=params.entrada,
-            parcelas=params.parcelas,
-            taxa_juros=params.taxa_juros,
-            valorizacao=params.valorizacao,
-            aluguel=params.aluguel_mensal
+    return await cached_simulation("pronto", params, request, options)
+
+@app.post("/simulate/mixed-strategy", response_model=SimulationResult, responses=SIMULATION_RESPONSES)
+async def simulate_mixed_strategy(params: MixedStrategyParams, request: Request,
+        options: Dict[str, Any] = Depends(output_options)):
+    """Simulate mixed strategy (real estate + CDI)"""
+    return await cached_simulation("mixed", params, request, options)
+
+async def _run_batch_chunk(strategy: str, chunk: List[Dict[str, Any]], request: Request) -> List[Dict[str, Any]]:
+    """Run one chunk on the simulation executor, waiting for a free slot"""
+    while True:
+        try:
+            return await run_timed(
+                simulation_executor, f"batch_{strategy}", tasks.run_simulation_batch, strategy, chunk,
+                timeout=SIMULATION_TIMEOUT, request=request
+            )
+        except QueueFullError as e:
+            # Headers are already sent, so back off instead of failing the stream
+            await asyncio.sleep(0.05 * e.retry_after)
+
+async def _batch_chunks(items: List[BatchItem], request: Request) -> AsyncIterator[tuple]:
+    """
+    Compute each strategy group chunk by chunk, yielding (strategy, indices, results)
+
+    Stops as soon as the client disconnects: the pending chunk is cancelled
+    and the remaining ones are never submitted.
+    """
+    groups: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        groups.setdefault(item.strategy, []).append(index)
+
+    for strategy, indices in groups.items():
+        for start in range(0, len(indices), BATCH_CHUNK_SIZE):
+            if await request.is_disconnected():
+                return
+            chunk_indices = indices[start:start + BATCH_CHUNK_SIZE]
+            chunk = [items[index].params.model_dump() for index in chunk_indices]
+            try:
+                results = await _run_batch_chunk(strategy, chunk, request)
+            except ClientDisconnectedError:
+                return
+            except asyncio.TimeoutError:
+                results = [{"error": "Simulation timed out"}] * len(chunk_indices)
+            except Exception as e:
+                results = [{"error": str(e)}] * len(chunk_indices)
+            yield strategy, chunk_indices, results
+
+def _batch_rows(strategy: str, indices: List[int], results: List[Dict[str, Any]],
+                options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Shaped output records of a chunk"""
+    return [
+        {"index": index, "strategy": strategy,
+         **(shape_payload(result, **options) if "error" not in result else result)}
+        for index, result in zip(indices, results)
+    ]
+
+async def _stream_batch(items: List[BatchItem], options: Dict[str, Any], encoder: BatchEncoder,
+                        request: Request) -> AsyncIterator[bytes]:
+    """Yield the encoded records of each chunk as it completes"""
+    async for strategy, indices, results in _batch_chunks(items, request):
+        rows = _batch_rows(strategy, indices, results, options)
+        with stage_duration.time(operation=f"batch_{strategy}", stage="serialization"):
+            chunk = encoder.encode(rows)
+        yield chunk
+
+    trailer = encoder.close()
+    if trailer:
+        yield trailer
+
+async def _stream_batch_events(items: List[BatchItem], options: Dict[str, Any],
+                               request: Request) -> AsyncIterator[bytes]:
+    """
+    Yield server-sent events for a batch
+
+    ``results`` carries the records of each chunk, ``progress`` the share of
+    entries completed, and ``aggregate`` running percentile bands over the
+    completed histories (at most every SSE_AGGREGATE_INTERVAL seconds, and
+    once at the end). ``done`` marks a complete run.
+    """
+    total = len(items)
+    completed = 0
+    bands = RunningBands()
+    last_aggregate = time.monotonic()
+
+    yield sse_event("progress", {"completed": 0, "total": total, "percent": 0.0})
+    async for strategy, indices, results in _batch_chunks(items, request):
+        completed += len(indices)
+        bands.add(result["historico"] for result in results if "error" not in result)
+
+        yield sse_event("results", _batch_rows(strategy, indices, results, options))
+        yield sse_event("progress", {
+            "completed": completed, "total": total, "percent": round(100.0 * completed / total, 2)
+        })
+        if completed == total or time.monotonic() - last_aggregate >= SSE_AGGREGATE_INTERVAL:
+            yield sse_event("aggregate", bands.snapshot())
+            last_aggregate = time.monotonic()
+
+    if completed == total:
+        yield sse_event("done", {"completed": completed, "total": total})
+
+@app.post("/simulate/batch")
+async def simulate_batch(params: BatchSimulationParams, request: Request,
+                         options: Dict[str, Any] = Depends(output_options)):
+    """
+    Run a heterogeneous list of simulations
+
+    Entries are grouped by strategy and each group is computed with one
+    vectorized call per chunk. Results stream back as NDJSON, one line per
+    entry with its ``index`` in the request, as soon as each chunk finishes;
+    lines are ordered by group, not by index. Output options apply to every line.
+    With Accept: application/msgpack entries are concatenated msgpack maps;
+    with the Arrow stream type each chunk is one record batch. With
+    Accept: text/event-stream the response is a server-sent event stream
+    with progress and running percentile bands as chunks complete.
+    Computation stops when the client disconnects.
+    """
+    media_type = negotiate_media_type(request, BATCH_MEDIA_TYPES)
+    if simulation_executor.queue_depth >= simulation_executor.capacity:
+        raise QueueFullError(simulation_executor.name)
+
+    if media_type == EVENT_STREAM:
+        return StreamingResponse(
+            _stream_batch_events(params.simulacoes, options, request),
+            media_type=media_type,
+            headers={"Vary": "Accept", "Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
         )
-        
-        patrimonio_final = historico[-1]
-        total_investido = params.entrada + (params.aporte_mensal * params.anos * 12)
-        rentabilidade_total = ((patrimonio_final / total_investido) - 1) * 100 if total_investido > 0 else 0
-        rentabilidade_anual = ((patrimonio_final / total_investido) ** (1/params.anos) - 1) * 100 if total_investido > 0 else 0
-        
-        return SimulationResult(
-            historico=historico,
-            patrimonio_final=patrimonio_final,
-            rentabilidade_total=rentabilidade_total,
-            rentabilidade_anual=rentabilidade_anual
+    return StreamingResponse(
+        _stream_batch(params.simulacoes, options, BatchEncoder(media_type), request),
+        media_type=media_type,
+        headers={"Vary": "Accept"}
+    )
+
+@app.post("/optimize", response_model=OptimizationResult)
+async def optimize_portfolio(params: OptimizationParams, request: Request):
+    """
+    Optimize portfolio allocation
+
+    Strategies are monthly histories when only weights are optimized, or
+    {"tipo": "cdi"|"ipca", "taxa": float} specs with optimize_aportes=true.
+    """
+    aporte_bounds = tuple(params.aporte_bounds[0]) if params.aporte_bounds else None
+    try:
+        result = await run_timed(
+            optimization_executor,
+            "optimize",
+            tasks.run_optimization,
+            params.estrategias,
+            params.anos,
+            params.optimize_aportes,
+            aporte_bounds,
+            params.inflacao_anual,
+            timeout=OPTIMIZATION_TIMEOUT,
+            request=request
         )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Optimization timed out")
+    except ClientDisconnectedError:
+        raise HTTPException(status_code=499, detail="Client disconnected")
+    except QueueFullError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    with stage_duration.time(operation="optimize", stage="serialization"):
+        body = render_json(result)
+    return Response(body, media_type=JSON)
 
-@app.post("/simulate/mixed-strategy", response_model=SimulationResult)
-async def simulate_mixed_strategy(params: MixedStrategyParams):
-    """Simulate mixed strategy (real estate + CDI)"""
+@app.post("/optimize/frontier", response_model=FrontierResult, responses=FRONTIER_RESPONSES)
+async def optimize_frontier(params: FrontierParams, request: Request):
+    """Compute the mean-variance efficient frontier over scenario final values"""
+    media_type = negotiate_media_type(request, FRONTIER_MEDIA_TYPES)
     try:
-        simulator = get_simulator(params)
-        historico = simulator.compra_e_renda_fixa(
-            valor_imovel=params.valor_imovel,
-            entrada=params.entrada,
-            parcelas=params.parcelas,
-            taxa_juros=params.taxa_juros,
-            valorizacao=params.valorizacao,
-            aluguel=params.aluguel_mensal,
-            aporte_mensal=params.aporte_mensal,
-            taxa_cdi=params.taxa_cdi,
-            anos_construcao=params.anos_construcao or 0
-        )
-        
-        patrimonio_final = historico[-1]
-        total_investido = params.entrada + (params.aporte_mensal * params.anos * 12)
-        rentabilidade_total = ((patrimonio_final / total_investido) - 1) * 100 if total_investido > 0 else 0
-        rentabilidade_anual = ((patrimonio_final / total_investido) ** (1/params.anos) - 1) * 100 if total_investido > 0 else 0
-        
-        return SimulationResult(
-            historico=historico,
-            patrimonio_final=patrimonio_final,
-            rentabilidade_total=rentabilidade_total,
-            rentabilidade_anual=rentabilidade_anual
+        result = await run_timed(
+            optimization_executor,
+            "frontier",
+            tasks.run_frontier,
+            params.cenarios,
+            params.num_pontos,
+            params.aversao_min,
+            params.aversao_max,
+            params.inflacao_anual,
+            timeout=OPTIMIZATION_TIMEOUT,
+            request=request
         )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Optimization timed out")
+    except ClientDisconnectedError:
+        raise HTTPException(status_code=499, detail="Client disconnected")
+    except QueueFullError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    with stage_duration.time(operation="frontier", stage="serialization"):
+        body = render_frontier(result, media_type)
+    return Response(body, media_type=media_type, headers={"Vary": "Accept"})
 
-@app.post("/optimize", response_model=OptimizationResult)
-async def optimize_portfolio(params: OptimizationParams):
-    """Optimize portfolio allocation"""
+@app.post("/jobs", status_code=202, response_model=JobStatus)
+async def submit_job(job: JobRequest):
+    """
+    Queue a simulation, batch or optimization as a background job
+
+    The job is stored in a local SQLite queue and survives API restarts;
+    poll GET /jobs/{id} and fetch GET /jobs/{id}/result once it is done.
+    """
     try:
-        # This would need to be implemented based on your optimization logic
-        # For now, returning a placeholder
-        raise HTTPException(status_code=501, detail="Portfolio optimization endpoint not yet implemented")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        params = JOB_MODELS[job.kind](**job.params)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=json.loads(e.json()))
+
+    job_id = await asyncio.to_thread(job_store.submit, job.kind, params.model_dump())
+    status = await asyncio.to_thread(job_store.get, job_id)
+    return JSONResponse(status_code=202, content=JobStatus(**status).model_dump(),
+                        headers={"Location": f"/jobs/{job_id}"})
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Status and progress of a background job"""
+    status = await asyncio.to_thread(job_store.get, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatus(**status)
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Result of a finished job, shaped like the synchronous endpoint's response"""
+    status = await asyncio.to_thread(job_store.get, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if status["status"] == "expired":
+        raise HTTPException(status_code=410, detail="Job result expired")
+    if status["status"] == "failed":
+        raise HTTPException(status_code=422, detail=status["error"])
+    if status["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {status['status']}")
+
+    result = await asyncio.to_thread(job_store.result, job_id)
+    return Response(render_json(result), media_type=JSON)
+
+@app.post("/charts", response_class=FileResponse,
+          responses={200: {"content": {media_type: {} for media_type in CHART_MEDIA_TYPES.values()}}})
+async def create_chart(params: ChartRequest, request: Request):
+    """
+    Render a chart for the given simulations
+
+    The file is stored under a hash of the simulations and render options:
+    a repeated request is served from disk without simulating or drawing,
+    and concurrent identical requests share one rendering.
+    """
+    if params.chart == "comparacao_imoveis" and sorted(item.strategy for item in params.simulacoes) != ["planta", "pronto"]:
+        raise HTTPException(status_code=422, detail="comparacao_imoveis takes one planta and one pronto simulation")
+
+    simulacoes = [item.model_dump() for item in params.simulacoes]
+    key = canonical_key("chart", {"chart": params.chart, "simulacoes": simulacoes},
+                        format=params.format, dpi=params.dpi)
+    path = CHARTS_DIR / key[:2] / f"{key}.{params.format}"
+    headers = {"X-Cache": "HIT"}
+
+    if not path.exists():
+        headers["X-Cache"] = "MISS"
+        try:
+            await chart_flights.do(
+                key,
+                lambda: run_timed(simulation_executor, "chart", tasks.render_chart,
+                                  params.chart, simulacoes, str(path), params.dpi, timeout=CHART_TIMEOUT),
+                is_disconnected=request.is_disconnected
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Chart rendering timed out")
+        except ClientDisconnectedError:
+            raise HTTPException(status_code=499, detail="Client disconnected")
+        except QueueFullError:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return FileResponse(
+        path=path,
+        media_type=CHART_MEDIA_TYPES[params.format],
+        filename=f"{params.chart}.{params.format}",
+        content_disposition_type="inline",
+        headers=headers
+    )
+
+@app.get("/simulations/{simulation_id}/status")
+async def get_simulation_status(simulation_id: str):
+    """Whether a queued simulation has been written to the database"""
+    status = await persistence_queue.lookup(simulation_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    return {"simulation_id": simulation_id, "status": status, "saved_to_database": status == "saved"}
 
 @app.get("/charts/{chart_name}")
 async def get_chart(chart_name: str):
@@ -290,11 +978,12 @@ async def get_chart(chart_name: str):
 @app.get("/history/{user_email}")
 async def get_user_history(user_email: str, limit: int = 10):
     """Get simulation history for a user"""
-    if not SUPABASE_ENABLED:
+    database = supabase_integration()
+    if database is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
     try:
-        history = get_simulation_history(user_email, limit)
+        history = await asyncio.to_thread(database.get_simulation_history, user_email, limit)
         return {
             "user_email": user_email,
             "simulations": history,
@@ -306,11 +995,12 @@ async def get_user_history(user_email: str, limit: int = 10):
 @app.get("/stats")
 async def get_simulation_stats():
     """Get general simulation statistics"""
-    if not SUPABASE_ENABLED:
+    database = supabase_integration()
+    if database is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
     try:
-        stats = supabase_client.get_simulation_stats()
+        stats = database.supabase_client.get_simulation_stats()
         return stats
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -318,14 +1008,23 @@ async def get_simulation_stats():
 @app.get("/health/database")
 async def database_health():
     """Check database connection health"""
+    database = supabase_integration()
     return {
-        "supabase_enabled": SUPABASE_ENABLED,
-        "connected": supabase_client.is_connected() if SUPABASE_ENABLED else False,
-        "timestamp": "2025-01-08T23:00:00Z"
+        "supabase_enabled": database is not None,
+        "connected": database.supabase_client.is_connected() if database is not None else False,
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint; values are per process"""
+    counts = await asyncio.to_thread(job_store.counts)
+    job_counts.clear()
+    job_counts.update(counts)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Single-process development server; production runs `python -m backend.serve`
 if __name__ == "__main__":
     import uvicorn
-    import os
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
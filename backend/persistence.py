@@ -0,0 +1,251 @@
+"""
+Write-behind persistence for the Investment Simulation API
+Database saves are queued in memory and written in batches by a background task
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import closing
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Status of a record submitted to the queue
+PENDING = "pending"
+SAVED = "saved"
+FAILED = "failed"
+DROPPED = "dropped"
+
+STATUS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS persistence_status (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS persistence_status_age ON persistence_status (updated_at);
+"""
+
+
+class StatusStore:
+    """Status of the last ``max_statuses`` records, in process memory"""
+
+    def __init__(self, max_statuses: int = 10000):
+        self.max_statuses = max_statuses
+        self._statuses: "OrderedDict[str, str]" = OrderedDict()
+
+    def set(self, statuses: Iterable[Tuple[str, str]]) -> None:
+        """Record (id, status) pairs"""
+        for record_id, status in statuses:
+            self._statuses[record_id] = status
+            self._statuses.move_to_end(record_id)
+        while len(self._statuses) > self.max_statuses:
+            self._statuses.popitem(last=False)
+
+    def get(self, record_id: str) -> Optional[str]:
+        return self._statuses.get(record_id)
+
+
+class SQLiteStatusStore:
+    """
+    Record statuses in a SQLite table, shared by every process using ``path``.
+
+    Lets any backend.serve worker report on records queued by another one.
+    Statuses are kept for ``ttl`` seconds after their last change.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400.0):
+        self.path = path
+        self.ttl = ttl
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """New connection; the database and table are created on first use"""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with closing(sqlite3.connect(self.path, timeout=30, isolation_level=None)) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(STATUS_SCHEMA)
+            self._initialized = True
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        # Statuses are advisory: skip the fsync per commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def set(self, statuses: Iterable[Tuple[str, str]]) -> None:
+        """Record (id, status) pairs and forget statuses older than ``ttl``"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO persistence_status (id, status, updated_at) VALUES (?, ?, ?)",
+                [(record_id, status, now) for record_id, status in statuses]
+            )
+            conn.execute("DELETE FROM persistence_status WHERE updated_at < ?", (now - self.ttl,))
+            conn.execute("COMMIT")
+
+    def get(self, record_id: str) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT status FROM persistence_status WHERE id = ?", (record_id,)).fetchone()
+        return row[0] if row is not None else None
+
+
+class WriteBehindQueue:
+    """
+    Bounded in-process queue of records written to the database in batches.
+
+    ``submit`` never waits on the database: it assigns the record an id,
+    queues it and returns, so request latency does not depend on database
+    latency. The task started by ``start`` waits up to ``flush_interval`` for
+    a batch to fill, then hands up to ``batch_size`` records to ``save_batch``
+    on a thread; ``save_batch`` returns one success flag per record. A full
+    queue drops new records instead of growing. The statuses of the last
+    ``max_statuses`` records are kept in process memory and polled with
+    ``status``. With a shared ``status_store`` the background task also
+    copies them there, off the event loop, and ``lookup`` falls back to it
+    for records queued by other processes.
+
+    Records live in process memory: anything still queued when the process
+    is killed without ``stop`` is lost.
+    """
+
+    def __init__(self, save_batch: Callable[[List[Dict[str, Any]]], Sequence[bool]], max_size: int = 1000,
+                 batch_size: int = 50, flush_interval: float = 0.5, max_statuses: int = 10000,
+                 on_flush: Optional[Callable[[int, float], None]] = None,
+                 status_store: Optional[Any] = None):
+        self.save_batch = save_batch
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.statuses = StatusStore(max_statuses)
+        self.shared_statuses = status_store
+        self.on_flush = on_flush
+        self.saved = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        self._unpublished: List[Tuple[str, str]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._writing: Optional[asyncio.Future] = None
+
+    @property
+    def depth(self) -> int:
+        """Records waiting to be written"""
+        return len(self._queue)
+
+    def _set_statuses(self, statuses: List[Tuple[str, str]]) -> None:
+        self.statuses.set(statuses)
+        if self.shared_statuses is not None:
+            self._unpublished.extend(statuses)
+
+    def submit(self, record: Dict[str, Any]) -> str:
+        """Queue ``record`` (stored with its id under "id") and return the id"""
+        record_id = str(uuid.uuid4())
+        if len(self._queue) >= self.max_size:
+            self.dropped += 1
+            self._set_statuses([(record_id, DROPPED)])
+            return record_id
+
+        self._queue.append((record_id, dict(record, id=record_id)))
+        self._set_statuses([(record_id, PENDING)])
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return record_id
+
+    def status(self, record_id: str) -> Optional[str]:
+        """pending, saved, failed or dropped; None for unknown (or forgotten) ids"""
+        return self.statuses.get(record_id)
+
+    async def lookup(self, record_id: str) -> Optional[str]:
+        """Like ``status``, falling back to the shared store on a thread"""
+        status = self.statuses.get(record_id)
+        if status is None and self.shared_statuses is not None:
+            status = await asyncio.to_thread(self.shared_statuses.get, record_id)
+        return status
+
+    async def publish(self) -> None:
+        """Copy the statuses changed since the last call to the shared store"""
+        if not self._unpublished:
+            return
+        statuses, self._unpublished = self._unpublished, []
+        try:
+            await asyncio.to_thread(self.shared_statuses.set, statuses)
+        except Exception as e:
+            print(f"⚠️  Recording write-behind statuses failed: {e}")
+
+    async def flush(self) -> int:
+        """Write one batch now; returns the number of records taken from the queue"""
+        batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        if not batch:
+            await self.publish()
+            return 0
+
+        start = time.perf_counter()
+        try:
+            results = list(await asyncio.to_thread(self.save_batch, [record for _, record in batch]))
+        except Exception as e:
+            print(f"⚠️  Write-behind batch of {len(batch)} failed: {e}")
+            results = [False] * len(batch)
+        if self.on_flush is not None:
+            self.on_flush(len(batch), time.perf_counter() - start)
+
+        statuses = [
+            (record_id, SAVED if ok else FAILED)
+            for (record_id, _), ok in zip(batch, results + [False] * (len(batch) - len(results)))
+        ]
+        self._set_statuses(statuses)
+        await self.publish()
+        saved = sum(status == SAVED for _, status in statuses)
+        self.saved += saved
+        self.failed += len(batch) - saved
+        return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            # Pending statuses become visible to other processes before the batch is written
+            await self.publish()
+            if len(self._queue) < self.batch_size:
+                # Let concurrent requests join the batch
+                await asyncio.sleep(self.flush_interval)
+            # Shielded so that stopping never abandons a batch already taken off the queue
+            self._writing = asyncio.ensure_future(self.flush())
+            await asyncio.shield(self._writing)
+
+    def start(self) -> None:
+        """Start the background writer on the running event loop"""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop the writer after writing what is still queued, for at most ``timeout`` seconds"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writing is not None:
+            await self._writing
+            self._writing = None
+        self._wakeup = None
+
+        deadline = time.monotonic() + timeout
+        while self._queue and time.monotonic() < deadline:
+            await self.flush()
+        await self.publish()
+
+    def stats(self) -> dict:
+        """Queue depth and outcome counters"""
+        return {
+            "queued": self.depth,
+            "max_size": self.max_size,
+            "saved": self.saved,
+            "failed": self.failed,
+            "dropped": self.dropped
+        }
@@ -0,0 +1,68 @@
+"""
+Progress reporting for long-running API requests
+Server-sent event framing and running aggregates over partial results
+"""
+
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from backend.formats import render_json
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """One server-sent event with a JSON payload"""
+    return b"event: " + event.encode() + b"\ndata: " + render_json(data) + b"\n\n"
+
+
+class RunningBands:
+    """
+    Percentile bands over the simulations completed so far.
+
+    Keeps each history at annual resolution as float32 (at most 100 values
+    per simulation), so memory grows by about 400 bytes per entry. Histories
+    of different lengths are aligned from month 1; a year only counts the
+    simulations that reach it.
+    """
+
+    def __init__(self, percentiles: Sequence[float] = PERCENTILES):
+        self.percentiles = tuple(percentiles)
+        self._annual: List[np.ndarray] = []
+        self._finals: List[float] = []
+
+    @property
+    def count(self) -> int:
+        return len(self._finals)
+
+    def add(self, historicos: Iterable[Sequence[float]]) -> None:
+        """Add the histories of a completed chunk"""
+        for historico in historicos:
+            historico = np.asarray(historico, dtype=np.float64)
+            if len(historico) == 0:
+                continue
+            self._annual.append(historico[11::12].astype(np.float32))
+            self._finals.append(float(historico[-1]))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current bands of the final wealth and of wealth at the end of each year"""
+        if not self._finals:
+            return {"completed": 0}
+
+        names = [f"p{p:g}" for p in self.percentiles]
+        finals = np.percentile(self._finals, self.percentiles)
+        snapshot = {
+            "completed": self.count,
+            "patrimonio_final": dict(zip(names, finals.tolist())),
+        }
+
+        years = max(len(row) for row in self._annual)
+        if years:
+            matrix = np.full((len(self._annual), years), np.nan, dtype=np.float32)
+            for i, row in enumerate(self._annual):
+                matrix[i, :len(row)] = row
+            bands = np.nanpercentile(matrix, self.percentiles, axis=0)
+            snapshot["bandas"] = {"meses": list(range(12, 12 * years + 1, 12))}
+            snapshot["bandas"].update((name, band.tolist()) for name, band in zip(names, bands))
+        return snapshot
@@ -0,0 +1,193 @@
+"""
+Production launcher for the Investment Simulation API
+Imports the app once, then forks uvicorn workers that share one listening socket
+"""
+
+import argparse
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+# Add parent directory to path to import core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+
+from backend.workers import available_cpus
+
+# Default number of HTTP workers when WEB_CONCURRENCY is not set; each one
+# holds a full copy-on-write image of the app, so memory bounds it too
+MAX_DEFAULT_WORKERS = 4
+
+# Proxies whose X-Forwarded-For entries are trusted: the platform load
+# balancer sits on a private network. Never "*": uvicorn would then take the
+# leftmost entry, which the client controls.
+DEFAULT_FORWARDED_ALLOW_IPS = "127.0.0.1,::1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,fc00::/7"
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Listening socket created before forking, inherited by every worker"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    """
+    Prefork process manager.
+
+    The application is imported by the parent before forking, so NumPy,
+    SciPy and the API module are loaded once and their pages are shared
+    copy-on-write by all workers. Each worker runs its own uvicorn server and
+    event loop on the shared socket; the kernel spreads connections between
+    them. Workers that exit are replaced, with a short pause if they keep
+    dying right after starting. SIGTERM/SIGINT stop the workers gracefully
+    and SIGKILL any that are still running after ``graceful_timeout``.
+    ``on_exit`` runs in a worker after its server has stopped.
+    """
+
+    def __init__(self, app, sock: socket.socket, workers: int, graceful_timeout: float = 30.0,
+                 log_level: str = "info", forwarded_allow_ips: str = DEFAULT_FORWARDED_ALLOW_IPS,
+                 on_exit: Optional[Callable[[], None]] = None):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.forwarded_allow_ips = forwarded_allow_ips
+        self.on_exit = on_exit
+        self.children: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            config = uvicorn.Config(self.app, log_level=self.log_level, proxy_headers=True,
+                                    forwarded_allow_ips=self.forwarded_allow_ips)
+            code = 0
+            try:
+                uvicorn.Server(config).run(sockets=[self.sock])
+            except BaseException:
+                code = 1
+            finally:
+                # os._exit skips interpreter cleanup: release pools explicitly
+                try:
+                    if self.on_exit is not None:
+                        self.on_exit()
+                except BaseException:
+                    code = 1
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        return pid
+
+    def stop(self, *_args) -> None:
+        """Ask every worker to finish its in-flight requests and exit"""
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+
+        deadline: Optional[float] = None
+        while self.children:
+            if self.stopping and deadline is None:
+                deadline = time.monotonic() + self.graceful_timeout
+            if deadline is not None and time.monotonic() > deadline:
+                for pid in list(self.children):
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                deadline = float("inf")
+
+            try:
+                pid, _status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.1)
+                continue
+
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            if time.monotonic() - started < 1.0:
+                # Crashing at import or startup: avoid a fork loop
+                time.sleep(1.0)
+            self.spawn()
+        return 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the Investment Simulation API with prefork workers")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("WEB_CONCURRENCY", min(available_cpus(), MAX_DEFAULT_WORKERS))))
+    parser.add_argument("--graceful-timeout", type=float,
+                        default=float(os.environ.get("GRACEFUL_TIMEOUT", 30)))
+    parser.add_argument("--log-level", default=os.environ.get("LOG_LEVEL", "info"))
+    parser.add_argument("--forwarded-allow-ips",
+                        default=os.environ.get("FORWARDED_ALLOW_IPS", DEFAULT_FORWARDED_ALLOW_IPS),
+                        help="Comma-separated proxy addresses or networks trusted for X-Forwarded-For")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    prefork = args.workers > 1 and hasattr(os, "fork")
+
+    if prefork:
+        # Workers share cached results through disk unless a location was configured
+        os.environ.setdefault("SIMULATION_CACHE_DIR", tempfile.mkdtemp(prefix="simulation-cache-"))
+        # The HTTP workers already run in parallel: by default each runs its
+        # simulations on threads, reusing the modules imported before forking,
+        # instead of spawning pools that import NumPy and SciPy again. Pools
+        # configured as processes split the CPUs between the workers.
+        share = str(max(1, available_cpus() // args.workers))
+        for name in ("SIMULATION", "OPTIMIZATION"):
+            os.environ.setdefault(f"{name}_EXECUTOR", "thread")
+            os.environ.setdefault(f"{name}_WORKERS", share)
+
+    from backend import api, warmup
+
+    if not prefork:
+        uvicorn.run(api.app, host=args.host, port=args.port, log_level=args.log_level,
+                    proxy_headers=True, forwarded_allow_ips=args.forwarded_allow_ips)
+        return 0
+
+    # Load lazily imported modules and run each kernel once before forking,
+    # so every worker starts with them already in (shared) memory
+    warmup.warm_up_kernels()
+
+    # Background job workers belong to the parent, not to every HTTP worker
+    job_workers = api.JobWorkers(api.job_store, processes=api.JOB_WORKERS)
+    api.JOB_WORKERS = 0
+    job_workers.start()
+    try:
+        sock = bind_socket(args.host, args.port)
+        return Supervisor(api.app, sock, args.workers, args.graceful_timeout, args.log_level,
+                          args.forwarded_allow_ips, on_exit=api.shutdown_executors).run()
+    finally:
+        job_workers.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
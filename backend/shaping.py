@@ -0,0 +1,128 @@
+"""
+Server-side downsampling and field projection for simulation payloads
+Lets clients ask for fewer history points or only the summary fields
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+RESOLUTION_STEPS = {"monthly": 1, "quarterly": 3, "annual": 12}
+RESULT_FIELDS = (
+    "historico", "meses", "patrimonio_final", "rentabilidade_total",
+    "rentabilidade_anual", "saved_to_database", "simulation_id"
+)
+SUMMARY_FIELDS = tuple(field for field in RESULT_FIELDS if field not in ("historico", "meses"))
+
+
+def resolution_indices(length: int, resolution: str) -> np.ndarray:
+    """Indices of the last month of each period, always keeping the final month"""
+    step = RESOLUTION_STEPS[resolution]
+    indices = np.arange(step - 1, length, step)
+    if len(indices) == 0 or indices[-1] != length - 1:
+        indices = np.append(indices, length - 1)
+    return indices
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each interior bucket, the point
+    forming the largest triangle with the previously kept point and the mean
+    of the next bucket. Preserves the visual shape of the series.
+    """
+    length = len(y)
+    if points >= length:
+        return np.arange(length)
+    if points < 3:
+        return np.array([0, length - 1])
+
+    every = (length - 2) / (points - 2)
+    sampled = [0]
+    anchor = 0
+    for bucket in range(points - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, length)
+        mean_x = x[end:next_end].mean()
+        mean_y = y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[anchor] - mean_x) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (mean_y - y[anchor])
+        )
+        anchor = start + int(np.argmax(areas))
+        sampled.append(anchor)
+
+    sampled.append(length - 1)
+    return np.array(sampled)
+
+
+def minmax_indices(y: np.ndarray, points: int) -> np.ndarray:
+    """Downsampling that keeps the minimum and maximum of each bucket plus both ends"""
+    length = len(y)
+    if points >= length:
+        return np.arange(length)
+
+    buckets = (points - 2) // 2
+    indices = {0, length - 1}
+    edges = np.linspace(1, length - 1, buckets + 1).astype(int)
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            indices.add(start + int(np.argmin(y[start:end])))
+            indices.add(start + int(np.argmax(y[start:end])))
+    return np.array(sorted(indices))
+
+
+def parse_fields(fields: Optional[str]) -> Optional[tuple]:
+    """
+    Parse a comma-separated ``fields`` parameter.
+
+    ``summary`` expands to every field except the history. Raises ValueError
+    for unknown names.
+    """
+    if not fields:
+        return None
+
+    selected = []
+    for name in (field.strip() for field in fields.split(",")):
+        if not name:
+            continue
+        if name == "summary":
+            selected.extend(SUMMARY_FIELDS)
+        elif name in RESULT_FIELDS:
+            selected.append(name)
+        else:
+            raise ValueError(f"Unknown field '{name}'. Valid fields: summary, {', '.join(RESULT_FIELDS)}")
+    return tuple(dict.fromkeys(selected))
+
+
+def project(payload: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """Keep only ``fields`` of a payload (all of them when None)"""
+    if fields is None:
+        return payload
+    return {field: payload[field] for field in fields if field in payload}
+
+
+def shape_payload(payload: Dict[str, Any], resolution: str = "monthly", points: Optional[int] = None,
+                  downsample: str = "lttb", fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Downsample ``historico`` and project the fields of a simulation payload.
+
+    When the history is reduced, ``meses`` lists the 1-based month of each
+    kept point so clients can plot it on the original time axis.
+    """
+    shaped = dict(payload)
+    historico = payload.get("historico")
+    if historico is not None and len(historico) and (resolution != "monthly" or points is not None):
+        y = np.asarray(historico, dtype=float)
+        indices = resolution_indices(len(y), resolution)
+        if points is not None and points < len(indices):
+            x, values = indices.astype(float), y[indices]
+            kept = lttb_indices(x, values, points) if downsample == "lttb" else minmax_indices(values, points)
+            indices = indices[kept]
+        shaped["historico"] = y[indices].tolist()
+        shaped["meses"] = (indices + 1).tolist()
+
+    return project(shaped, fields)
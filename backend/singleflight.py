@@ -0,0 +1,86 @@
+"""
+Request coalescing for the Investment Simulation API
+Concurrent identical requests share a single in-flight computation
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from backend.workers import ClientDisconnectedError
+
+
+class SingleFlight:
+    """
+    Run at most one computation per key at a time.
+
+    The first caller for a key (the leader) starts the computation as its own
+    task; callers arriving while it runs (waiters) await the same task and
+    receive the same result or exception. The task is cancelled only when
+    every caller waiting on it has gone away, so one client disconnecting
+    does not fail the others.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.waiters = 0
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._callers: Dict[str, int] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Computations currently running"""
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]],
+                 is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+                 poll_interval: float = 0.25) -> Any:
+        """
+        Return the result of ``fn()``, shared with concurrent callers of ``key``.
+
+        Args:
+            key: Canonical request key
+            fn: Coroutine factory performing the computation
+            is_disconnected: Polled while waiting; the caller leaves when it returns True
+            poll_interval: Seconds between disconnect checks
+
+        Raises:
+            ClientDisconnectedError: If this caller's client disconnects first
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._callers[key] = 0
+            task.add_done_callback(lambda _task: self._forget(key, _task))
+            self.leaders += 1
+        else:
+            self.waiters += 1
+        self._callers[key] += 1
+
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=poll_interval if is_disconnected else None)
+                if done:
+                    return task.result()
+                if await is_disconnected():
+                    raise ClientDisconnectedError()
+        finally:
+            if self._calls.get(key) is task:
+                self._callers[key] -= 1
+                if self._callers[key] == 0 and not task.done():
+                    task.cancel()
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._callers[key]
+
+    def stats(self) -> dict:
+        """Coalescing counters; coalesce_ratio is the share of requests that joined a flight"""
+        total = self.leaders + self.waiters
+        return {
+            "leaders": self.leaders,
+            "waiters": self.waiters,
+            "in_flight": self.in_flight,
+            "coalesce_ratio": self.waiters / total if total else 0.0,
+        }
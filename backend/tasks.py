@@ -0,0 +1,278 @@
+"""
+CPU-bound tasks executed by the API worker pools
+Module-level functions only, so they can be pickled into worker processes
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Add parent directory to path to import core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from core import (
+    OptimizedInvestment, cache_otimizacao,
+    simular_lote_cdi, simular_lote_ipca, simular_lote_imovel, simular_lote_misto
+)
+
+# Optional on-disk tier shared by all optimization worker processes
+if os.environ.get("OPTIMIZATION_CACHE_DIR"):
+    cache_otimizacao.diretorio = Path(os.environ["OPTIMIZATION_CACHE_DIR"])
+
+
+def _build_strategy(simulator: OptimizedInvestment, name: str, spec: Any):
+    """Turn a {"tipo": "cdi"|"ipca", "taxa": float} spec into a history generator"""
+    if not isinstance(spec, dict) or spec.get("tipo") not in ("cdi", "ipca") or "taxa" not in spec:
+        raise ValueError(
+            f"Strategy '{name}' must be {{'tipo': 'cdi'|'ipca', 'taxa': float}} when optimizing contributions"
+        )
+
+    taxa = float(spec["taxa"])
+    if spec["tipo"] == "cdi":
+        return lambda aporte_inicial, aporte_mensal, anos: simulator.investimento_cdi(
+            aporte_inicial, aporte_mensal, taxa, anos
+        )
+    return lambda aporte_inicial, aporte_mensal, anos: simulator.investimento_ipca(
+        aporte_inicial, aporte_mensal, taxa, anos
+    )
+
+
+def run_optimization(estrategias: Dict[str, Any], anos: int, optimize_aportes: bool,
+                     aporte_bounds: Optional[Tuple[float, float]],
+                     inflacao_anual: float) -> Dict[str, Any]:
+    """
+    Run OptimizedInvestment.otimizar_portfolio and return a JSON-ready result.
+
+    Strategies are monthly histories (lists of floats) when only weights are
+    optimized, or CDI/IPCA+ specs when contributions are optimized too.
+    """
+    simulator = OptimizedInvestment(inflacao=inflacao_anual)
+
+    if optimize_aportes:
+        estrategias = {
+            nome: _build_strategy(simulator, nome, spec) for nome, spec in estrategias.items()
+        }
+    elif not all(isinstance(historico, list) for historico in estrategias.values()):
+        raise ValueError("Each strategy must be a monthly history (list of numbers)")
+
+    pesos, aporte_inicial, aporte_mensal, retorno_final = simulator.otimizar_portfolio(
+        estrategias, anos, optimize_aportes=optimize_aportes, aporte_bounds=aporte_bounds
+    )
+
+    return {
+        "pesos_otimos": [float(peso) for peso in pesos],
+        "aporte_inicial_otimo": None if aporte_inicial is None else float(aporte_inicial),
+        "aporte_mensal_otimo": None if aporte_mensal is None else float(aporte_mensal),
+        "retorno_final": float(retorno_final),
+    }
+
+
+SIMULATION_STRATEGIES = ("cdi", "ipca", "planta", "pronto", "mixed")
+
+
+def _summarize(historico: Sequence[float], total_investido: float, anos: int) -> Dict[str, Any]:
+    """Final wealth and returns for a simulated history (a list or NumPy array)"""
+    patrimonio_final = float(historico[-1])
+    rentabilidade_total = ((patrimonio_final / total_investido) - 1) * 100 if total_investido > 0 else 0
+    rentabilidade_anual = ((patrimonio_final / total_investido) ** (1/anos) - 1) * 100 if total_investido > 0 else 0
+
+    return {
+        "historico": historico,
+        "patrimonio_final": patrimonio_final,
+        "rentabilidade_total": rentabilidade_total,
+        "rentabilidade_anual": rentabilidade_anual,
+    }
+
+
+def run_simulation(strategy: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one simulation and return a SimulationResult-shaped dict.
+
+    ``strategy`` is one of SIMULATION_STRATEGIES and ``params`` the dumped
+    request model for that strategy.
+    """
+    simulator = OptimizedInvestment(
+        inflacao=params["inflacao_anual"],
+        ir_renda_fixa=params["ir_renda_fixa"],
+        ir_aluguel=params["ir_aluguel"]
+    )
+
+    if strategy == "cdi":
+        historico = simulator.investimento_cdi(
+            aporte_inicial=params["aporte_inicial"],
+            aporte_mensal=params["aporte_mensal"],
+            taxa_cdi=params["taxa_cdi"],
+            anos=params["anos"]
+        )
+        total_investido = params["aporte_inicial"] + (params["aporte_mensal"] * params["anos"] * 12)
+    elif strategy == "ipca":
+        historico = simulator.investimento_ipca(
+            aporte_inicial=params["aporte_inicial"],
+            aporte_mensal=params["aporte_mensal"],
+            taxa_ipca=params["taxa_ipca"],
+            anos=params["anos"]
+        )
+        total_investido = params["aporte_inicial"] + (params["aporte_mensal"] * params["anos"] * 12)
+    elif strategy == "planta":
+        historico = simulator.compra_financiada_planta(
+            valor_imovel=params["valor_imovel"],
+            entrada=params["entrada"],
+            parcelas=params["parcelas"],
+            taxa_juros=params["taxa_juros"],
+            valorizacao=params["valorizacao"],
+            aluguel=params["aluguel_mensal"],
+            anos_construcao=params.get("anos_construcao") or 3
+        )
+        total_investido = params["entrada"] + (params["aporte_mensal"] * params["anos"] * 12)
+    elif strategy == "pronto":
+        historico = simulator.compra_financiada_pronto(
+            valor_imovel=params["valor_imovel"],
+            entrada=params["entrada"],
+            parcelas=params["parcelas"],
+            taxa_juros=params["taxa_juros"],
+            valorizacao=params["valorizacao"],
+            aluguel=params["aluguel_mensal"]
+        )
+        total_investido = params["entrada"] + (params["aporte_mensal"] * params["anos"] * 12)
+    elif strategy == "mixed":
+        historico = simulator.compra_e_renda_fixa(
+            valor_imovel=params["valor_imovel"],
+            entrada=params["entrada"],
+            parcelas=params["parcelas"],
+            taxa_juros=params["taxa_juros"],
+            taxa_cdi=params["taxa_cdi"],
+            aporte_mensal=params["aporte_mensal"],
+            valorizacao=params["valorizacao"]
+        )
+        total_investido = params["entrada"] + (params["aporte_mensal"] * params["anos"] * 12)
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    return _summarize(historico, total_investido, params["anos"])
+
+
+def run_simulation_batch(strategy: str, params_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Run many simulations of one strategy in a single vectorized call.
+
+    Returns one SimulationResult-shaped dict per entry of ``params_list``, in
+    order. Histories match run_simulation up to floating point rounding and
+    are returned as NumPy arrays, which pickle and serialize without a
+    per-element conversion.
+    """
+    if not params_list:
+        return []
+
+    def column(key: str) -> np.ndarray:
+        return np.array([params[key] for params in params_list])
+
+    inflacao, ir_renda_fixa = column("inflacao_anual"), column("ir_renda_fixa")
+
+    if strategy == "cdi":
+        historicos = simular_lote_cdi(column("aporte_inicial"), column("aporte_mensal"),
+                                      column("taxa_cdi"), column("anos"), inflacao, ir_renda_fixa)
+    elif strategy == "ipca":
+        historicos = simular_lote_ipca(column("aporte_inicial"), column("aporte_mensal"),
+                                       column("taxa_ipca"), column("anos"), inflacao, ir_renda_fixa)
+    elif strategy in ("planta", "pronto"):
+        if strategy == "planta":
+            anos_construcao = np.array([params.get("anos_construcao") or 3 for params in params_list])
+        else:
+            anos_construcao = np.zeros(len(params_list), dtype=int)
+        historicos = simular_lote_imovel(column("valor_imovel"), column("entrada"), column("parcelas"),
+                                         column("valorizacao"), column("aluguel_mensal"), anos_construcao,
+                                         inflacao, column("ir_aluguel"))
+    elif strategy == "mixed":
+        historicos = simular_lote_misto(column("valor_imovel"), column("entrada"), column("parcelas"),
+                                        column("taxa_cdi"), column("aporte_mensal"), column("valorizacao"),
+                                        inflacao, ir_renda_fixa)
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    results = []
+    for params, historico in zip(params_list, historicos):
+        base = params["aporte_inicial"] if strategy in ("cdi", "ipca") else params["entrada"]
+        total_investido = base + (params["aporte_mensal"] * params["anos"] * 12)
+        results.append(_summarize(historico, total_investido, params["anos"]))
+    return results
+
+
+def run_frontier(cenarios: Dict[str, List[float]], num_pontos: int,
+                 aversao_min: Optional[float], aversao_max: Optional[float],
+                 inflacao_anual: float) -> Dict[str, Any]:
+    """Compute the efficient frontier and return a FrontierResult-shaped dict of NumPy arrays"""
+    simulator = OptimizedInvestment(inflacao=inflacao_anual)
+    aversoes, pesos, valores_esperados, riscos = simulator.fronteira_eficiente(
+        cenarios=cenarios,
+        num_pontos=num_pontos,
+        aversao_min=aversao_min,
+        aversao_max=aversao_max
+    )
+
+    return {
+        "estrategias": list(cenarios.keys()),
+        "aversoes": aversoes,
+        "pesos": pesos,
+        "valores_esperados": valores_esperados,
+        "riscos": riscos,
+    }
+
+
+def timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """Run ``fn(*args)`` in the worker and return its result with the seconds it took"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+# Labels of each strategy in rendered charts
+CHART_LABELS = {
+    "cdi": "CDI", "ipca": "IPCA+", "planta": "Imóvel na Planta", "pronto": "Imóvel Pronto",
+    "mixed": "Estratégia Mista"
+}
+
+# pyplot keeps global figure state; thread pools must not draw concurrently
+_chart_lock = threading.Lock()
+
+
+def render_chart(chart: str, simulacoes: List[Dict[str, Any]], path: str, dpi: int) -> str:
+    """
+    Run the simulations of a chart and draw it with the visualization module.
+
+    ``simulacoes`` are {"strategy", "params"} items; "comparacao_imoveis" takes
+    one "planta" and one "pronto" item. The figure is written next to ``path``
+    and renamed over it, so concurrent readers never see a partial file.
+    matplotlib is imported here, with the non-interactive Agg backend, so only
+    processes that render charts pay for it.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import visualization
+
+    historicos: Dict[str, List[float]] = {}
+    for item in simulacoes:
+        label = CHART_LABELS[item["strategy"]]
+        if label in historicos:
+            label = f"{label} ({sum(name.startswith(label) for name in historicos) + 1})"
+        historicos[label] = list(run_simulation(item["strategy"], item["params"])["historico"])
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(f".{target.stem}.{os.getpid()}.{threading.get_ident()}{target.suffix}")
+    with _chart_lock:
+        if chart == "comparacao_imoveis":
+            by_strategy = {item["strategy"]: CHART_LABELS[item["strategy"]] for item in simulacoes}
+            planta, pronto = historicos[by_strategy["planta"]], historicos[by_strategy["pronto"]]
+            meses = min(len(planta), len(pronto))
+            visualization.plotar_historico_planta_pronto(
+                planta[:meses], pronto[:meses], meses, caminho_saida=str(partial), exibir=False, dpi=dpi)
+        else:
+            anos = max(item["params"]["anos"] for item in simulacoes)
+            visualization.plotar_cenarios(historicos, anos, caminho_saida=str(partial), exibir=False, dpi=dpi)
+    os.replace(partial, target)
+    return str(target)
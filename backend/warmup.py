@@ -0,0 +1,71 @@
+"""
+Startup warm-up for the Investment Simulation API
+Exercises every kernel once and lists the preset scenarios cached at startup
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+from backend import tasks
+
+# Defaults of main.py: the scenarios the frontend and the docs start from
+_BASE = {"aporte_inicial": 100000.0, "aporte_mensal": 3000.0}
+_IMOVEL = {
+    "valor_imovel": 500000.0, "entrada": 100000.0, "parcelas": 240, "taxa_juros": 9.0,
+    "valorizacao": 6.0, "aluguel_mensal": 2500.0, "aporte_mensal": 3000.0, "aporte_inicial": 100000.0
+}
+
+PRESETS: List[Tuple[str, Dict[str, Any]]] = [
+    preset
+    for anos in (10, 20, 30)
+    for preset in (
+        ("cdi", dict(_BASE, anos=anos, taxa_cdi=10.5)),
+        ("ipca", dict(_BASE, anos=anos, taxa_ipca=5.5)),
+        ("planta", dict(_IMOVEL, anos=anos, anos_construcao=3)),
+        ("pronto", dict(_IMOVEL, anos=anos)),
+        ("mixed", dict(_IMOVEL, anos=anos, taxa_cdi=10.5)),
+    )
+]
+
+
+def load_presets() -> List[Tuple[str, Dict[str, Any]]]:
+    """PRESETS, or the [{"strategy", "params"}] list in the WARMUP_PRESETS_FILE JSON file"""
+    path = os.environ.get("WARMUP_PRESETS_FILE")
+    if not path:
+        return PRESETS
+    with open(path, encoding="utf-8") as f:
+        return [(item["strategy"], item["params"]) for item in json.load(f)]
+
+
+def warm_up_kernels() -> Dict[str, float]:
+    """
+    Run every simulation kernel, a vectorized batch, a portfolio optimization
+    and an efficient frontier once on small inputs.
+
+    Loads scipy.optimize and pays first-call allocation costs in the calling
+    process. Returns seconds per step. Module-level, so worker pools can run it.
+    """
+    steps: Dict[str, float] = {}
+
+    def step(name: str, fn, *args) -> Any:
+        start = time.perf_counter()
+        result = fn(*args)
+        steps[name] = time.perf_counter() - start
+        return result
+
+    params = dict(_IMOVEL, anos=2, anos_construcao=1, taxa_cdi=10.5, taxa_ipca=5.5,
+                  inflacao_anual=4.5, ir_renda_fixa=15.0, ir_aluguel=27.5)
+    historicos = {
+        strategy: step(strategy, tasks.run_simulation, strategy, params)["historico"]
+        for strategy in tasks.SIMULATION_STRATEGIES
+    }
+    for strategy in tasks.SIMULATION_STRATEGIES:
+        step(f"batch_{strategy}", tasks.run_simulation_batch, strategy, [params, params])
+
+    step("optimize", tasks.run_optimization,
+         {"cdi": list(historicos["cdi"]), "ipca": list(historicos["ipca"])}, 2, False, None, 4.5)
+    step("frontier", tasks.run_frontier,
+         {"cdi": [1.0, 1.1, 1.2], "ipca": [1.05, 1.1, 1.15]}, 3, None, None, 4.5)
+    return steps
@@ -0,0 +1,175 @@
+"""
+Bounded worker pools for CPU-bound work in the Investment Simulation API
+Keeps simulation and optimization work off the asyncio event loop
+"""
+
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when an executor already holds its maximum number of tasks"""
+
+    def __init__(self, name: str, retry_after: int = 1):
+        super().__init__(f"{name} executor queue is full")
+        self.retry_after = retry_after
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when the client went away while its task was pending"""
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def available_cpus() -> int:
+    """
+    CPUs this process may use: its affinity mask, capped by a cgroup v2 CPU
+    quota. In containers os.cpu_count() reports the host's CPUs instead.
+    """
+    count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            count = min(count, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, count)
+
+
+class BoundedExecutor:
+    """
+    Thread or process pool with a queue depth limit.
+
+    At most ``max_workers + max_queue`` tasks may be submitted and not yet
+    finished; further submissions fail fast with QueueFullError instead of
+    queueing without bound. Awaiting callers get a wall-clock timeout and stop
+    waiting when their client disconnects. Tasks that have not started yet are
+    cancelled; a task that is already running in a worker cannot be interrupted,
+    so it keeps its slot until it finishes and backpressure stays accurate.
+    """
+
+    def __init__(self, name: str, kind: str = "process", max_workers: Optional[int] = None,
+                 max_queue: int = 16):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers or available_cpus()
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        """Tasks submitted and not yet finished (running or waiting)"""
+        return self._pending
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of tasks held at once"""
+        return self.max_workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        """Create the underlying pool on first use"""
+        if self._executor is None:
+            if self.kind == "process":
+                # spawn avoids forking a process that is running the event loop
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"{self.name}-worker"
+                )
+        return self._executor
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable, *args: Any, timeout: Optional[float] = None,
+                  request=None, poll_interval: float = 0.25) -> Any:
+        """
+        Run ``fn(*args)`` on the pool and await its result.
+
+        Args:
+            fn: Picklable callable (module-level function for process pools)
+            *args: Positional arguments for ``fn``
+            timeout: Wall-clock limit in seconds (None waits indefinitely)
+            request: Starlette request polled for client disconnects
+            poll_interval: Seconds between disconnect checks
+
+        Raises:
+            QueueFullError: If the executor is at capacity
+            asyncio.TimeoutError: If the timeout expires first
+            ClientDisconnectedError: If the client disconnects first
+        """
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise QueueFullError(self.name)
+            self._pending += 1
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release)
+
+        waiter = asyncio.wrap_future(future)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                wait_for = poll_interval if request is not None else None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    wait_for = remaining if wait_for is None else min(wait_for, remaining)
+
+                done, _ = await asyncio.wait({waiter}, timeout=wait_for)
+                if done:
+                    return waiter.result()
+                if request is not None and await request.is_disconnected():
+                    raise ClientDisconnectedError()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the pool, cancelling tasks that have not started.
+
+        With ``wait`` (the default) running tasks finish and the worker
+        threads or processes are joined; without it, pool processes can
+        outlive a parent that exits right away.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """Current sizing and queue depth"""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.queue_depth,
+        }
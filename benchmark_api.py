@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Investment Simulation API response path
+Measures where request time goes for typical simulation payloads
+"""
+
+import json
+import os
+import subprocess
+import sys
+import timeit
+from typing import Callable, Dict, Any, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from backend import tasks
+from backend.api import SimulationResult
+from backend.compression import BrotliStream, GzipStream, brotli
+from backend.formats import BatchEncoder, NDJSON, render_json
+
+PAYLOAD_YEARS = (10, 30, 100)
+
+# Cold import of the API entry point must stay under this many milliseconds
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 1000))
+# Modules only needed by charts, optimizations or persistence, never at import
+LAZY_MODULES = ("matplotlib", "scipy.optimize", "supabase", "supabase_integration", "visualization")
+
+def simulation_params(anos: int) -> Dict[str, Any]:
+    """CDI request parameters for a run of ``anos`` years"""
+    return {
+        "aporte_inicial": 100000.0, "aporte_mensal": 2000.0, "anos": anos, "taxa_cdi": 10.5,
+        "inflacao_anual": 4.5, "ir_renda_fixa": 15.0, "ir_aluguel": 27.5
+    }
+
+def best_time(fn: Callable[[], Any], repeat: int = 5) -> float:
+    """Best per-call time in microseconds"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+def validated_stdlib(result: Dict[str, Any]) -> bytes:
+    """Previous path: validate into the model, encode, then stdlib json"""
+    model = SimulationResult(**result)
+    return json.dumps(jsonable_encoder(model), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def trusted_fast(result: Dict[str, Any]) -> bytes:
+    """Current path: construct without validation, then render_json"""
+    return render_json(dict(SimulationResult.model_construct(**result)))
+
+def benchmark_serialization() -> None:
+    """Serialization share of a /simulate/cdi request, before and after the fast path"""
+    print("Serialization share of /simulate/cdi (kernel + serialization, microseconds)")
+    print(f"{'years':>6} {'kernel':>10} {'before':>10} {'share':>7} {'after':>10} {'share':>7}")
+    for anos in PAYLOAD_YEARS:
+        params = simulation_params(anos)
+        result = tasks.run_simulation("cdi", params)
+        kernel = best_time(lambda: tasks.run_simulation("cdi", params))
+        before = best_time(lambda: validated_stdlib(result))
+        after = best_time(lambda: trusted_fast(result))
+        print(f"{anos:>6} {kernel:>10.1f} {before:>10.1f} {before / (kernel + before):>7.1%} "
+              f"{after:>10.1f} {after / (kernel + after):>7.1%}")
+
+def compression_payloads() -> Dict[str, bytes]:
+    """Typical response bodies: single histories and a 100-entry NDJSON batch"""
+    payloads = {}
+    for anos in PAYLOAD_YEARS:
+        payloads[f"cdi {anos}y json"] = render_json(tasks.run_simulation("cdi", simulation_params(anos)))
+    batch = tasks.run_simulation_batch(
+        "cdi", [dict(simulation_params(30), taxa_cdi=8.0 + i * 0.05) for i in range(100)]
+    )
+    payloads["batch 100x30y ndjson"] = BatchEncoder(NDJSON).encode(
+        dict(result, index=i, strategy="cdi") for i, result in enumerate(batch)
+    )
+    return payloads
+
+def benchmark_compression(link_mbps: float = 10.0) -> None:
+    """Compressed size, CPU time and net time saved on a ``link_mbps`` link per coding level"""
+    codecs = [(f"gzip-{level}", lambda level=level: GzipStream(level)) for level in (1, 6, 9)]
+    if brotli is not None:
+        codecs += [(f"br-{quality}", lambda quality=quality: BrotliStream(quality)) for quality in (1, 4, 9)]
+
+    print(f"Compression trade-off (net = transfer time saved at {link_mbps:g} Mbit/s minus CPU time)")
+    print(f"{'payload':>22} {'bytes':>9} {'codec':>8} {'ratio':>7} {'cpu us':>9} {'MB/s':>7} {'net ms':>8}")
+    for name, body in compression_payloads().items():
+        for codec, factory in codecs:
+            def compress():
+                stream = factory()
+                return stream.compress(body) + stream.finish()
+            size = len(compress())
+            cpu = best_time(compress, repeat=3)
+            saved_ms = (len(body) - size) * 8 / (link_mbps * 1e6) * 1e3
+            print(f"{name:>22} {len(body):>9} {codec:>8} {len(body) / size:>7.1f} {cpu:>9.0f} "
+                  f"{len(body) / cpu:>7.0f} {saved_ms - cpu / 1e3:>8.2f}")
+
+def import_times(module: str = "backend.api") -> Dict[str, Tuple[int, int]]:
+    """(self, cumulative) microseconds per module from ``python -X importtime`` in a fresh interpreter"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def benchmark_imports(module: str = "backend.api", repeat: int = 3) -> bool:
+    """Cold import time of the API entry point against IMPORT_TIME_BUDGET_MS"""
+    runs = [import_times(module) for _ in range(repeat)]
+    best = min(runs, key=lambda times: times[module][1])
+    total_ms = best[module][1] / 1e3
+    eager = [name for name in best if name.split(".")[0] in LAZY_MODULES or name in LAZY_MODULES]
+
+    print(f"Import time of {module} (best of {repeat})")
+    for name, (_, cumulative) in sorted(best.items(), key=lambda item: -item[1][1])[:15]:
+        print(f"{cumulative / 1e3:>10.1f} ms  {name}")
+    print(f"total {total_ms:.1f} ms, budget {IMPORT_TIME_BUDGET_MS:.0f} ms, eagerly imported: {eager or 'none'}")
+    return total_ms <= IMPORT_TIME_BUDGET_MS and not eager
+
+BENCHMARKS = {
+    "serialization": benchmark_serialization,
+    "compression": benchmark_compression,
+    "imports": benchmark_imports,
+}
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    passed = True
+    for name in selected:
+        # Checks with a budget return False when it is exceeded
+        passed = BENCHMARKS[name]() is not False and passed
+        print()
+    sys.exit(0 if passed else 1)
@@ -5,11 +5,168 @@ Este módulo contém a classe OptimizedInvestment que implementa simulações
 de diferentes estratégias de investimento incluindo renda fixa e imóveis.
 """
 
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
 import numpy as np
-from scipy.optimize import minimize
 from typing import List, Dict, Tuple, Optional
 
 
+# scipy.optimize leva centenas de milissegundos para importar e só é usado
+# pelas otimizações; as simulações não devem pagar esse custo na inicialização
+def minimize(*args, **kwargs):
+    """scipy.optimize.minimize, importado no primeiro uso."""
+    from scipy.optimize import minimize as _minimize
+    return _minimize(*args, **kwargs)
+
+
+def linprog(*args, **kwargs):
+    """scipy.optimize.linprog, importado no primeiro uso."""
+    from scipy.optimize import linprog as _linprog
+    return _linprog(*args, **kwargs)
+
+
+class CacheOtimizacao:
+    """
+    Cache LRU de resultados de otimização indexado por hash de conteúdo.
+    
+    A chave é um hash BLAKE2 dos bytes brutos da matriz de históricos das
+    estratégias mais as opções da otimização, de modo que requisições idênticas
+    retornam sem executar o SciPy. Opcionalmente mantém uma segunda camada em
+    disco (um arquivo .npz por chave), compartilhável entre processos.
+    
+    Attributes:
+        max_itens (int): Número máximo de resultados mantidos em memória
+        diretorio (Optional[Path]): Diretório da camada em disco (None desativa)
+        acertos (int): Número de consultas atendidas pelo cache
+        falhas (int): Número de consultas não encontradas
+    """
+    
+    def __init__(self, max_itens: int = 256, diretorio: Optional[str] = None):
+        """
+        Inicializa o cache.
+        
+        Args:
+            max_itens: Número máximo de resultados em memória
+            diretorio: Diretório para a camada em disco (opcional)
+        """
+        self.max_itens = max_itens
+        self.diretorio = Path(diretorio) if diretorio else None
+        self.acertos = 0
+        self.falhas = 0
+        self._itens: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def chave(self, estrategias: Dict[str, List[float]], **opcoes) -> str:
+        """
+        Calcula a chave de conteúdo para estratégias e opções.
+        
+        Args:
+            estrategias: Dicionário com nome da estratégia e histórico de patrimônio
+            **opcoes: Opções da otimização que afetam o resultado
+            
+        Returns:
+            Hash hexadecimal da matriz de históricos e das opções
+        """
+        matriz = np.ascontiguousarray(np.array(list(estrategias.values()), dtype=np.float64))
+        
+        h = hashlib.blake2b(digest_size=16)
+        h.update(matriz.tobytes())
+        h.update(json.dumps([matriz.shape, list(estrategias.keys()), opcoes],
+                            sort_keys=True, default=str).encode())
+        return h.hexdigest()
+    
+    def obter(self, chave: str) -> Optional[Tuple[np.ndarray, Optional[float], Optional[float], float]]:
+        """
+        Busca um resultado no cache (memória e, se configurado, disco).
+        
+        Args:
+            chave: Chave de conteúdo calculada por chave()
+            
+        Returns:
+            Tupla de resultado de otimizar_portfolio ou None se ausente
+        """
+        with self._lock:
+            resultado = self._itens.get(chave)
+            if resultado is not None:
+                self._itens.move_to_end(chave)
+        
+        if resultado is None and self.diretorio is not None:
+            resultado = self._ler_disco(chave)
+            if resultado is not None:
+                self._guardar_memoria(chave, resultado)
+        
+        with self._lock:
+            if resultado is None:
+                self.falhas += 1
+                return None
+            self.acertos += 1
+        
+        pesos, aporte_inicial, aporte_mensal, retorno_final = resultado
+        return pesos.copy(), aporte_inicial, aporte_mensal, retorno_final
+    
+    def armazenar(self, chave: str, resultado: Tuple[np.ndarray, Optional[float], Optional[float], float]) -> None:
+        """
+        Armazena um resultado no cache.
+        
+        Args:
+            chave: Chave de conteúdo calculada por chave()
+            resultado: Tupla retornada por otimizar_portfolio
+        """
+        pesos, aporte_inicial, aporte_mensal, retorno_final = resultado
+        resultado = (np.array(pesos, dtype=float), aporte_inicial, aporte_mensal, float(retorno_final))
+        self._guardar_memoria(chave, resultado)
+        
+        if self.diretorio is not None:
+            self._escrever_disco(chave, resultado)
+    
+    def limpar(self) -> None:
+        """Remove todos os resultados em memória e zera as estatísticas."""
+        with self._lock:
+            self._itens.clear()
+            self.acertos = 0
+            self.falhas = 0
+    
+    def _guardar_memoria(self, chave: str, resultado: Tuple) -> None:
+        """Insere resultado na camada em memória aplicando a política LRU."""
+        with self._lock:
+            self._itens[chave] = resultado
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+    
+    def _ler_disco(self, chave: str) -> Optional[Tuple]:
+        """Lê resultado da camada em disco, ignorando arquivos ausentes ou corrompidos."""
+        caminho = self.diretorio / f"{chave}.npz"
+        try:
+            with np.load(caminho, allow_pickle=False) as dados:
+                aportes = [None if np.isnan(valor) else float(valor) for valor in dados['aportes']]
+                return dados['pesos'].copy(), aportes[0], aportes[1], float(dados['retorno_final'])
+        except (OSError, KeyError, ValueError):
+            return None
+    
+    def _escrever_disco(self, chave: str, resultado: Tuple) -> None:
+        """Grava resultado na camada em disco de forma atômica."""
+        pesos, aporte_inicial, aporte_mensal, retorno_final = resultado
+        aportes = np.array([np.nan if aporte_inicial is None else aporte_inicial,
+                            np.nan if aporte_mensal is None else aporte_mensal])
+        try:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            temporario = self.diretorio / f".{chave}.{os.getpid()}.{threading.get_ident()}.npz"
+            np.savez(temporario, pesos=pesos, aportes=aportes, retorno_final=retorno_final)
+            os.replace(temporario, self.diretorio / f"{chave}.npz")
+        except OSError:
+            pass
+
+
+# Cache compartilhado por todas as instâncias de OptimizedInvestment
+cache_otimizacao = CacheOtimizacao()
+
+
 class OptimizedInvestment:
     """
     Classe principal para simulação e otimização de investimentos.
@@ -20,6 +177,9 @@ class OptimizedInvestment:
         ir_aluguel (float): Taxa de imposto de renda para aluguel
     """
     
+    # Pesos crescentes da penalidade de turnover do glide path
+    PENALIDADES_TURNOVER = (1e2, 1e4, 1e6)
+    
     def __init__(self, inflacao: float, ir_renda_fixa: float = 15, ir_aluguel: float = 27.5):
         """
         Inicializa a classe com parâmetros de configuração.
@@ -622,6 +782,9 @@ class OptimizedInvestment:
         # Verifica se todas as estratégias têm históricos válidos
         tamanhos = []
         for nome, historico in estrategias.items():
+            if optimize_aportes and callable(historico):
+                # Funções geradoras de estratégia só são avaliadas na otimização
+                continue
             if not historico:
                 raise ValueError(f"Estratégia '{nome}' tem histórico vazio")
             if not all(isinstance(x, (int, float)) for x in historico):
@@ -662,15 +825,22 @@ class OptimizedInvestment:
     
     def otimizar_portfolio(self, estrategias: Dict[str, List[float]], anos: int,
                           optimize_aportes: bool = False, 
-                          aporte_bounds: Optional[Tuple[float, float]] = None) -> Tuple[np.ndarray, Optional[float], Optional[float], float]:
+                          aporte_bounds: Optional[Tuple[float, float]] = None,
+                          usar_cache: bool = True) -> Tuple[np.ndarray, Optional[float], Optional[float], float]:
         """
         Otimiza alocação de portfólio para maximizar retorno final.
         
+        Quando apenas os pesos são otimizados, o resultado é guardado em
+        cache_otimizacao sob um hash do conteúdo dos históricos e das opções.
+        ``anos`` só valida os parâmetros e fica fora da chave: o resultado
+        depende apenas dos históricos.
+        
         Args:
             estrategias: Dicionário com nome da estratégia e histórico de patrimônio
             anos: Período de investimento em anos (usado para validação)
             optimize_aportes: Se True, otimiza também aporte inicial e mensal
             aporte_bounds: Tupla com (min_aporte, max_aporte) para otimização de aportes
+            usar_cache: Se True, consulta e alimenta o cache de resultados
             
         Returns:
             Tupla com (pesos_otimizados, aporte_inicial_otimo, aporte_mensal_otimo, retorno_final)
@@ -688,9 +858,19 @@ class OptimizedInvestment:
             if optimize_aportes:
                 # Otimização incluindo aportes
                 return self._otimizar_com_aportes(estrategias, num_estrategias, aporte_bounds)
-            else:
-                # Otimização apenas dos pesos
-                return self._otimizar_apenas_pesos(estrategias, num_estrategias)
+            
+            # Otimização apenas dos pesos; históricos idênticos reutilizam o resultado
+            chave = None
+            if usar_cache:
+                chave = cache_otimizacao.chave(estrategias, optimize_aportes=False)
+                resultado = cache_otimizacao.obter(chave)
+                if resultado is not None:
+                    return resultado
+            
+            resultado = self._otimizar_apenas_pesos(estrategias, num_estrategias)
+            if chave is not None:
+                cache_otimizacao.armazenar(chave, resultado)
+            return resultado
                 
         except Exception as e:
             raise RuntimeError(f"Falha na otimização: {str(e)}")
@@ -789,4 +969,706 @@ class OptimizedInvestment:
         # Calcula retorno final com parâmetros otimizados
         retorno_final = -resultado.fun  # Converte de volta (estava negativo para maximização)
         
-        return pesos_otimizados, aporte_inicial_otimo, aporte_mensal_otimo, retorno_final
\ No newline at end of file
+        return pesos_otimizados, aporte_inicial_otimo, aporte_mensal_otimo, retorno_final
+    
+    def _preparar_matriz_cenarios(self, cenarios) -> np.ndarray:
+        """
+        Converte cenários de valores finais em matriz (cenários × estratégias).
+        
+        Args:
+            cenarios: Matriz (cenários × estratégias) ou dicionário com nome da
+                estratégia e lista de valores finais por cenário
+            
+        Returns:
+            Matriz float64 com um cenário por linha e uma estratégia por coluna
+            
+        Raises:
+            ValueError: Se a matriz é vazia, irregular ou contém valores não finitos
+        """
+        if isinstance(cenarios, dict):
+            if not cenarios:
+                raise ValueError("Deve haver pelo menos uma estratégia")
+            colunas = [np.asarray(valores, dtype=float) for valores in cenarios.values()]
+            if len({coluna.shape for coluna in colunas}) > 1:
+                raise ValueError("Todas as estratégias devem ter o mesmo número de cenários")
+            matriz = np.column_stack(colunas)
+        else:
+            matriz = np.asarray(cenarios, dtype=float)
+        
+        if matriz.ndim != 2:
+            raise ValueError("Cenários devem formar uma matriz (cenários × estratégias)")
+        if matriz.shape[1] == 0:
+            raise ValueError("Deve haver pelo menos uma estratégia")
+        if matriz.shape[0] < 2:
+            raise ValueError("Devem existir pelo menos dois cenários")
+        if not np.all(np.isfinite(matriz)):
+            raise ValueError("Cenários contêm valores não finitos")
+        
+        return matriz
+    
+    def _fatorar_covariancia(self, covariancia: np.ndarray) -> np.ndarray:
+        """
+        Calcula o fator de Cholesky da matriz de covariância.
+        
+        Uma pequena regularização é adicionada à diagonal quando a matriz é
+        singular (por exemplo, estratégias idênticas ou sem variância).
+        
+        Args:
+            covariancia: Matriz de covariância normalizada
+            
+        Returns:
+            Matriz triangular inferior L tal que L·Lᵀ ≈ covariancia
+        """
+        num_estrategias = covariancia.shape[0]
+        regularizacao = 1e-12 * max(float(np.trace(covariancia)) / num_estrategias, 1.0)
+        
+        for _ in range(8):
+            try:
+                return np.linalg.cholesky(covariancia + regularizacao * np.eye(num_estrategias))
+            except np.linalg.LinAlgError:
+                regularizacao *= 100
+        
+        raise RuntimeError("Matriz de covariância não é semidefinida positiva")
+    
+    def _resolver_media_variancia(self, media: np.ndarray, fator: np.ndarray,
+                                  aversao_risco: float,
+                                  pesos_iniciais: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Resolve o problema quadrático de média-variância com gradiente analítico.
+        
+        Maximiza media·w - (aversao_risco / 2)·wᵀΣw sujeito a soma dos pesos = 1
+        e 0 <= w <= 1, com Σ = L·Lᵀ dado pelo fator de Cholesky.
+        
+        Args:
+            media: Vetor de valores esperados normalizados por estratégia
+            fator: Fator de Cholesky L da matriz de covariância normalizada
+            aversao_risco: Coeficiente de aversão ao risco (λ)
+            pesos_iniciais: Ponto de partida (padrão: distribuição igual)
+            
+        Returns:
+            Array com pesos ótimos
+        """
+        num_estrategias = len(media)
+        if pesos_iniciais is None:
+            pesos_iniciais = np.ones(num_estrategias) / num_estrategias
+        
+        def objetivo(pesos):
+            projecao = fator.T @ pesos
+            valor = media @ pesos - 0.5 * aversao_risco * (projecao @ projecao)
+            gradiente = media - aversao_risco * (fator @ projecao)
+            return -valor, -gradiente
+        
+        restricoes = [{
+            'type': 'eq',
+            'fun': lambda pesos: np.sum(pesos) - 1.0,
+            'jac': lambda pesos: np.ones(num_estrategias)
+        }]
+        
+        resultado = minimize(
+            fun=objetivo,
+            x0=pesos_iniciais,
+            jac=True,
+            method='SLSQP',
+            bounds=self._criar_bounds_portfolio(num_estrategias),
+            constraints=restricoes,
+            options={'ftol': 1e-12, 'maxiter': 500, 'disp': False}
+        )
+        
+        if not resultado.success:
+            raise RuntimeError(f"Otimização não convergiu: {resultado.message}")
+        
+        return self._normalizar_pesos(np.clip(resultado.x, 0.0, None))
+    
+    def _cvar_cenarios(self, retornos: np.ndarray, pesos: np.ndarray, nivel_confianca: float,
+                       num_candidatos: int) -> Tuple[np.ndarray, float]:
+        """
+        Calcula o CVaR da perda (-valor) e os cenários mais adversos do portfólio.
+        
+        Args:
+            retornos: Matriz normalizada (cenários × estratégias)
+            pesos: Pesos do portfólio
+            nivel_confianca: Nível de confiança α do CVaR
+            num_candidatos: Quantidade de piores cenários a retornar
+            
+        Returns:
+            Tupla com (índices dos piores cenários, CVaR da perda)
+        """
+        num_cenarios = retornos.shape[0]
+        cauda = (1 - nivel_confianca) * num_cenarios
+        cauda_inteira = int(np.ceil(cauda - 1e-9))
+        
+        perdas = -(retornos @ pesos)
+        candidatos = np.argpartition(-perdas, num_candidatos - 1)[:num_candidatos]
+        piores = np.sort(perdas[candidatos])[::-1][:cauda_inteira]
+        
+        # Distribui a massa 1/cauda entre os piores cenários (fração no último)
+        probabilidades = np.full(cauda_inteira, 1.0 / cauda)
+        probabilidades[-1] = (cauda - (cauda_inteira - 1)) / cauda
+        
+        return candidatos, float(probabilidades @ piores)
+    
+    def _resolver_cvar(self, retornos: np.ndarray, aversao_risco: float,
+                       nivel_confianca: float) -> Tuple[np.ndarray, float]:
+        """
+        Resolve o LP de Rockafellar–Uryasev para média-CVaR por geração de cenários.
+        
+        O LP completo tem uma restrição por cenário; aqui ele é resolvido na forma
+        dual (envelope de risco do CVaR) restrita aos cenários candidatos da cauda.
+        Enquanto o limite inferior do problema restrito não coincide com o valor
+        do problema completo nos pesos obtidos, a cauda atual é adicionada ao
+        conjunto e o LP é resolvido novamente. A solução final é exata.
+        
+        Args:
+            retornos: Matriz normalizada (cenários × estratégias)
+            aversao_risco: Peso λ do CVaR na função objetivo
+            nivel_confianca: Nível de confiança α do CVaR
+            
+        Returns:
+            Tupla com (pesos ótimos, CVaR normalizado da perda)
+        """
+        num_cenarios, num_estrategias = retornos.shape
+        media = retornos.mean(axis=0)
+        cauda = (1 - nivel_confianca) * num_cenarios
+        num_candidatos = min(num_cenarios, 2 * int(np.ceil(cauda - 1e-9)) + 1)
+        
+        pesos = np.ones(num_estrategias) / num_estrategias
+        ativos = np.zeros(num_cenarios, dtype=bool)
+        candidatos, _ = self._cvar_cenarios(retornos, pesos, nivel_confianca, num_candidatos)
+        ativos[candidatos] = True
+        
+        for _ in range(50):
+            indices = np.flatnonzero(ativos)
+            num_ativos = len(indices)
+            
+            # Variáveis: [q_1..q_m, t]; minimiza t sujeito a μ_i + λ(Rᵀq)_i <= t
+            custos = np.zeros(num_ativos + 1)
+            custos[-1] = 1.0
+            a_ub = np.hstack([aversao_risco * retornos[indices].T, -np.ones((num_estrategias, 1))])
+            a_eq = np.ones((1, num_ativos + 1))
+            a_eq[0, -1] = 0.0
+            limites = np.empty((num_ativos + 1, 2))
+            limites[:, 0] = 0.0
+            limites[:, 1] = 1.0 / cauda
+            limites[-1] = (-np.inf, np.inf)
+            
+            resultado = linprog(custos, A_ub=a_ub, b_ub=-media, A_eq=a_eq, b_eq=[1.0],
+                                bounds=limites, method='highs')
+            if resultado.status != 0:
+                raise RuntimeError(f"Otimização não convergiu: {resultado.message}")
+            
+            # Os multiplicadores das restrições de desigualdade são os pesos
+            pesos = self._normalizar_pesos(np.clip(-resultado.ineqlin.marginals, 0.0, None))
+            limite_inferior = -resultado.fun
+            
+            candidatos, cvar = self._cvar_cenarios(retornos, pesos, nivel_confianca, num_candidatos)
+            valor = -media @ pesos + aversao_risco * cvar
+            if valor - limite_inferior <= 1e-9 * max(1.0, abs(valor)):
+                return pesos, cvar
+            
+            ativos[candidatos] = True
+        
+        raise RuntimeError("Otimização não convergiu: limite de iterações do CVaR atingido")
+    
+    def otimizar_portfolio_risco(self, cenarios, objetivo: str = 'media_variancia',
+                                 aversao_risco: float = 1.0,
+                                 nivel_confianca: float = 0.95) -> Tuple[np.ndarray, float, float]:
+        """
+        Otimiza alocação de portfólio considerando risco sobre uma matriz de cenários.
+        
+        Ao contrário de otimizar_portfolio, que maximiza o valor final determinístico,
+        este método usa a distribuição de valores finais de cada estratégia (por
+        exemplo, vinda de simulações estocásticas ou históricas). Os valores são
+        normalizados pela sua magnitude média, de modo que aversao_risco independe
+        da escala monetária.
+        
+        Objetivos suportados:
+            - 'media_variancia': maximiza E[V] - (λ/2)·Var[V] (QP, gradiente analítico)
+            - 'cvar': maximiza E[V] - λ·CVaR_α(-V) (LP de Rockafellar–Uryasev)
+        
+        Args:
+            cenarios: Matriz (cenários × estratégias) de valores finais ou dicionário
+                com nome da estratégia e valores finais por cenário
+            objetivo: 'media_variancia' ou 'cvar'
+            aversao_risco: Coeficiente de aversão ao risco λ (>= 0)
+            nivel_confianca: Nível de confiança α do CVaR (entre 0 e 1)
+            
+        Returns:
+            Tupla com (pesos_otimizados, valor_esperado, risco), onde risco é o
+            desvio padrão do valor final (média-variância) ou o CVaR da perda
+            -V em reais (CVaR)
+            
+        Raises:
+            ValueError: Se parâmetros são inválidos
+            RuntimeError: Se otimização falha na convergência
+        """
+        matriz = self._preparar_matriz_cenarios(cenarios)
+        
+        if objetivo not in ('media_variancia', 'cvar'):
+            raise ValueError("Objetivo deve ser 'media_variancia' ou 'cvar'")
+        if aversao_risco < 0:
+            raise ValueError("Aversão ao risco não pode ser negativa")
+        if not 0 < nivel_confianca < 1:
+            raise ValueError("Nível de confiança deve estar entre 0 e 1")
+        
+        escala = float(np.mean(np.abs(matriz))) or 1.0
+        retornos = matriz / escala
+        
+        try:
+            if objetivo == 'media_variancia':
+                media = retornos.mean(axis=0)
+                fator = self._fatorar_covariancia(np.atleast_2d(np.cov(retornos, rowvar=False)))
+                pesos = self._resolver_media_variancia(media, fator, aversao_risco)
+                risco = np.linalg.norm(fator.T @ pesos) * escala
+            else:
+                pesos, cvar = self._resolver_cvar(retornos, aversao_risco, nivel_confianca)
+                risco = cvar * escala
+        except Exception as e:
+            raise RuntimeError(f"Falha na otimização: {str(e)}")
+        
+        valor_esperado = float(matriz.mean(axis=0) @ pesos)
+        
+        return pesos, valor_esperado, float(risco)
+    
+    def fronteira_eficiente(self, cenarios, num_pontos: int = 50,
+                            aversao_min: Optional[float] = None,
+                            aversao_max: Optional[float] = None
+                            ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Calcula a fronteira eficiente de média-variância em uma única chamada.
+        
+        Varre a aversão ao risco em escala geométrica, da maior para a menor,
+        reaproveitando a matriz de covariância fatorada (Cholesky) e iniciando
+        cada otimização a partir da solução do ponto anterior.
+        
+        Args:
+            cenarios: Matriz (cenários × estratégias) de valores finais ou dicionário
+                com nome da estratégia e valores finais por cenário
+            num_pontos: Número de pontos da fronteira (>= 2)
+            aversao_min: Menor aversão ao risco (padrão: calculada a partir dos dados)
+            aversao_max: Maior aversão ao risco (padrão: calculada a partir dos dados)
+            
+        Returns:
+            Tupla com (aversoes, pesos, valores_esperados, riscos), ordenada do
+            ponto de menor risco para o de maior retorno; pesos tem formato
+            (num_pontos × estratégias) e riscos é o desvio padrão em reais
+            
+        Raises:
+            ValueError: Se parâmetros são inválidos
+            RuntimeError: Se otimização falha na convergência
+        """
+        matriz = self._preparar_matriz_cenarios(cenarios)
+        
+        if num_pontos < 2:
+            raise ValueError("A fronteira deve ter pelo menos dois pontos")
+        
+        escala = float(np.mean(np.abs(matriz))) or 1.0
+        retornos = matriz / escala
+        media = retornos.mean(axis=0)
+        covariancia = np.atleast_2d(np.cov(retornos, rowvar=False))
+        
+        # Aversão de referência: troca a dispersão das médias pela variância típica
+        variancia_media = float(np.mean(np.diag(covariancia)))
+        dispersao = float(np.ptp(media))
+        referencia = dispersao / variancia_media if dispersao > 0 and variancia_media > 0 else 1.0
+        aversao_min = referencia * 1e-2 if aversao_min is None else aversao_min
+        aversao_max = referencia * 1e3 if aversao_max is None else aversao_max
+        
+        if aversao_min <= 0 or aversao_max <= aversao_min:
+            raise ValueError("Intervalo de aversão ao risco inválido")
+        
+        aversoes = np.geomspace(aversao_max, aversao_min, num_pontos)
+        pesos = np.empty((num_pontos, matriz.shape[1]))
+        
+        try:
+            fator = self._fatorar_covariancia(covariancia)
+            pesos_anteriores = None
+            for i, aversao in enumerate(aversoes):
+                pesos_anteriores = self._resolver_media_variancia(
+                    media, fator, aversao, pesos_anteriores
+                )
+                pesos[i] = pesos_anteriores
+        except Exception as e:
+            raise RuntimeError(f"Falha na otimização: {str(e)}")
+        
+        valores_esperados = pesos @ matriz.mean(axis=0)
+        riscos = np.linalg.norm(pesos @ fator, axis=1) * escala
+        
+        return aversoes, pesos, valores_esperados, riscos
+    
+    def _pesos_normalizados(self, parametros: np.ndarray) -> np.ndarray:
+        """
+        Converte parâmetros não negativos em pesos por ano (linhas somam 1).
+        
+        Args:
+            parametros: Matriz (anos × estratégias) de parâmetros em [0, 1]
+            
+        Returns:
+            Matriz de pesos não negativos com soma 1 em cada linha
+        """
+        somas = parametros.sum(axis=1, keepdims=True)
+        return parametros / np.maximum(somas, 1e-12)
+    
+    def _objetivo_glide_path(self, parametros: np.ndarray, crescimentos: np.ndarray,
+                             valores_iniciais: np.ndarray, ano_periodo: np.ndarray,
+                             inicio_anos: np.ndarray, suavidade: float,
+                             turnover_maximo: Optional[float], penalidade: float) -> Tuple[float, np.ndarray]:
+        """
+        Função objetivo do glide path e seu gradiente analítico.
+        
+        Minimiza -log(patrimônio final) + suavidade·Σ||w_{a+1} - w_a||² mais uma
+        penalidade quadrática sobre o excesso de turnover anual. O portfólio é
+        rebalanceado mensalmente para os pesos do ano corrente.
+        
+        Args:
+            parametros: Vetor achatado (anos × estratégias) de parâmetros não normalizados
+            crescimentos: Matriz (períodos × estratégias) de fatores de crescimento mensais
+            valores_iniciais: Patrimônio de cada estratégia no primeiro mês
+            ano_periodo: Índice do ano de cada período
+            inicio_anos: Primeiro período de cada ano
+            suavidade: Peso da penalidade de suavidade
+            turnover_maximo: Turnover máximo entre anos consecutivos (None desativa)
+            penalidade: Peso da penalidade de turnover
+            
+        Returns:
+            Tupla com (valor da função objetivo, gradiente em relação a parametros)
+        """
+        num_anos = len(inicio_anos)
+        parametros = parametros.reshape(num_anos, -1)
+        pesos = self._pesos_normalizados(parametros)
+        
+        # Log do patrimônio final: valor inicial ponderado × produto dos crescimentos
+        valor_inicial = pesos[0] @ valores_iniciais
+        crescimento_portfolio = np.einsum('tn,tn->t', pesos[ano_periodo], crescimentos)
+        valor = -(np.log(valor_inicial) + np.sum(np.log(crescimento_portfolio)))
+        
+        gradiente = -np.add.reduceat(crescimentos / crescimento_portfolio[:, None], inicio_anos, axis=0)
+        gradiente[0] -= valores_iniciais / valor_inicial
+        
+        if num_anos > 1:
+            diferencas = np.diff(pesos, axis=0)
+            valor += suavidade * np.sum(diferencas ** 2)
+            gradiente_diferencas = 2 * suavidade * diferencas
+            
+            if turnover_maximo is not None:
+                # |Δw| suavizado para manter o gradiente contínuo
+                absolutos = np.sqrt(diferencas ** 2 + 1e-10)
+                excesso = np.maximum(0.5 * absolutos.sum(axis=1) - turnover_maximo, 0.0)
+                valor += penalidade * np.sum(excesso ** 2)
+                gradiente_diferencas += penalidade * excesso[:, None] * diferencas / absolutos
+            
+            gradiente[1:] += gradiente_diferencas
+            gradiente[:-1] -= gradiente_diferencas
+        
+        # Regra da cadeia através da normalização de cada ano
+        somas = np.maximum(parametros.sum(axis=1, keepdims=True), 1e-12)
+        gradiente = (gradiente - np.sum(pesos * gradiente, axis=1, keepdims=True)) / somas
+        
+        return valor, gradiente.ravel()
+    
+    def otimizar_glide_path(self, estrategias: Dict[str, List[float]], anos: int,
+                            suavidade: float = 1.0,
+                            turnover_maximo: Optional[float] = None) -> Tuple[np.ndarray, List[float], float]:
+        """
+        Otimiza uma alocação que varia ano a ano (glide path).
+        
+        Cada ano tem seu próprio vetor de pesos e o portfólio é rebalanceado
+        mensalmente para os pesos do ano corrente, permitindo expressar, por
+        exemplo, mais imóveis no início e mais renda fixa no final. Os pesos de
+        cada ano são parâmetros em [0, 1] normalizados pela soma, e o problema,
+        com centenas de parâmetros, é resolvido por L-BFGS-B com avaliação
+        vetorizada e gradiente analítico.
+        O limite de turnover é imposto por penalidade quadrática crescente.
+        Cada estágio é aceito como melhor esforço mesmo ao atingir o limite de
+        iterações ou parar na busca linear; a viabilidade do turnover é
+        verificada ao final.
+        
+        Args:
+            estrategias: Dicionário com nome da estratégia e histórico de patrimônio
+                (valores estritamente positivos)
+            anos: Período de investimento em anos (usado para validação)
+            suavidade: Peso da penalidade sobre variações de pesos entre anos
+            turnover_maximo: Fração máxima da carteira realocada entre anos
+                consecutivos (0 a 1); None desativa o limite
+            
+        Returns:
+            Tupla com (pesos por ano (anos × estratégias), histórico do portfólio,
+            retorno_final)
+            
+        Raises:
+            ValueError: Se parâmetros são inválidos
+            RuntimeError: Se otimização falha na convergência ou não consegue
+                respeitar o turnover máximo
+        """
+        self._validar_parametros_otimizacao(estrategias, anos)
+        
+        if suavidade < 0:
+            raise ValueError("Suavidade não pode ser negativa")
+        if turnover_maximo is not None and not 0 <= turnover_maximo <= 1:
+            raise ValueError("Turnover máximo deve estar entre 0 e 1")
+        
+        historicos = np.array(list(estrategias.values()), dtype=float).T
+        if historicos.shape[0] < 2:
+            raise ValueError("Glide path requer pelo menos dois meses de histórico")
+        if not np.all(np.isfinite(historicos)) or np.any(historicos <= 0):
+            raise ValueError("Glide path requer históricos estritamente positivos")
+        
+        crescimentos = historicos[1:] / historicos[:-1]
+        ano_periodo = np.arange(len(crescimentos)) // 12
+        num_anos = int(ano_periodo[-1]) + 1
+        inicio_anos = np.arange(num_anos) * 12
+        num_estrategias = historicos.shape[1]
+        
+        parametros = np.full(num_anos * num_estrategias, 0.5)
+        limites = [(0.0, 1.0)] * len(parametros)
+        penalidades = self.PENALIDADES_TURNOVER if turnover_maximo is not None else (0.0,)
+        
+        try:
+            for penalidade in penalidades:
+                resultado = minimize(
+                    fun=self._objetivo_glide_path,
+                    x0=parametros,
+                    args=(crescimentos, historicos[0], ano_periodo, inicio_anos,
+                          suavidade, turnover_maximo, penalidade),
+                    jac=True,
+                    method='L-BFGS-B',
+                    bounds=limites,
+                    options={'maxiter': 5000, 'ftol': 1e-12, 'gtol': 1e-8}
+                )
+                # 0: convergiu; 1: limite de iterações; 2: busca linear sem progresso
+                if resultado.status not in (0, 1, 2) or not np.all(np.isfinite(resultado.x)):
+                    raise RuntimeError(f"Otimização não convergiu: {resultado.message}")
+                parametros = resultado.x
+                
+                pesos = self._pesos_normalizados(parametros.reshape(num_anos, num_estrategias))
+                turnover = 0.5 * np.abs(np.diff(pesos, axis=0)).sum(axis=1)
+                if turnover_maximo is None or np.all(turnover <= turnover_maximo + 1e-4):
+                    break
+        except Exception as e:
+            raise RuntimeError(f"Falha na otimização: {str(e)}")
+        
+        if turnover_maximo is not None and np.any(turnover > turnover_maximo + 1e-4):
+            raise RuntimeError(
+                f"Turnover máximo de {turnover_maximo:.4f} não atingido: {turnover.max():.4f} entre anos"
+            )
+        
+        crescimento_portfolio = np.einsum('tn,tn->t', pesos[ano_periodo], crescimentos)
+        valor_inicial = pesos[0] @ historicos[0]
+        historico = np.concatenate([[valor_inicial], valor_inicial * np.cumprod(crescimento_portfolio)])
+        
+        return pesos, historico.tolist(), float(historico[-1])
+
+
+# ---------------------------------------------------------------------------
+# Simulação vetorizada em lote
+#
+# As funções abaixo simulam muitos cenários de uma mesma estratégia de uma vez.
+# Cada parâmetro é um array com um valor por cenário (inclusive inflação e IR).
+# O laço é feito sobre os meses e cada passo é uma operação NumPy sobre todos os
+# cenários, na mesma ordem de operações dos métodos de OptimizedInvestment, de
+# modo que os históricos coincidem com os da simulação individual.
+# ---------------------------------------------------------------------------
+
+def _taxa_anual_para_mensal_lote(taxas_anuais: np.ndarray) -> np.ndarray:
+    """Versão vetorizada de OptimizedInvestment._taxa_anual_para_mensal."""
+    return ((1 + taxas_anuais / 100) ** (1/12) - 1) * 100
+
+
+def _fatores_inflacao_lote(inflacao: np.ndarray, num_meses: int) -> np.ndarray:
+    """Fatores de desconto inflacionário (cenários × meses) para os meses 1..num_meses."""
+    base = 1 + _taxa_anual_para_mensal_lote(inflacao) / 100
+    return base[:, None] ** np.arange(1, num_meses + 1)[None, :]
+
+
+def _cortar_historicos(matriz: np.ndarray, meses: np.ndarray) -> List[np.ndarray]:
+    """Separa a matriz (cenários × meses) em históricos com o tamanho de cada cenário."""
+    return [matriz[i, :meses[i]] for i in range(len(meses))]
+
+
+def _renda_fixa_lote(aportes_iniciais: np.ndarray, aportes_mensais: np.ndarray,
+                     taxas_anuais: np.ndarray, meses: np.ndarray, inflacao: np.ndarray,
+                     ir_renda_fixa: np.ndarray, imposto_final: bool) -> List[np.ndarray]:
+    """Núcleo vetorizado de investimento_cdi e investimento_ipca."""
+    num_meses = int(meses.max())
+    taxas_mensais = _taxa_anual_para_mensal_lote(taxas_anuais)
+    valores = np.empty((len(meses), num_meses))
+    valor_atual = aportes_iniciais.astype(float).copy()
+    
+    for mes in range(num_meses):
+        rendimento_bruto = valor_atual * (taxas_mensais / 100)
+        if imposto_final:
+            valor_atual = valor_atual + rendimento_bruto
+        else:
+            imposto = rendimento_bruto * (ir_renda_fixa / 100)
+            rendimento_liquido = rendimento_bruto - imposto
+            valor_atual = valor_atual + rendimento_liquido
+        valor_atual = valor_atual + aportes_mensais
+        valores[:, mes] = valor_atual
+    
+    historicos = valores / _fatores_inflacao_lote(inflacao, num_meses)
+    
+    if imposto_final:
+        # IR sobre todo o ganho no último mês de cada cenário
+        indices = np.arange(len(meses))
+        valor_final = valores[indices, meses - 1]
+        aportes_totais = aportes_iniciais + (aportes_mensais * meses)
+        ganho_total = valor_final - aportes_totais
+        imposto_total = ganho_total * (ir_renda_fixa / 100)
+        valor_final_liquido = valor_final - imposto_total
+        fator_final = (1 + _taxa_anual_para_mensal_lote(inflacao) / 100) ** meses
+        historicos[indices, meses - 1] = valor_final_liquido / fator_final
+    
+    return _cortar_historicos(historicos, meses)
+
+
+def simular_lote_cdi(aportes_iniciais: np.ndarray, aportes_mensais: np.ndarray,
+                     taxas_cdi: np.ndarray, anos: np.ndarray, inflacao: np.ndarray,
+                     ir_renda_fixa: np.ndarray, imposto_final: bool = False) -> List[np.ndarray]:
+    """
+    Simula vários investimentos em CDI de uma vez (ver investimento_cdi).
+    
+    Args:
+        aportes_iniciais: Valor inicial investido em cada cenário
+        aportes_mensais: Aporte mensal de cada cenário
+        taxas_cdi: Taxa CDI anual (%) de cada cenário
+        anos: Período em anos de cada cenário
+        inflacao: Inflação anual (%) de cada cenário
+        ir_renda_fixa: Alíquota de IR (%) de cada cenário
+        imposto_final: Se True, aplica IR apenas no final
+        
+    Returns:
+        Lista com o histórico mensal (array) de cada cenário
+    """
+    meses = np.asarray(anos, dtype=int) * 12
+    return _renda_fixa_lote(np.asarray(aportes_iniciais, dtype=float), np.asarray(aportes_mensais, dtype=float),
+                            np.asarray(taxas_cdi, dtype=float), meses, np.asarray(inflacao, dtype=float),
+                            np.asarray(ir_renda_fixa, dtype=float), imposto_final)
+
+
+def simular_lote_ipca(aportes_iniciais: np.ndarray, aportes_mensais: np.ndarray,
+                      taxas_ipca: np.ndarray, anos: np.ndarray, inflacao: np.ndarray,
+                      ir_renda_fixa: np.ndarray, imposto_final: bool = True) -> List[np.ndarray]:
+    """
+    Simula vários investimentos em IPCA+ de uma vez (ver investimento_ipca).
+    
+    Args:
+        aportes_iniciais: Valor inicial investido em cada cenário
+        aportes_mensais: Aporte mensal de cada cenário
+        taxas_ipca: Taxa IPCA+ anual (%) acima da inflação de cada cenário
+        anos: Período em anos de cada cenário
+        inflacao: Inflação anual (%) de cada cenário
+        ir_renda_fixa: Alíquota de IR (%) de cada cenário
+        imposto_final: Se True, aplica IR apenas no final (padrão para IPCA+)
+        
+    Returns:
+        Lista com o histórico mensal (array) de cada cenário
+    """
+    meses = np.asarray(anos, dtype=int) * 12
+    inflacao = np.asarray(inflacao, dtype=float)
+    return _renda_fixa_lote(np.asarray(aportes_iniciais, dtype=float), np.asarray(aportes_mensais, dtype=float),
+                            inflacao + np.asarray(taxas_ipca, dtype=float), meses, inflacao,
+                            np.asarray(ir_renda_fixa, dtype=float), imposto_final)
+
+
+def _saldo_devedor_sac_lote(valores_financiados: np.ndarray, parcelas_pagas: int,
+                            total_parcelas: np.ndarray) -> np.ndarray:
+    """Versão vetorizada de OptimizedInvestment._calcular_saldo_devedor_sac."""
+    amortizacao_constante = valores_financiados / total_parcelas
+    saldo_restante = np.maximum(0.0, valores_financiados - (amortizacao_constante * parcelas_pagas))
+    return np.where(parcelas_pagas >= total_parcelas, 0.0, saldo_restante)
+
+
+def simular_lote_imovel(valores_imovel: np.ndarray, entradas: np.ndarray, parcelas: np.ndarray,
+                        valorizacao: np.ndarray, alugueis: np.ndarray, anos_construcao: np.ndarray,
+                        inflacao: np.ndarray, ir_aluguel: np.ndarray) -> List[np.ndarray]:
+    """
+    Simula várias compras financiadas de imóvel de uma vez.
+    
+    Equivale a compra_financiada_planta com o período de construção de cada
+    cenário; anos_construcao = 0 equivale a compra_financiada_pronto.
+    
+    Args:
+        valores_imovel: Valor total do imóvel em cada cenário
+        entradas: Valor da entrada de cada cenário
+        parcelas: Número de parcelas de cada cenário
+        valorizacao: Valorização anual (%) de cada cenário
+        alugueis: Aluguel mensal de cada cenário
+        anos_construcao: Anos sem aluguel (construção) de cada cenário
+        inflacao: Inflação anual (%) de cada cenário
+        ir_aluguel: Alíquota de IR sobre aluguel (%) de cada cenário
+        
+    Returns:
+        Lista com o histórico mensal (array) de cada cenário
+    """
+    valores_imovel = np.asarray(valores_imovel, dtype=float)
+    entradas = np.asarray(entradas, dtype=float)
+    parcelas = np.asarray(parcelas, dtype=int)
+    meses_construcao = np.asarray(anos_construcao, dtype=int) * 12
+    num_meses = int(parcelas.max())
+    
+    valores_financiados = valores_imovel - entradas
+    valorizacao_mensal = _taxa_anual_para_mensal_lote(np.asarray(valorizacao, dtype=float)) / 100
+    aluguel_liquido = np.asarray(alugueis, dtype=float) * (1 - np.asarray(ir_aluguel, dtype=float) / 100)
+    
+    patrimonio = np.empty((len(parcelas), num_meses))
+    valor_imovel_atual = valores_imovel.copy()
+    aluguel_acumulado = np.zeros(len(parcelas))
+    
+    for mes in range(num_meses):
+        valor_imovel_atual = valor_imovel_atual * (1 + valorizacao_mensal)
+        saldo_devedor = _saldo_devedor_sac_lote(valores_financiados, mes, parcelas)
+        aluguel_acumulado = np.where(mes >= meses_construcao, aluguel_acumulado + aluguel_liquido, aluguel_acumulado)
+        patrimonio[:, mes] = valor_imovel_atual - saldo_devedor + aluguel_acumulado - entradas
+    
+    historicos = patrimonio / _fatores_inflacao_lote(np.asarray(inflacao, dtype=float), num_meses)
+    return _cortar_historicos(historicos, parcelas)
+
+
+def simular_lote_misto(valores_imovel: np.ndarray, entradas: np.ndarray, parcelas: np.ndarray,
+                       taxas_cdi: np.ndarray, aportes_mensais: np.ndarray, valorizacao: np.ndarray,
+                       inflacao: np.ndarray, ir_renda_fixa: np.ndarray) -> List[np.ndarray]:
+    """
+    Simula várias estratégias mistas (imóvel + CDI) de uma vez (ver compra_e_renda_fixa).
+    
+    Args:
+        valores_imovel: Valor total do imóvel em cada cenário
+        entradas: Valor da entrada de cada cenário
+        parcelas: Número de parcelas de cada cenário
+        taxas_cdi: Taxa CDI anual (%) de cada cenário
+        aportes_mensais: Aporte mensal em renda fixa de cada cenário
+        valorizacao: Valorização anual (%) de cada cenário
+        inflacao: Inflação anual (%) de cada cenário
+        ir_renda_fixa: Alíquota de IR (%) de cada cenário
+        
+    Returns:
+        Lista com o histórico mensal (array) de cada cenário
+    """
+    valores_imovel = np.asarray(valores_imovel, dtype=float)
+    entradas = np.asarray(entradas, dtype=float)
+    parcelas = np.asarray(parcelas, dtype=int)
+    aportes_mensais = np.asarray(aportes_mensais, dtype=float)
+    ir_renda_fixa = np.asarray(ir_renda_fixa, dtype=float)
+    num_meses = int(parcelas.max())
+    
+    valores_financiados = valores_imovel - entradas
+    valorizacao_mensal = _taxa_anual_para_mensal_lote(np.asarray(valorizacao, dtype=float)) / 100
+    taxa_cdi_mensal = _taxa_anual_para_mensal_lote(np.asarray(taxas_cdi, dtype=float)) / 100
+    
+    patrimonio = np.empty((len(parcelas), num_meses))
+    valor_imovel_atual = valores_imovel.copy()
+    saldo_renda_fixa = np.zeros(len(parcelas))
+    
+    for mes in range(num_meses):
+        valor_imovel_atual = valor_imovel_atual * (1 + valorizacao_mensal)
+        saldo_devedor = _saldo_devedor_sac_lote(valores_financiados, mes, parcelas)
+        
+        rendimento_bruto = saldo_renda_fixa * taxa_cdi_mensal
+        imposto = rendimento_bruto * (ir_renda_fixa / 100)
+        rendimento_liquido = rendimento_bruto - imposto
+        saldo_renda_fixa = np.where(saldo_renda_fixa > 0, saldo_renda_fixa + rendimento_liquido, saldo_renda_fixa)
+        saldo_renda_fixa = saldo_renda_fixa + aportes_mensais
+        
+        patrimonio_imovel = valor_imovel_atual - saldo_devedor - entradas
+        patrimonio[:, mes] = patrimonio_imovel + saldo_renda_fixa
+    
+    historicos = patrimonio / _fatores_inflacao_lote(np.asarray(inflacao, dtype=float), num_meses)
+    return _cortar_historicos(historicos, parcelas)
@@ -3,10 +3,17 @@ Integração com Supabase para Investment Simulation System
 Adiciona persistência de dados e autenticação
 """
 
+import base64
 import os
-from typing import Optional, Dict, Any, List
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import json
+import numpy as np
 
 try:
     from supabase import create_client, Client
@@ -14,11 +21,153 @@ except ImportError:
     print("⚠️  Supabase não instalado. Execute: pip install supabase")
     Client = None
 
+# Linhas por requisição nas inserções em lote
+BULK_CHUNK_SIZE = int(os.getenv("SUPABASE_BULK_CHUNK_SIZE", 500))
+
+# Codificação do resultado salvo em simulations.result: "delta" (padrão),
+# "float32" ou "json" (texto JSON completo, formato original)
+RESULT_ENCODING = os.getenv("SUPABASE_RESULT_ENCODING", "delta")
+
+def _byte_planes(values: np.ndarray) -> bytes:
+    """Agrupa o n-ésimo byte de cada valor: os bytes altos, quase constantes, comprimem melhor"""
+    return values.view(np.uint8).reshape(-1, values.itemsize).T.tobytes()
+
+def _from_byte_planes(data: bytes, dtype: str) -> np.ndarray:
+    itemsize = np.dtype(dtype).itemsize
+    return np.frombuffer(data, dtype=np.uint8).reshape(itemsize, -1).T.copy().view(dtype).ravel()
+
+def encode_array(values: List[float], codec: str) -> Dict[str, Any]:
+    """
+    Codifica uma série numérica em texto compacto (zlib + base64).
+    
+    Args:
+        values: Série de números (ex.: historico ou meses)
+        codec: "delta" guarda a segunda diferença dos valores em centavos
+               (exato até o centavo; séries inteiras ficam exatas) ou
+               "float32" guarda os valores em precisão simples
+    
+    Returns:
+        Dict com codec, n, scale (delta) e data
+    """
+    array = np.asarray(values)
+    encoded: Dict[str, Any] = {'codec': codec, 'n': len(array)}
+    if codec == 'delta':
+        scale = 1 if np.issubdtype(array.dtype, np.integer) else 100
+        scaled = np.round(array.astype(np.float64) * scale).astype('<i8')
+        raw = _byte_planes(np.diff(scaled, n=2, prepend=[0, 0]).astype('<i8'))
+        encoded['scale'] = scale
+    elif codec == 'float32':
+        raw = _byte_planes(array.astype('<f4'))
+    else:
+        raise ValueError(f"Codificação desconhecida: {codec}")
+    encoded['data'] = base64.b64encode(zlib.compress(raw, 9)).decode('ascii')
+    return encoded
+
+def decode_array(encoded: Dict[str, Any]) -> List[float]:
+    """Inverso de encode_array"""
+    if encoded['n'] == 0:
+        return []
+    raw = zlib.decompress(base64.b64decode(encoded['data']))
+    if encoded['codec'] == 'float32':
+        return _from_byte_planes(raw, '<f4').astype(np.float64).tolist()
+    scaled = np.cumsum(np.cumsum(_from_byte_planes(raw, '<i8')))
+    if encoded['scale'] == 1:
+        return scaled.tolist()
+    return (scaled / encoded['scale']).tolist()
+
+def _json_numpy(value: Any) -> Any:
+    """Arrays e escalares NumPy (históricos do lote) como tipos do JSON"""
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Objeto do tipo {type(value).__name__} não é serializável em JSON")
+
+def encode_simulation_result(result: Dict[str, Any], encoding: str = RESULT_ENCODING) -> Any:
+    """
+    Valor de simulations.result para um resultado de simulação.
+    
+    Com "delta" ou "float32", campos escalares (patrimonio_final,
+    rentabilidade_*) ficam em JSON puro, consultáveis como
+    result->>'patrimonio_final', e as séries numéricas vão codificadas
+    em 'arrays'. Com "json", o resultado inteiro vira texto JSON.
+    """
+    if encoding == 'json':
+        return json.dumps(result, default=_json_numpy)
+    
+    encoded: Dict[str, Any] = {}
+    arrays: Dict[str, Any] = {}
+    for name, value in result.items():
+        if isinstance(value, (list, tuple, np.ndarray)) and len(value) > 0 and \
+                all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in value):
+            arrays[name] = encode_array(value, encoding)
+        else:
+            encoded[name] = value
+    encoded['arrays'] = arrays
+    return encoded
+
+def decode_simulation_result(result: Any) -> Any:
+    """Resultado salvo em qualquer codificação de volta ao dict original"""
+    if isinstance(result, str):
+        result = json.loads(result)
+    if not isinstance(result, dict) or not isinstance(result.get('arrays'), dict):
+        return result
+    decoded = {name: value for name, value in result.items() if name != 'arrays'}
+    for name, encoded in result['arrays'].items():
+        decoded[name] = decode_array(encoded)
+    return decoded
+
+class UserIdCache:
+    """
+    Cache LRU com TTL de email para id de usuário.
+    
+    Guarda também ausências (id None) por negative_ttl segundos, para que
+    emails sem usuário não consultem o banco a cada requisição. Seguro para
+    uso por várias threads.
+    """
+    
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0, negative_ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, email: str) -> Tuple[bool, Optional[str]]:
+        """(encontrado, id); id None com encontrado True é uma ausência em cache"""
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None or entry[1] <= time.monotonic():
+                self._entries.pop(email, None)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(email)
+            self.hits += 1
+            return True, entry[0]
+    
+    def put(self, email: str, user_id: Optional[str]) -> None:
+        """Guarda o id (ou a ausência, com user_id None) de um email"""
+        ttl = self.ttl if user_id is not None else self.negative_ttl
+        with self._lock:
+            self._entries[email] = (user_id, time.monotonic() + ttl)
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
 class SupabaseIntegration:
     """Classe para integração com Supabase"""
     
     def __init__(self):
         self.supabase: Optional[Client] = None
+        self.user_ids = UserIdCache(
+            max_entries=int(os.getenv("USER_CACHE_SIZE", 10000)),
+            ttl=float(os.getenv("USER_CACHE_TTL", 300)),
+            negative_ttl=float(os.getenv("USER_CACHE_NEGATIVE_TTL", 30))
+        )
         self.setup_client()
     
     def setup_client(self):
@@ -52,37 +201,123 @@ class SupabaseIntegration:
                 'created_at': datetime.utcnow().isoformat()
             }).execute()
             
-            return result.data[0] if result.data else None
+            user = result.data[0] if result.data else None
+            if user:
+                self.user_ids.put(email, user['id'])
+            return user
         except Exception as e:
             print(f"Erro ao criar usuário: {e}")
             return None
     
+    def _query_user(self, email: str) -> Optional[Dict]:
+        """Busca usuário por email, propagando erros de conexão"""
+        result = self.supabase.table('users').select("*").eq('email', email).execute()
+        return result.data[0] if result.data else None
+    
     def get_user_by_email(self, email: str) -> Optional[Dict]:
         """Busca usuário por email"""
         if not self.is_connected():
             return None
         
         try:
-            result = self.supabase.table('users').select("*").eq('email', email).execute()
-            return result.data[0] if result.data else None
+            return self._query_user(email)
         except Exception as e:
             print(f"Erro ao buscar usuário: {e}")
             return None
     
+    def get_user_id(self, email: str, create: bool = False, name: str = None) -> Optional[str]:
+        """
+        Id do usuário de um email, consultando o cache antes do banco.
+        
+        Args:
+            email: Email do usuário
+            create: Se True, cria o usuário quando não existe
+            name: Nome do usuário criado
+        
+        Returns:
+            Id do usuário, ou None se não existe (e create é False) ou se o
+            banco falhou; falhas não são guardadas em cache
+        """
+        if not self.is_connected():
+            return None
+        
+        found, user_id = self.user_ids.get(email)
+        if not found:
+            try:
+                user = self._query_user(email)
+            except Exception as e:
+                print(f"Erro ao buscar usuário: {e}")
+                return None
+            user_id = user['id'] if user else None
+            self.user_ids.put(email, user_id)
+        
+        if user_id is None and create:
+            user = self.create_user(email, name)
+            user_id = user['id'] if user else None
+        return user_id
+    
+    def anonymous_user_id(self, session_id: str = None) -> Optional[str]:
+        """
+        Id do usuário anônimo de uma sessão de cliente, criado no primeiro uso.
+        
+        Sem sessão, cada chamada cria um usuário anônimo próprio, para que
+        simulações de clientes diferentes nunca fiquem no mesmo usuário.
+        """
+        if not session_id:
+            user = self.create_user(f"anonymous_{uuid.uuid4().hex}", "Usuário Anônimo")
+            return user['id'] if user else None
+        return self.get_user_id(f"anonymous_{session_id}", create=True, name="Usuário Anônimo")
+    
+    def _insert_bulk(self, table: str, rows: List[Dict], chunk_size: int) -> Dict[str, Any]:
+        """
+        Insere linhas em blocos de chunk_size, uma requisição por bloco.
+        
+        Cada bloco é atômico no PostgREST: se falhar, todas as suas linhas são
+        reportadas em 'failed' e os blocos seguintes continuam sendo enviados.
+        
+        Returns:
+            Dict com 'inserted' (linhas devolvidas pelo banco) e 'failed'
+            (lista de {'index', 'error'} com a posição da linha em rows)
+        """
+        if not self.is_connected():
+            return {'inserted': [], 'failed': [{'index': i, 'error': 'Supabase não conectado'}
+                                               for i in range(len(rows))]}
+        
+        inserted, failed = [], []
+        for start in range(0, len(rows), max(1, chunk_size)):
+            chunk = rows[start:start + max(1, chunk_size)]
+            try:
+                result = self.supabase.table(table).insert(chunk).execute()
+                inserted.extend(result.data or [])
+            except Exception as e:
+                print(f"Erro ao inserir bloco em {table}: {e}")
+                failed.extend({'index': i, 'error': str(e)} for i in range(start, start + len(chunk)))
+        return {'inserted': inserted, 'failed': failed}
+    
     # Métodos para Simulações
-    def save_simulation(self, user_id: str, strategy: str, parameters: Dict, result: Dict) -> Optional[Dict]:
-        """Salva uma simulação no banco"""
+    @staticmethod
+    def _simulation_row(user_id: str, strategy: str, parameters: Dict, result: Dict,
+                        simulation_id: str = None, encoding: str = None) -> Dict[str, Any]:
+        """Linha da tabela simulations, com o resultado em encoding (ver encode_simulation_result)"""
+        row = {
+            'user_id': user_id,
+            'strategy': strategy,
+            'parameters': json.dumps(parameters),
+            'result': encode_simulation_result(result, encoding or RESULT_ENCODING),
+            'created_at': datetime.utcnow().isoformat()
+        }
+        if simulation_id:
+            row['id'] = simulation_id
+        return row
+    
+    def save_simulation(self, user_id: str, strategy: str, parameters: Dict, result: Dict,
+                        simulation_id: str = None, encoding: str = None) -> Optional[Dict]:
+        """Salva uma simulação no banco (com o id informado, se houver; encoding padrão RESULT_ENCODING)"""
         if not self.is_connected():
             return None
         
         try:
-            simulation_data = {
-                'user_id': user_id,
-                'strategy': strategy,
-                'parameters': json.dumps(parameters),
-                'result': json.dumps(result),
-                'created_at': datetime.utcnow().isoformat()
-            }
+            simulation_data = self._simulation_row(user_id, strategy, parameters, result, simulation_id, encoding)
             
             db_result = self.supabase.table('simulations').insert(simulation_data).execute()
             return db_result.data[0] if db_result.data else None
@@ -90,8 +325,26 @@ class SupabaseIntegration:
             print(f"Erro ao salvar simulação: {e}")
             return None
     
-    def get_user_simulations(self, user_id: str, limit: int = 50) -> List[Dict]:
-        """Busca simulações de um usuário"""
+    def save_simulations_bulk(self, simulations: List[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Salva várias simulações com uma requisição por bloco de chunk_size.
+        
+        Args:
+            simulations: Dicts com user_id, strategy, parameters, result e,
+                         opcionalmente, id
+            chunk_size: Linhas por requisição
+        
+        Returns:
+            Dict com 'inserted' e 'failed' (ver _insert_bulk)
+        """
+        rows = [
+            self._simulation_row(s['user_id'], s['strategy'], s['parameters'], s['result'], s.get('id'))
+            for s in simulations
+        ]
+        return self._insert_bulk('simulations', rows, chunk_size)
+    
+    def get_user_simulations(self, user_id: str, limit: int = 50, decode: bool = True) -> List[Dict]:
+        """Busca simulações de um usuário; com decode, 'result' volta como dict em qualquer codificação"""
         if not self.is_connected():
             return []
         
@@ -103,7 +356,11 @@ class SupabaseIntegration:
                 .limit(limit)\
                 .execute()
             
-            return result.data or []
+            rows = result.data or []
+            if decode:
+                for row in rows:
+                    row['result'] = decode_simulation_result(row['result'])
+            return rows
         except Exception as e:
             print(f"Erro ao buscar simulações: {e}")
             return []
@@ -132,6 +389,19 @@ class SupabaseIntegration:
             return {}
     
     # Métodos para Portfólios
+    @staticmethod
+    def _portfolio_row(user_id: str, name: str, strategies: Dict,
+                       optimal_weights: Dict, final_return: float) -> Dict[str, Any]:
+        """Linha da tabela portfolios"""
+        return {
+            'user_id': user_id,
+            'name': name,
+            'strategies': json.dumps(strategies),
+            'optimal_weights': json.dumps(optimal_weights),
+            'final_return': final_return,
+            'created_at': datetime.utcnow().isoformat()
+        }
+    
     def save_portfolio(self, user_id: str, name: str, strategies: Dict, 
                       optimal_weights: Dict, final_return: float) -> Optional[Dict]:
         """Salva um portfólio otimizado"""
@@ -139,14 +409,7 @@ class SupabaseIntegration:
             return None
         
         try:
-            portfolio_data = {
-                'user_id': user_id,
-                'name': name,
-                'strategies': json.dumps(strategies),
-                'optimal_weights': json.dumps(optimal_weights),
-                'final_return': final_return,
-                'created_at': datetime.utcnow().isoformat()
-            }
+            portfolio_data = self._portfolio_row(user_id, name, strategies, optimal_weights, final_return)
             
             result = self.supabase.table('portfolios').insert(portfolio_data).execute()
             return result.data[0] if result.data else None
@@ -154,6 +417,24 @@ class SupabaseIntegration:
             print(f"Erro ao salvar portfólio: {e}")
             return None
     
+    def save_portfolios_bulk(self, portfolios: List[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Salva vários portfólios com uma requisição por bloco de chunk_size.
+        
+        Args:
+            portfolios: Dicts com user_id, name, strategies, optimal_weights
+                        e final_return
+            chunk_size: Linhas por requisição
+        
+        Returns:
+            Dict com 'inserted' e 'failed' (ver _insert_bulk)
+        """
+        rows = [
+            self._portfolio_row(p['user_id'], p['name'], p['strategies'], p['optimal_weights'], p['final_return'])
+            for p in portfolios
+        ]
+        return self._insert_bulk('portfolios', rows, chunk_size)
+    
     def get_user_portfolios(self, user_id: str) -> List[Dict]:
         """Busca portfólios de um usuário"""
         if not self.is_connected():
@@ -175,44 +456,83 @@ class SupabaseIntegration:
 supabase_client = SupabaseIntegration()
 
 # Funções de conveniência
+def _resolve_user_id(user_email: str = None, session_id: str = None) -> Optional[str]:
+    """Id do usuário do email ou, sem email, o usuário anônimo da sessão"""
+    if user_email:
+        return supabase_client.get_user_id(user_email, create=True)
+    return supabase_client.anonymous_user_id(session_id)
+
 def save_simulation_result(strategy: str, parameters: Dict, result: Dict, 
-                         user_email: str = None) -> bool:
-    """Salva resultado de simulação (função de conveniência)"""
+                         user_email: str = None, simulation_id: str = None,
+                         session_id: str = None) -> bool:
+    """
+    Salva resultado de simulação (função de conveniência); simulation_id é gerado pela API.
+    
+    Sem email, a simulação pertence ao usuário anônimo da sessão session_id,
+    reutilizado entre simulações; sem sessão, a um usuário anônimo próprio.
+    """
     if not supabase_client.is_connected():
         return False
     
-    # Se não tem email, cria usuário anônimo
-    if not user_email:
-        user_email = f"anonymous_{datetime.utcnow().timestamp()}"
-    
-    # Busca ou cria usuário
-    user = supabase_client.get_user_by_email(user_email)
-    if not user:
-        user = supabase_client.create_user(user_email, "Usuário Anônimo")
-    
-    if not user:
+    # Busca ou cria usuário (com cache)
+    user_id = _resolve_user_id(user_email, session_id)
+    if not user_id:
         return False
     
     # Salva simulação
     simulation = supabase_client.save_simulation(
-        user_id=user['id'],
+        user_id=user_id,
         strategy=strategy,
         parameters=parameters,
-        result=result
+        result=result,
+        simulation_id=simulation_id
     )
     
     return simulation is not None
 
+def save_simulation_results(records: List[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> List[bool]:
+    """
+    Salva vários resultados de simulação em lote (função de conveniência).
+    
+    Cada registro tem strategy, parameters, result e, opcionalmente,
+    user_email, session_id e simulation_id. Registros sem email pertencem
+    ao usuário anônimo da sua sessão; os ids vêm do cache de usuários.
+    
+    Returns:
+        Um bool por registro, na mesma ordem, indicando se foi salvo
+    """
+    if not supabase_client.is_connected():
+        return [False] * len(records)
+    
+    positions, simulations = [], []
+    for position, record in enumerate(records):
+        user_id = _resolve_user_id(record.get('user_email'), record.get('session_id'))
+        if user_id is not None:
+            positions.append(position)
+            simulations.append({
+                'user_id': user_id,
+                'strategy': record['strategy'],
+                'parameters': record['parameters'],
+                'result': record['result'],
+                'id': record.get('simulation_id')
+            })
+    
+    saved = [False] * len(records)
+    failed = {f['index'] for f in supabase_client.save_simulations_bulk(simulations, chunk_size)['failed']}
+    for index, position in enumerate(positions):
+        saved[position] = index not in failed
+    return saved
+
 def get_simulation_history(user_email: str, limit: int = 10) -> List[Dict]:
     """Busca histórico de simulações de um usuário"""
     if not supabase_client.is_connected():
         return []
     
-    user = supabase_client.get_user_by_email(user_email)
-    if not user:
+    user_id = supabase_client.get_user_id(user_email)
+    if not user_id:
         return []
     
-    return supabase_client.get_user_simulations(user['id'], limit)
+    return supabase_client.get_user_simulations(user_id, limit)
 
 # Exemplo de uso
 if __name__ == "__main__":
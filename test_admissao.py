@@ -0,0 +1,144 @@
+"""
+Testes unitários para o controle de admissão da API.
+
+Testa TokenBucket, RateLimiter, client_id e AdmissionMiddleware de
+backend/admission.py.
+"""
+
+import asyncio
+import unittest
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+from backend.admission import AdmissionMiddleware, RateLimiter, TokenBucket, client_id
+from backend.serve import DEFAULT_FORWARDED_ALLOW_IPS
+from backend.workers import BoundedExecutor
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Testes para TokenBucket e RateLimiter."""
+
+    def test_rajada_e_reposicao(self):
+        """Testa que a rajada é consumida e os tokens voltam com o tempo."""
+        balde = TokenBucket(rate=2.0, burst=3.0, now=0.0)
+
+        self.assertEqual([balde.take(0.0) for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(balde.take(0.0), 0.5)
+        self.assertEqual(balde.take(0.5), 0.0)
+
+    def test_clientes_independentes(self):
+        """Testa um balde por cliente e a remoção do cliente menos recente."""
+        limitador = RateLimiter(rate=1.0, burst=1.0, max_clients=2)
+
+        self.assertEqual(limitador.check('a', now=0.0), 0.0)
+        self.assertGreater(limitador.check('a', now=0.0), 0.0)
+        self.assertEqual(limitador.check('b', now=0.0), 0.0)
+        limitador.check('c', now=0.0)
+        self.assertEqual(limitador.check('a', now=0.0), 0.0)
+
+    def test_desativado(self):
+        """Testa que taxa zero não limita."""
+        limitador = RateLimiter(rate=0, burst=1)
+
+        self.assertEqual([limitador.check('a') for _ in range(10)], [0.0] * 10)
+
+    def test_identificacao_do_cliente(self):
+        """Testa que X-Forwarded-For, controlado pelo cliente, não muda a identificação."""
+        escopo = {'type': 'http', 'headers': [(b'x-forwarded-for', b'10.0.0.1, 172.16.0.1')], 'client': ('1.2.3.4', 1)}
+
+        self.assertEqual(client_id(escopo), '1.2.3.4')
+        self.assertEqual(client_id({'type': 'http', 'headers': []}), 'unknown')
+
+    def test_cliente_atras_do_proxy(self):
+        """Testa que, atrás do proxy confiável, vale o endereço acrescentado por ele."""
+        escopos = []
+
+        async def aplicacao(escopo, receive, send):
+            escopos.append(escopo)
+
+        proxy = ProxyHeadersMiddleware(aplicacao, trusted_hosts=DEFAULT_FORWARDED_ALLOW_IPS)
+        escopo = {'type': 'http', 'headers': [(b'x-forwarded-for', b'6.6.6.6, 203.0.113.5')],
+                  'client': ('10.1.2.3', 5000)}
+        asyncio.run(proxy(escopo, None, None))
+
+        self.assertEqual(client_id(escopos[0]), '203.0.113.5')
+
+
+class TestAdmissionMiddleware(unittest.TestCase):
+    """Testes para AdmissionMiddleware."""
+
+    def setUp(self):
+        """Configura aplicação mínima com um endpoint lento."""
+        self.liberar = None
+        self.rejeicoes = []
+
+        async def lento(request):
+            await self.liberar.wait()
+            return PlainTextResponse('ok')
+
+        async def rapido(request):
+            return PlainTextResponse('ok')
+
+        self.executor = BoundedExecutor('teste', kind='thread', max_workers=1, max_queue=0)
+        self.app = Starlette(routes=[Route('/lento', lento), Route('/rapido/{id}', rapido)])
+        self.app.add_middleware(
+            AdmissionMiddleware, router=self.app.router, rate_limiter=RateLimiter(rate=0, burst=1),
+            concurrency={'/lento': 2}, lanes={'/rapido/{id}': self.executor},
+            on_reject=lambda rota, motivo: self.rejeicoes.append((rota, motivo))
+        )
+
+    def requisitar(self, cenario):
+        async def executar():
+            self.liberar = asyncio.Event()
+            transporte = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(transport=transporte, base_url='http://teste') as cliente:
+                return await cenario(cliente)
+        return asyncio.run(executar())
+
+    def test_limite_de_concorrencia(self):
+        """Testa 503 quando o endpoint já tem o máximo de requisições em andamento."""
+        async def cenario(cliente):
+            pendentes = [asyncio.ensure_future(cliente.get('/lento')) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            excedente = await cliente.get('/lento')
+            self.liberar.set()
+            return excedente, await asyncio.gather(*pendentes)
+
+        excedente, concluidas = self.requisitar(cenario)
+
+        self.assertEqual(excedente.status_code, 503)
+        self.assertEqual(excedente.headers['retry-after'], '1')
+        self.assertEqual([r.status_code for r in concluidas], [200, 200])
+        self.assertEqual(self.rejeicoes, [('/lento', 'concurrency')])
+
+    def test_descarte_pela_fila_do_executor(self):
+        """Testa 503 antecipado quando o executor da faixa está cheio."""
+        async def cenario(cliente):
+            normal = await cliente.get('/rapido/1')
+            self.executor._pending = self.executor.capacity
+            return normal, await cliente.get('/rapido/2')
+
+        normal, descartada = self.requisitar(cenario)
+
+        self.assertEqual(normal.status_code, 200)
+        self.assertEqual(descartada.status_code, 503)
+        self.assertEqual(self.rejeicoes, [('/rapido/{id}', 'shed')])
+
+
+    def test_preflight_isento(self):
+        """Testa que requisições OPTIONS não consomem tokens do cliente."""
+        async def cenario(cliente):
+            preflights = [await cliente.options('/rapido/1') for _ in range(3)]
+            return preflights, await cliente.get('/rapido/1')
+
+        preflights, normal = self.requisitar(cenario)
+
+        self.assertNotIn(429, [r.status_code for r in preflights])
+        self.assertEqual(normal.status_code, 200)
+        self.assertEqual(self.rejeicoes, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,919 @@
+"""
+Testes da API FastAPI do sistema de simulação de investimentos.
+
+Exercita os endpoints de backend/api.py com o TestClient do FastAPI.
+"""
+
+import asyncio
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+import httpx
+import numpy as np
+from fastapi.testclient import TestClient
+from backend import api, formats, jobs
+from backend.api import app, CDIParams
+from backend.persistence import SQLiteStatusStore
+from core import OptimizedInvestment
+
+
+PARAMETROS_BASE = {'aporte_inicial': 100000.0, 'aporte_mensal': 2000.0, 'anos': 10}
+PARAMETROS_IMOVEL = dict(
+    PARAMETROS_BASE, valor_imovel=500000.0, entrada=100000.0, parcelas=120,
+    taxa_juros=9.0, valorizacao=5.0, aluguel_mensal=2500.0, anos_construcao=2
+)
+
+
+def setUpModule():
+    """Desativa o limite de taxa: todas as requisições do TestClient vêm do mesmo cliente."""
+    global limite_taxa
+    limite_taxa = patch.object(api.rate_limiter, 'rate', 0)
+    limite_taxa.start()
+
+
+def tearDownModule():
+    limite_taxa.stop()
+
+
+class TestSimulacaoAPI(unittest.TestCase):
+    """Testes para os endpoints /simulate/*."""
+
+    def setUp(self):
+        """Configura cliente de testes e simulador de referência."""
+        self.client = TestClient(app)
+        self.simulador = OptimizedInvestment(inflacao=4.5)
+
+    def test_cdi(self):
+        """Testa que o endpoint CDI reproduz o simulador."""
+        response = self.client.post('/simulate/cdi', json=dict(PARAMETROS_BASE, taxa_cdi=10.5))
+
+        self.assertEqual(response.status_code, 200)
+        esperado = self.simulador.investimento_cdi(100000.0, 2000.0, 10.5, 10)
+        self.assertEqual(response.json()['historico'], esperado)
+        self.assertEqual(response.json()['patrimonio_final'], esperado[-1])
+
+    def test_ipca(self):
+        """Testa que o endpoint IPCA+ reproduz o simulador."""
+        response = self.client.post('/simulate/ipca', json=dict(PARAMETROS_BASE, taxa_ipca=6.0))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['historico'], self.simulador.investimento_ipca(100000.0, 2000.0, 6.0, 10))
+
+    def test_imoveis(self):
+        """Testa os endpoints de imóvel na planta e pronto."""
+        planta = self.client.post('/simulate/real-estate/under-construction', json=PARAMETROS_IMOVEL)
+        pronto = self.client.post('/simulate/real-estate/ready', json=PARAMETROS_IMOVEL)
+
+        self.assertEqual(planta.status_code, 200)
+        self.assertEqual(pronto.status_code, 200)
+        self.assertEqual(planta.json()['historico'], self.simulador.compra_financiada_planta(
+            500000.0, 100000.0, 120, 9.0, 5.0, 2500.0, anos_construcao=2))
+        self.assertEqual(pronto.json()['historico'], self.simulador.compra_financiada_pronto(
+            500000.0, 100000.0, 120, 9.0, 5.0, 2500.0))
+
+    def test_estrategia_mista(self):
+        """Testa o endpoint de estratégia mista."""
+        response = self.client.post('/simulate/mixed-strategy', json=dict(PARAMETROS_IMOVEL, taxa_cdi=10.0))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['historico'], self.simulador.compra_e_renda_fixa(
+            500000.0, 100000.0, 120, 9.0, 10.0, 2000.0, 5.0))
+
+    def test_validacao(self):
+        """Testa erro 422 para parâmetros fora dos limites."""
+        response = self.client.post('/simulate/cdi', json=dict(PARAMETROS_BASE, taxa_cdi=-1.0))
+
+        self.assertEqual(response.status_code, 422)
+
+    def test_esquema_openapi(self):
+        """Testa que o esquema OpenAPI continua descrito pelos modelos de resposta."""
+        caminhos = app.openapi()['paths']
+        esquemas = {
+            '/simulate/cdi': 'SimulationResult', '/optimize': 'OptimizationResult', '/optimize/frontier': 'FrontierResult'
+        }
+
+        for caminho, modelo in esquemas.items():
+            conteudo = caminhos[caminho]['post']['responses']['200']['content']
+            self.assertEqual(conteudo['application/json']['schema'], {'$ref': f'#/components/schemas/{modelo}'})
+
+    def test_health(self):
+        """Testa o endpoint de saúde com estatísticas dos executores."""
+        response = self.client.get('/health')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('simulation', response.json()['executors'])
+        self.assertIn('optimization', response.json()['executors'])
+
+
+class TestMetricasAPI(unittest.TestCase):
+    """Testes para o endpoint /metrics."""
+
+    def setUp(self):
+        """Configura cliente de testes."""
+        self.client = TestClient(app)
+
+    def test_formato_prometheus(self):
+        """Testa o tipo de conteúdo e as métricas de cache e executores."""
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['content-type'].startswith('text/plain; version=0.0.4'))
+        for nome in ('executor_queue_depth{executor="simulation"}', 'response_cache_hit_ratio',
+                     'single_flight_coalesce_ratio', '# TYPE http_request_duration_seconds histogram'):
+            self.assertIn(nome, response.text)
+
+    def test_jobs_contados_fora_do_loop(self):
+        """Testa que a contagem de jobs por status roda em uma thread, fora do event loop."""
+        chamadas = []
+
+        def contar():
+            try:
+                asyncio.get_running_loop()
+                chamadas.append('loop')
+            except RuntimeError:
+                chamadas.append('thread')
+            return {'queued': 3}
+
+        with patch.object(api, 'job_store', SimpleNamespace(counts=contar)):
+            texto = self.client.get('/metrics').text
+
+        self.assertEqual(chamadas, ['thread'])
+        self.assertIn('jobs{status="queued"} 3', texto)
+
+    def test_latencia_por_rota_e_etapas(self):
+        """Testa que rotas são rotuladas pelo modelo do caminho e as etapas são cronometradas."""
+        api.response_cache.clear()
+        kernel = api.stage_duration.count(operation='ipca', stage='kernel')
+        serializacao = api.stage_duration.count(operation='ipca', stage='serialization')
+        requisicoes = api.requests_total.value(route='/history/{user_email}', method='GET', status='503')
+
+        self.client.post('/simulate/ipca', json=dict(PARAMETROS_BASE, taxa_ipca=6.5))
+        self.client.get('/history/alguem@exemplo.com')
+        texto = self.client.get('/metrics').text
+
+        self.assertEqual(api.stage_duration.count(operation='ipca', stage='kernel'), kernel + 1)
+        self.assertEqual(api.stage_duration.count(operation='ipca', stage='serialization'), serializacao + 1)
+        self.assertEqual(
+            api.requests_total.value(route='/history/{user_email}', method='GET', status='503'), requisicoes + 1)
+        self.assertIn('route="/simulate/ipca",method="POST"', texto)
+        self.assertNotIn('alguem@exemplo.com', texto)
+
+    def test_timestamp_banco_de_dados(self):
+        """Testa que /health/database informa o horário atual em UTC."""
+        timestamp = self.client.get('/health/database').json()['timestamp']
+
+        horario = datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+        self.assertLess(abs((datetime.now(timezone.utc) - horario).total_seconds()), 60)
+
+
+class TestAdmissaoAPI(unittest.TestCase):
+    """Testes para limite de taxa e descarte de carga."""
+
+    def setUp(self):
+        """Configura cliente de testes."""
+        self.client = TestClient(app)
+
+    def test_limite_por_cliente(self):
+        """Testa 429 com Retry-After após a rajada, isolado por cliente."""
+        parametros = dict(PARAMETROS_BASE, taxa_cdi=10.5)
+        with patch.object(api.rate_limiter, 'rate', 0.5), patch.object(api.rate_limiter, 'burst', 2):
+            cliente_a = TestClient(app, client=('203.0.113.1', 50000))
+            respostas = [cliente_a.post('/simulate/cdi', json=parametros, headers={'X-Forwarded-For': f'10.0.0.{i}'})
+                         for i in range(3)]
+            outro = TestClient(app, client=('203.0.113.2', 50000)).post('/simulate/cdi', json=parametros)
+            saude = cliente_a.get('/health')
+
+        self.assertEqual([r.status_code for r in respostas], [200, 200, 429])
+        self.assertEqual(respostas[2].headers['Retry-After'], '2')
+        self.assertEqual(outro.status_code, 200)
+        self.assertEqual(saude.status_code, 200)
+
+    def test_cors_em_rejeicoes(self):
+        """Testa que respostas 429 levam os cabeçalhos CORS e que preflights não gastam a rajada."""
+        parametros = dict(PARAMETROS_BASE, taxa_cdi=10.5)
+        origem = {'Origin': 'https://app.exemplo.com'}
+        preflight = dict(origem, **{'Access-Control-Request-Method': 'POST'})
+        with patch.object(api.rate_limiter, 'rate', 0.5), patch.object(api.rate_limiter, 'burst', 1):
+            cliente = TestClient(app, client=('203.0.113.3', 50000))
+            preflights = [cliente.options('/simulate/cdi', headers=preflight) for _ in range(3)]
+            respostas = [cliente.post('/simulate/cdi', json=parametros, headers=origem) for _ in range(2)]
+
+        self.assertEqual([r.status_code for r in preflights], [200] * 3)
+        self.assertEqual([r.status_code for r in respostas], [200, 429])
+        self.assertEqual(respostas[1].headers['Access-Control-Allow-Origin'], 'https://app.exemplo.com')
+        self.assertIn('Retry-After', respostas[1].headers)
+
+    def test_faixas_separadas(self):
+        """Testa que a faixa rápida cheia descarta CDI sem afetar imóveis."""
+        rejeitadas = api.requests_rejected.value(route='/simulate/ipca', reason='shed')
+        with patch.object(api.fast_simulation_executor, 'max_workers', 0), \
+             patch.object(api.fast_simulation_executor, 'max_queue', 0):
+            rapida = self.client.post('/simulate/ipca', json=dict(PARAMETROS_BASE, taxa_ipca=5.5))
+            pesada = self.client.post('/simulate/real-estate/ready', json=dict(PARAMETROS_IMOVEL, aluguel_mensal=2600.0))
+
+        self.assertEqual(rapida.status_code, 503)
+        self.assertIn('Retry-After', rapida.headers)
+        self.assertEqual(pesada.status_code, 200)
+        self.assertEqual(api.requests_rejected.value(route='/simulate/ipca', reason='shed'), rejeitadas + 1)
+
+
+class TestProntidaoAPI(unittest.TestCase):
+    """Testes para o aquecimento na inicialização e /health/ready."""
+
+    def test_aquecimento_e_prontidao(self):
+        """Testa que a prontidão só é informada após o aquecimento, com os presets em cache."""
+        api.response_cache.clear()
+        with patch.object(api, 'JOB_WORKERS', 0), \
+             patch.object(api.simulation_executor, 'kind', 'thread'), \
+             patch.object(api.optimization_executor, 'kind', 'thread'), \
+             patch.dict(api.warmup_state, ready=False), \
+             TestClient(app) as client:
+            limite = time.monotonic() + 30
+            response = client.get('/health/ready')
+            while response.status_code == 503 and time.monotonic() < limite:
+                self.assertEqual(response.json()['status'], 'warming')
+                time.sleep(0.05)
+                response = client.get('/health/ready')
+
+            self.assertEqual(response.status_code, 200)
+            estado = response.json()['warmup']
+            self.assertIsNone(estado['error'])
+            self.assertEqual(estado['presets'], len(api.warmup.PRESETS))
+            self.assertEqual(set(estado['steps']), {'kernels', 'presets'})
+            self.assertGreater(estado['duration'], 0)
+            # Os kernels aquecem no próprio processo: pools sem uso não são iniciados
+            self.assertIsNone(api.optimization_executor._executor)
+
+            estrategia, valores = api.warmup.PRESETS[0]
+            response = client.post('/simulate/cdi', json=valores)
+            self.assertEqual((estrategia, response.headers['X-Cache']), ('cdi', 'HIT'))
+
+    def test_aquecendo(self):
+        """Testa 503 com Retry-After enquanto o aquecimento não terminou."""
+        with patch.dict(api.warmup_state, ready=False):
+            response = TestClient(app).get('/health/ready')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+
+class TestCacheRespostaAPI(unittest.TestCase):
+    """Testes para o cache de respostas e ETags de /simulate/*."""
+
+    def setUp(self):
+        """Configura cliente de testes e limpa o cache."""
+        self.client = TestClient(app)
+        self.params = dict(PARAMETROS_BASE, taxa_cdi=11.0)
+        api.response_cache.clear()
+
+    def test_requisicao_repetida_nao_simula(self):
+        """Testa que a repetição é atendida do cache com o mesmo corpo."""
+        with patch.object(api, 'run_simulation', wraps=api.run_simulation) as simular:
+            primeira = self.client.post('/simulate/cdi', json=self.params)
+            segunda = self.client.post('/simulate/cdi', json=dict(reversed(list(self.params.items()))))
+
+        self.assertEqual(simular.call_count, 1)
+        self.assertEqual(primeira.headers['X-Cache'], 'MISS')
+        self.assertEqual(segunda.headers['X-Cache'], 'HIT')
+        self.assertEqual(primeira.content, segunda.content)
+        self.assertEqual(primeira.headers['ETag'], segunda.headers['ETag'])
+
+    def test_if_none_match_retorna_304(self):
+        """Testa resposta 304 sem corpo para ETag conhecida, mesmo após limpar o cache."""
+        etag = self.client.post('/simulate/cdi', json=self.params).headers['ETag']
+        api.response_cache.clear()
+
+        with patch.object(api, 'run_simulation', wraps=api.run_simulation) as simular:
+            response = self.client.post('/simulate/cdi', json=self.params, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+        simular.assert_not_called()
+
+    def test_304_com_etag_comprimida(self):
+        """Testa revalidação com a ETag da representação gzip."""
+        primeira = self.client.post('/simulate/cdi', json=self.params, headers={'Accept-Encoding': 'gzip'})
+        etag = primeira.headers['ETag']
+
+        response = self.client.post('/simulate/cdi', json=self.params,
+                                    headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+
+        self.assertEqual(primeira.headers['Content-Encoding'], 'gzip')
+        self.assertTrue(etag.endswith('-gzip"'))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_requisicoes_concorrentes_coalescidas(self):
+        """Testa que requisições idênticas simultâneas executam uma única simulação."""
+        async def cenario():
+            transporte = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transporte, base_url='http://teste') as cliente:
+                return await asyncio.gather(*[cliente.post('/simulate/cdi', json=self.params) for _ in range(5)])
+
+        lideres, aguardando = api.simulation_flights.leaders, api.simulation_flights.waiters
+        with patch.object(api, 'run_simulation', wraps=api.run_simulation) as simular:
+            respostas = asyncio.run(cenario())
+
+        self.assertEqual(simular.call_count, 1)
+        self.assertEqual(len({resposta.content for resposta in respostas}), 1)
+        self.assertEqual(api.simulation_flights.leaders - lideres, 1)
+        self.assertEqual(api.simulation_flights.waiters - aguardando, 4)
+
+    def test_etag_depende_dos_parametros_e_rota(self):
+        """Testa que parâmetros ou rotas diferentes geram ETags diferentes."""
+        cdi = self.client.post('/simulate/cdi', json=self.params)
+        outro = self.client.post('/simulate/cdi', json=dict(self.params, anos=11))
+        planta = self.client.post('/simulate/real-estate/under-construction', json=PARAMETROS_IMOVEL)
+        pronto = self.client.post('/simulate/real-estate/ready', json=PARAMETROS_IMOVEL,
+                                  headers={'If-None-Match': planta.headers['ETag']})
+
+        self.assertNotEqual(cdi.headers['ETag'], outro.headers['ETag'])
+        self.assertEqual(pronto.status_code, 200)
+        self.assertNotEqual(pronto.headers['ETag'], planta.headers['ETag'])
+
+
+class TestReducaoHistoricoAPI(unittest.TestCase):
+    """Testes para os parâmetros resolution, points e fields de /simulate/*."""
+
+    def setUp(self):
+        """Configura cliente de testes."""
+        self.client = TestClient(app)
+        self.params = dict(PARAMETROS_BASE, taxa_cdi=10.5)
+
+    def test_resolucao_anual(self):
+        """Testa histórico anual com os meses correspondentes."""
+        completo = self.client.post('/simulate/cdi', json=self.params).json()
+        anual = self.client.post('/simulate/cdi?resolution=annual', json=self.params)
+
+        self.assertEqual(anual.status_code, 200)
+        self.assertEqual(anual.json()['meses'], list(range(12, 121, 12)))
+        self.assertEqual(anual.json()['historico'], completo['historico'][11::12])
+        self.assertNotEqual(anual.headers['ETag'], self.client.post('/simulate/cdi', json=self.params).headers['ETag'])
+
+    def test_pontos_e_campos(self):
+        """Testa redução por pontos e resposta apenas com o resumo."""
+        pontos = self.client.post('/simulate/real-estate/ready?points=12&downsample=minmax', json=PARAMETROS_IMOVEL)
+        resumo = self.client.post('/simulate/ipca?fields=summary', json=dict(PARAMETROS_BASE, taxa_ipca=6.0))
+
+        self.assertLessEqual(len(pontos.json()['historico']), 12)
+        self.assertEqual(pontos.json()['meses'][-1], 120)
+        self.assertNotIn('historico', resumo.json())
+        self.assertIn('patrimonio_final', resumo.json())
+
+    def test_campo_invalido(self):
+        """Testa erro 422 para campo desconhecido."""
+        response = self.client.post('/simulate/cdi?fields=foo', json=self.params)
+
+        self.assertEqual(response.status_code, 422)
+
+    def test_lote_com_campos(self):
+        """Testa que as opções se aplicam a cada linha do lote."""
+        response = self.client.post('/simulate/batch?fields=summary', json={
+            'simulacoes': [{'strategy': 'cdi', 'params': self.params}]
+        })
+
+        linha = json.loads(response.text.splitlines()[0])
+        self.assertEqual(linha['index'], 0)
+        self.assertNotIn('historico', linha)
+        self.assertIn('patrimonio_final', linha)
+
+
+class TestFormatosRespostaAPI(unittest.TestCase):
+    """Testes para negociação de conteúdo nos endpoints."""
+
+    def setUp(self):
+        """Configura cliente de testes."""
+        self.client = TestClient(app)
+        self.params = dict(PARAMETROS_BASE, taxa_cdi=10.5)
+
+    def test_float32(self):
+        """Testa resposta float32 com ETag própria e resumo no cabeçalho."""
+        json_response = self.client.post('/simulate/cdi', json=self.params)
+        binaria = self.client.post('/simulate/cdi', json=self.params, headers={'Accept': formats.FLOAT32})
+
+        self.assertEqual(binaria.status_code, 200)
+        self.assertEqual(binaria.headers['content-type'], formats.FLOAT32)
+        np.testing.assert_allclose(np.frombuffer(binaria.content, dtype='<f4'),
+                                   json_response.json()['historico'], rtol=1e-6)
+        self.assertEqual(json.loads(binaria.headers['X-Summary'])['patrimonio_final'],
+                         json_response.json()['patrimonio_final'])
+        self.assertNotEqual(binaria.headers['ETag'], json_response.headers['ETag'])
+        self.assertIn('Accept', binaria.headers['Vary'])
+
+        revalidada = self.client.post('/simulate/cdi', json=self.params,
+                                      headers={'Accept': formats.FLOAT32, 'If-None-Match': json_response.headers['ETag']})
+        self.assertEqual(revalidada.status_code, 200)
+
+    def test_formato_nao_aceitavel(self):
+        """Testa erro 406 para formato desconhecido ou sem dependência instalada."""
+        with patch.object(formats, 'pa', None):
+            arrow = self.client.post('/simulate/cdi', json=self.params, headers={'Accept': formats.ARROW})
+        html = self.client.post('/simulate/cdi', json=self.params, headers={'Accept': 'text/html'})
+
+        self.assertEqual(arrow.status_code, 406)
+        self.assertEqual(html.status_code, 406)
+
+    @unittest.skipUnless(formats.msgpack is not None, 'msgpack não instalado')
+    def test_msgpack_lote_e_fronteira(self):
+        """Testa msgpack no lote e na fronteira eficiente."""
+        lote = self.client.post('/simulate/batch', headers={'Accept': formats.MSGPACK}, json={
+            'simulacoes': [{'strategy': 'cdi', 'params': self.params}, {'strategy': 'ipca', 'params': dict(PARAMETROS_BASE, taxa_ipca=6.0)}]
+        })
+        fronteira = self.client.post('/optimize/frontier', headers={'Accept': formats.MSGPACK}, json={
+            'cenarios': {'CDI': [1.10, 1.11, 1.09], 'Imovel': [1.50, 0.80, 1.90]}, 'num_pontos': 3
+        })
+
+        registros = list(formats.msgpack.Unpacker(io.BytesIO(lote.content)))
+        self.assertEqual(sorted(registro['index'] for registro in registros), [0, 1])
+        self.assertEqual(len(formats.msgpack.unpackb(fronteira.content)['pesos']), 3)
+
+
+class TestSimulacaoLoteAPI(unittest.TestCase):
+    """Testes para o endpoint /simulate/batch."""
+
+    def setUp(self):
+        """Configura cliente de testes."""
+        self.client = TestClient(app)
+
+    def test_lote_heterogeneo(self):
+        """Testa que cada linha NDJSON corresponde à simulação individual."""
+        simulacoes = [
+            {'strategy': 'cdi', 'params': dict(PARAMETROS_BASE, taxa_cdi=10.5)},
+            {'strategy': 'planta', 'params': PARAMETROS_IMOVEL},
+            {'strategy': 'cdi', 'params': dict(PARAMETROS_BASE, taxa_cdi=12.0, anos=5)},
+            {'strategy': 'ipca', 'params': dict(PARAMETROS_BASE, taxa_ipca=6.0)},
+            {'strategy': 'pronto', 'params': PARAMETROS_IMOVEL},
+            {'strategy': 'mixed', 'params': dict(PARAMETROS_IMOVEL, taxa_cdi=10.0)},
+        ]
+        rotas = {
+            'cdi': '/simulate/cdi', 'ipca': '/simulate/ipca', 'mixed': '/simulate/mixed-strategy',
+            'planta': '/simulate/real-estate/under-construction', 'pronto': '/simulate/real-estate/ready'
+        }
+
+        with patch.object(api, 'BATCH_CHUNK_SIZE', 1):
+            response = self.client.post('/simulate/batch', json={'simulacoes': simulacoes})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['content-type'].startswith('application/x-ndjson'))
+        linhas = [json.loads(linha) for linha in response.text.splitlines()]
+        self.assertEqual(sorted(linha['index'] for linha in linhas), list(range(len(simulacoes))))
+        for linha in linhas:
+            simulacao = simulacoes[linha['index']]
+            self.assertEqual(linha['strategy'], simulacao['strategy'])
+            individual = self.client.post(rotas[simulacao['strategy']], json=simulacao['params']).json()
+            self.assertEqual(len(linha['historico']), len(individual['historico']))
+            self.assertAlmostEqual(linha['patrimonio_final'] / individual['patrimonio_final'], 1.0, places=10)
+            self.assertAlmostEqual(linha['rentabilidade_anual'], individual['rentabilidade_anual'], places=8)
+
+    def test_eventos_sse(self):
+        """Testa progresso, resultados e bandas de percentis no stream de eventos."""
+        simulacoes = [
+            {'strategy': 'cdi', 'params': dict(PARAMETROS_BASE, taxa_cdi=8.0 + i)} for i in range(5)
+        ] + [{'strategy': 'ipca', 'params': dict(PARAMETROS_BASE, taxa_ipca=6.0)}]
+
+        with patch.object(api, 'BATCH_CHUNK_SIZE', 2):
+            response = self.client.post('/simulate/batch?fields=summary', json={'simulacoes': simulacoes},
+                                        headers={'Accept': 'text/event-stream'})
+
+        self.assertTrue(response.headers['content-type'].startswith('text/event-stream'))
+        eventos = []
+        for bloco in response.text.strip().split('\n\n'):
+            nome, dados = bloco.split('\n')
+            eventos.append((nome.removeprefix('event: '), json.loads(dados.removeprefix('data: '))))
+
+        progresso = [dados['percent'] for nome, dados in eventos if nome == 'progress']
+        resultados = [linha for nome, dados in eventos if nome == 'results' for linha in dados]
+        agregado = [dados for nome, dados in eventos if nome == 'aggregate'][-1]
+        self.assertEqual(progresso[0], 0.0)
+        self.assertEqual(progresso[-1], 100.0)
+        self.assertEqual(progresso, sorted(progresso))
+        self.assertEqual(sorted(linha['index'] for linha in resultados), list(range(6)))
+        self.assertNotIn('historico', resultados[0])
+        self.assertEqual(agregado['completed'], 6)
+        self.assertEqual(len(agregado['bandas']['p50']), 10)
+        self.assertEqual(eventos[-1], ('done', {'completed': 6, 'total': 6}))
+
+    def test_desconexao_interrompe_lote(self):
+        """Testa que nenhum bloco novo é calculado após o cliente desconectar."""
+        itens = api.BatchSimulationParams(simulacoes=[
+            {'strategy': 'cdi', 'params': dict(PARAMETROS_BASE, taxa_cdi=10.0)} for _ in range(4)
+        ]).simulacoes
+        desconectado = [False, False, True]
+
+        class RequisicaoFalsa:
+            async def is_disconnected(self):
+                return desconectado.pop(0)
+
+        async def consumir():
+            return [bloco async for bloco in api._batch_chunks(itens, RequisicaoFalsa())]
+
+        with patch.object(api, 'BATCH_CHUNK_SIZE', 1), \
+             patch.object(api, '_run_batch_chunk', wraps=api._run_batch_chunk) as executar:
+            blocos = asyncio.run(consumir())
+
+        self.assertEqual(len(blocos), 2)
+        self.assertEqual(executar.call_count, 2)
+
+    def test_estrategia_desconhecida(self):
+        """Testa erro 422 para estratégia inválida."""
+        response = self.client.post('/simulate/batch', json={
+            'simulacoes': [{'strategy': 'acoes', 'params': PARAMETROS_BASE}]
+        })
+
+        self.assertEqual(response.status_code, 422)
+
+
+class TestFronteiraEficienteAPI(unittest.TestCase):
+    """Testes para o endpoint /optimize/frontier."""
+
+    def setUp(self):
+        """Configura cliente de testes."""
+        self.client = TestClient(app)
+        self.cenarios = {
+            'CDI': [1.10, 1.11, 1.09, 1.10, 1.12],
+            'Imovel': [1.50, 0.80, 1.90, 1.20, 1.00]
+        }
+
+    def test_fronteira_retorna_arrays(self):
+        """Testa que a fronteira retorna arrays com o número de pontos pedido."""
+        response = self.client.post('/optimize/frontier', json={'cenarios': self.cenarios, 'num_pontos': 4})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['estrategias'], ['CDI', 'Imovel'])
+        self.assertEqual(len(data['aversoes']), 4)
+        self.assertEqual(len(data['pesos']), 4)
+        self.assertEqual(len(data['riscos']), 4)
+        for pesos in data['pesos']:
+            self.assertAlmostEqual(sum(pesos), 1.0, places=8)
+
+    def test_fronteira_cenarios_invalidos(self):
+        """Testa erro 400 quando há menos de dois cenários."""
+        response = self.client.post('/optimize/frontier', json={'cenarios': {'A': [1.0], 'B': [2.0]}})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TestJobsAPI(unittest.TestCase):
+    """Testes para os endpoints /jobs."""
+
+    def setUp(self):
+        """Configura cliente de testes com uma fila SQLite temporária."""
+        self.client = TestClient(app)
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.store = jobs.JobStore(os.path.join(self.diretorio.name, 'jobs.db'))
+        self.patcher = patch.object(api, 'job_store', self.store)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.diretorio.cleanup()
+
+    def test_ciclo_completo(self):
+        """Testa envio, status e resultado de um job de simulação."""
+        response = self.client.post('/jobs', json={'kind': 'cdi', 'params': dict(PARAMETROS_BASE, taxa_cdi=10.5)})
+
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['id']
+        self.assertEqual(response.headers['location'], f'/jobs/{job_id}')
+        self.assertEqual(self.client.get(f'/jobs/{job_id}').json()['status'], 'queued')
+        self.assertEqual(self.client.get(f'/jobs/{job_id}/result').status_code, 409)
+
+        jobs.process_next(self.store)
+
+        self.assertEqual(self.client.get(f'/jobs/{job_id}').json()['progress'], 1.0)
+        resultado = self.client.get(f'/jobs/{job_id}/result').json()
+        esperado = OptimizedInvestment(inflacao=4.5).investimento_cdi(100000.0, 2000.0, 10.5, 10)
+        self.assertEqual(resultado['historico'], esperado)
+
+    def test_lote(self):
+        """Testa job em lote com os resultados na ordem do pedido."""
+        simulacoes = [
+            {'strategy': 'ipca', 'params': dict(PARAMETROS_BASE, taxa_ipca=6.0)},
+            {'strategy': 'pronto', 'params': PARAMETROS_IMOVEL},
+        ]
+        job_id = self.client.post('/jobs', json={'kind': 'batch', 'params': {'simulacoes': simulacoes}}).json()['id']
+        jobs.process_next(self.store)
+
+        resultados = self.client.get(f'/jobs/{job_id}/result').json()['resultados']
+        self.assertEqual([(r['index'], r['strategy']) for r in resultados], [(0, 'ipca'), (1, 'pronto')])
+
+    def test_validacao_e_job_inexistente(self):
+        """Testa erro 422 para parâmetros inválidos e 404 para ids desconhecidos."""
+        invalido = self.client.post('/jobs', json={'kind': 'cdi', 'params': dict(PARAMETROS_BASE, taxa_cdi=-1.0)})
+
+        self.assertEqual(invalido.status_code, 422)
+        self.assertEqual(self.client.get('/jobs/inexistente').status_code, 404)
+        self.assertEqual(self.client.get('/jobs/inexistente/result').status_code, 404)
+
+    def test_job_com_falha(self):
+        """Testa que o erro do simulador é exposto no status e no resultado."""
+        job_id = self.client.post('/jobs', json={'kind': 'optimize', 'params': {
+            'estrategias': {'A': [1.0, 2.0], 'B': [1.0]}, 'anos': 1
+        }}).json()['id']
+        jobs.process_next(self.store)
+
+        self.assertEqual(self.client.get(f'/jobs/{job_id}').json()['status'], 'failed')
+        self.assertEqual(self.client.get(f'/jobs/{job_id}/result').status_code, 422)
+
+
+class TestPersistenciaAPI(unittest.TestCase):
+    """Testes para a gravação write-behind de simulações CDI."""
+
+    def setUp(self):
+        """Guarda os status em um banco temporário."""
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.patcher = patch.object(api.persistence_queue, 'shared_statuses',
+                                    SQLiteStatusStore(os.path.join(self.diretorio.name, 'persistence.db')))
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.diretorio.cleanup()
+
+    def test_resposta_independe_do_banco(self):
+        """Testa que a resposta sai antes da gravação e o status é resolvido depois."""
+        gravadas = []
+
+        def gravar(registros):
+            time.sleep(0.5)
+            gravadas.extend(registros)
+            return [True] * len(registros)
+
+        banco = SimpleNamespace(save_simulation_results=gravar)
+        api.response_cache.clear()
+        with patch.object(api, 'supabase_integration', lambda: banco), \
+             patch.object(api, 'JOB_WORKERS', 0), patch.object(api, 'WARMUP_ENABLED', False), \
+             patch.object(api.persistence_queue, 'flush_interval', 0.01), \
+             TestClient(app) as client:
+            inicio = time.perf_counter()
+            response = client.post('/simulate/cdi', json=dict(PARAMETROS_BASE, taxa_cdi=11.37),
+                                   headers={'X-Session-Id': 'sessao-1'})
+            duracao = time.perf_counter() - inicio
+
+            self.assertEqual(response.status_code, 200)
+            self.assertLess(duracao, 0.5)
+            simulation_id = response.json()['simulation_id']
+            self.assertFalse(response.json()['saved_to_database'])
+            self.assertEqual(client.get(f'/simulations/{simulation_id}/status').json()['status'], 'pending')
+
+            limite = time.monotonic() + 5
+            while not gravadas and time.monotonic() < limite:
+                time.sleep(0.05)
+            status = client.get(f'/simulations/{simulation_id}/status').json()
+
+        self.assertEqual((status['status'], status['saved_to_database']), ('saved', True))
+        self.assertEqual(gravadas[0]['simulation_id'], simulation_id)
+        self.assertNotIn('simulation_id', gravadas[0]['result'])
+        self.assertEqual(gravadas[0]['session_id'], 'sessao-1')
+
+    def test_cada_requisicao_grava_a_sua(self):
+        """Testa que acertos de cache também são gravados, cada um com o seu id."""
+        gravadas = []
+
+        def gravar(registros):
+            gravadas.extend(registros)
+            return [True] * len(registros)
+
+        banco = SimpleNamespace(save_simulation_results=gravar)
+        parametros = dict(PARAMETROS_BASE, taxa_cdi=11.41)
+        api.response_cache.clear()
+        with patch.object(api, 'supabase_integration', lambda: banco), \
+             patch.object(api, 'JOB_WORKERS', 0), patch.object(api, 'WARMUP_ENABLED', False), \
+             patch.object(api.persistence_queue, 'flush_interval', 0.01), \
+             TestClient(app) as client:
+            respostas = [
+                client.post('/simulate/cdi', json=parametros),
+                client.post('/simulate/cdi', json=parametros),
+                client.post('/simulate/cdi?fields=patrimonio_final,simulation_id', json=parametros)
+            ]
+            ids = [r.json()['simulation_id'] for r in respostas]
+
+            limite = time.monotonic() + 5
+            while len(gravadas) < 3 and time.monotonic() < limite:
+                time.sleep(0.05)
+
+        self.assertEqual([r.headers['X-Cache'] for r in respostas], ['MISS', 'HIT', 'MISS'])
+        self.assertEqual([r.headers['X-Simulation-Id'] for r in respostas], ids)
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual(sorted(g['simulation_id'] for g in gravadas), sorted(ids))
+        self.assertTrue(all('historico' in g['result'] for g in gravadas))
+        self.assertIsNone(api.response_cache.get(api.canonical_key('cdi', CDIParams(**parametros).model_dump()))
+                          .payload['simulation_id'])
+
+    def test_sessoes_com_parametros_iguais(self):
+        """Testa que sessões diferentes com os mesmos parâmetros gravam cada uma a sua simulação."""
+        gravadas = []
+
+        def gravar(registros):
+            gravadas.extend(registros)
+            return [True] * len(registros)
+
+        banco = SimpleNamespace(save_simulation_results=gravar)
+        parametros = dict(PARAMETROS_BASE, taxa_cdi=11.43)
+        api.response_cache.clear()
+        with patch.object(api, 'supabase_integration', lambda: banco), \
+             patch.object(api, 'JOB_WORKERS', 0), patch.object(api, 'WARMUP_ENABLED', False), \
+             patch.object(api.persistence_queue, 'flush_interval', 0.01), \
+             TestClient(app) as client:
+            ids = {
+                sessao: client.post('/simulate/cdi', json=parametros,
+                                    headers={'X-Session-Id': sessao}).json()['simulation_id']
+                for sessao in ('sessao-a', 'sessao-b')
+            }
+
+            limite = time.monotonic() + 5
+            while len(gravadas) < 2 and time.monotonic() < limite:
+                time.sleep(0.05)
+            status = {sessao: client.get(f'/simulations/{i}/status').json()['status'] for sessao, i in ids.items()}
+
+        self.assertNotEqual(ids['sessao-a'], ids['sessao-b'])
+        self.assertEqual({g['session_id']: g['simulation_id'] for g in gravadas}, ids)
+        self.assertEqual(status, {'sessao-a': 'saved', 'sessao-b': 'saved'})
+
+    def test_requisicao_condicional_tambem_grava(self):
+        """Testa que If-None-Match não evita a gravação e que a ETag com id é fraca."""
+        gravadas = []
+
+        def gravar(registros):
+            gravadas.extend(registros)
+            return [True] * len(registros)
+
+        banco = SimpleNamespace(save_simulation_results=gravar)
+        parametros = dict(PARAMETROS_BASE, taxa_cdi=11.47)
+        api.response_cache.clear()
+        with patch.object(api, 'supabase_integration', lambda: banco), \
+             patch.object(api, 'JOB_WORKERS', 0), patch.object(api, 'WARMUP_ENABLED', False), \
+             patch.object(api.persistence_queue, 'flush_interval', 0.01), \
+             TestClient(app) as client:
+            primeira = client.post('/simulate/cdi', json=parametros)
+            etag = primeira.headers['ETag']
+            condicional = client.post('/simulate/cdi', json=parametros, headers={'If-None-Match': etag})
+
+            limite = time.monotonic() + 5
+            while len(gravadas) < 2 and time.monotonic() < limite:
+                time.sleep(0.05)
+
+        self.assertTrue(etag.startswith('W/'))
+        self.assertEqual(condicional.status_code, 200)
+        self.assertEqual(condicional.headers['ETag'], etag)
+        self.assertNotEqual(condicional.json()['simulation_id'], primeira.json()['simulation_id'])
+        self.assertEqual(len(gravadas), 2)
+
+    def test_status_compartilhado(self):
+        """Testa que o status gravado por outro processo no mesmo banco é consultado."""
+        SQLiteStatusStore(api.persistence_queue.shared_statuses.path).set([('de-outro-worker', 'saved')])
+
+        status = TestClient(app).get('/simulations/de-outro-worker/status').json()
+
+        self.assertEqual((status['status'], status['saved_to_database']), ('saved', True))
+
+    def test_submissao_nao_toca_o_banco(self):
+        """Testa que submit só registra o status em memória; a cópia compartilhada fica para o gravador."""
+        registro_id = api.persistence_queue.submit({'strategy': 'CDI'})
+        try:
+            self.assertEqual(api.persistence_queue.status(registro_id), 'pending')
+            self.assertIsNone(api.persistence_queue.shared_statuses.get(registro_id))
+        finally:
+            api.persistence_queue._queue.clear()
+            api.persistence_queue._unpublished.clear()
+
+    def test_sessao_invalida(self):
+        """Testa erro 422 para um X-Session-Id com caracteres não permitidos."""
+        response = TestClient(app).post('/simulate/cdi', json=dict(PARAMETROS_BASE, taxa_cdi=10.5),
+                                        headers={'X-Session-Id': 'a b/c'})
+
+        self.assertEqual(response.status_code, 422)
+
+    def test_status_desconhecido(self):
+        """Testa 404 para ids que não passaram pela fila."""
+        self.assertEqual(TestClient(app).get('/simulations/inexistente/status').status_code, 404)
+
+
+class TestGraficosAPI(unittest.TestCase):
+    """Testes para o endpoint POST /charts."""
+
+    def setUp(self):
+        """Configura cliente de testes com um diretório de gráficos temporário."""
+        self.client = TestClient(app)
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.patcher = patch.object(api, 'CHARTS_DIR', api.Path(self.diretorio.name))
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.diretorio.cleanup()
+
+    def test_renderiza_e_reutiliza(self):
+        """Testa que o gráfico é renderizado uma vez e depois lido do disco."""
+        pedido = {'chart': 'comparacao_imoveis', 'simulacoes': [
+            {'strategy': 'planta', 'params': PARAMETROS_IMOVEL},
+            {'strategy': 'pronto', 'params': PARAMETROS_IMOVEL},
+        ]}
+
+        primeira = self.client.post('/charts', json=pedido)
+        segunda = self.client.post('/charts', json=pedido)
+
+        self.assertEqual(primeira.status_code, 200)
+        self.assertEqual(primeira.headers['content-type'], 'image/png')
+        self.assertTrue(primeira.content.startswith(b'\x89PNG'))
+        self.assertEqual((primeira.headers['x-cache'], segunda.headers['x-cache']), ('MISS', 'HIT'))
+        self.assertEqual(primeira.content, segunda.content)
+
+    def test_opcoes_de_renderizacao_no_hash(self):
+        """Testa que formato e resolução geram arquivos distintos."""
+        simulacoes = [
+            {'strategy': 'cdi', 'params': dict(PARAMETROS_BASE, taxa_cdi=10.5)},
+            {'strategy': 'ipca', 'params': dict(PARAMETROS_BASE, taxa_ipca=6.0)},
+        ]
+
+        svg = self.client.post('/charts', json={'chart': 'cenarios_investimento', 'simulacoes': simulacoes,
+                                                'format': 'svg'})
+        png = self.client.post('/charts', json={'chart': 'cenarios_investimento', 'simulacoes': simulacoes,
+                                                'dpi': 60})
+
+        self.assertEqual((svg.status_code, svg.headers['x-cache']), (200, 'MISS'))
+        self.assertEqual(svg.headers['content-type'], 'image/svg+xml')
+        self.assertIn(b'IPCA+', svg.content)
+        self.assertEqual((png.status_code, png.headers['x-cache']), (200, 'MISS'))
+        arquivos = [nome for _, _, nomes in os.walk(self.diretorio.name) for nome in nomes]
+        self.assertEqual(sorted(os.path.splitext(nome)[1] for nome in arquivos), ['.png', '.svg'])
+
+    def test_comparacao_exige_planta_e_pronto(self):
+        """Testa erro 422 quando a comparação de imóveis não recebe planta e pronto."""
+        response = self.client.post('/charts', json={'chart': 'comparacao_imoveis', 'simulacoes': [
+            {'strategy': 'cdi', 'params': dict(PARAMETROS_BASE, taxa_cdi=10.5)}
+        ]})
+
+        self.assertEqual(response.status_code, 422)
+
+
+class TestOtimizacaoAPI(unittest.TestCase):
+    """Testes para o endpoint /optimize."""
+
+    def setUp(self):
+        """Configura cliente de testes."""
+        self.client = TestClient(app)
+        self.payload = {
+            'estrategias': {'CDI': [100.0, 110.0, 120.0], 'IPCA': [100.0, 105.0, 130.0]},
+            'anos': 1
+        }
+
+    def test_otimiza_pesos(self):
+        """Testa otimização dos pesos a partir de históricos."""
+        response = self.client.post('/optimize', json=self.payload)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertAlmostEqual(sum(data['pesos_otimos']), 1.0, places=8)
+        self.assertAlmostEqual(data['retorno_final'], 130.0, places=4)
+        self.assertIsNone(data['aporte_inicial_otimo'])
+
+    def test_otimiza_aportes(self):
+        """Testa otimização de aportes com estratégias CDI/IPCA+."""
+        payload = {
+            'estrategias': {'CDI': {'tipo': 'cdi', 'taxa': 10.0}, 'IPCA': {'tipo': 'ipca', 'taxa': 6.0}},
+            'anos': 10,
+            'optimize_aportes': True,
+            'aporte_bounds': [[100.0, 5000.0]]
+        }
+
+        response = self.client.post('/optimize', json=payload)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['aporte_mensal_otimo'])
+
+    def test_parametros_invalidos(self):
+        """Testa erro 400 com históricos de tamanhos diferentes."""
+        self.payload['estrategias']['IPCA'] = [100.0]
+
+        response = self.client.post('/optimize', json=self.payload)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_timeout(self):
+        """Testa erro 504 quando o tempo limite expira."""
+        with patch.object(api, 'OPTIMIZATION_TIMEOUT', 0.0):
+            response = self.client.post('/optimize', json=self.payload)
+
+        self.assertEqual(response.status_code, 504)
+
+    def test_fila_cheia(self):
+        """Testa erro 503 com Retry-After quando o pool está saturado."""
+        with patch.object(api.optimization_executor, 'max_workers', 0), \
+             patch.object(api.optimization_executor, 'max_queue', 0):
+            response = self.client.post('/optimize', json=self.payload)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
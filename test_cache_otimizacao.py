@@ -0,0 +1,109 @@
+"""
+Testes unitários para o cache de resultados de otimização.
+
+Testa CacheOtimizacao (chave de conteúdo, LRU e camada em disco) e sua
+integração com OptimizedInvestment.otimizar_portfolio.
+"""
+
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+from core import OptimizedInvestment, CacheOtimizacao, cache_otimizacao
+
+
+class TestCacheOtimizacao(unittest.TestCase):
+    """Testes para CacheOtimizacao."""
+
+    def setUp(self):
+        """Configura cache e estratégias para testes."""
+        self.cache = CacheOtimizacao(max_itens=2)
+        self.estrategias = {'A': [100.0, 110.0, 120.0], 'B': [100.0, 105.0, 130.0]}
+        self.resultado = (np.array([0.0, 1.0]), None, None, 130.0)
+
+    def test_chave_depende_do_conteudo_e_opcoes(self):
+        """Testa que a chave muda com dados, nomes e opções."""
+        chave = self.cache.chave(self.estrategias, anos=1)
+
+        self.assertEqual(chave, self.cache.chave(dict(self.estrategias), anos=1))
+        self.assertNotEqual(chave, self.cache.chave(self.estrategias, anos=2))
+        self.assertNotEqual(chave, self.cache.chave({'A': [100.0, 110.0, 120.0], 'B': [100.0, 105.0, 131.0]}, anos=1))
+        self.assertNotEqual(chave, self.cache.chave({'X': [100.0, 110.0, 120.0], 'B': [100.0, 105.0, 130.0]}, anos=1))
+
+    def test_obter_retorna_copia(self):
+        """Testa que alterar o resultado retornado não corrompe o cache."""
+        self.cache.armazenar('k', self.resultado)
+
+        pesos, _, _, _ = self.cache.obter('k')
+        pesos[0] = 0.5
+
+        np.testing.assert_array_equal(self.cache.obter('k')[0], [0.0, 1.0])
+
+    def test_eviccao_lru(self):
+        """Testa que o item menos recentemente usado é removido."""
+        self.cache.armazenar('a', self.resultado)
+        self.cache.armazenar('b', self.resultado)
+        self.cache.obter('a')
+        self.cache.armazenar('c', self.resultado)
+
+        self.assertIsNotNone(self.cache.obter('a'))
+        self.assertIsNone(self.cache.obter('b'))
+        self.assertIsNotNone(self.cache.obter('c'))
+        self.assertEqual(self.cache.acertos, 3)
+        self.assertEqual(self.cache.falhas, 1)
+
+    def test_camada_em_disco_compartilhada(self):
+        """Testa que outro cache com o mesmo diretório encontra o resultado."""
+        with tempfile.TemporaryDirectory() as diretorio:
+            CacheOtimizacao(diretorio=diretorio).armazenar('k', (np.array([0.25, 0.75]), 10.0, None, 99.5))
+
+            pesos, aporte_inicial, aporte_mensal, retorno = CacheOtimizacao(diretorio=diretorio).obter('k')
+
+        np.testing.assert_array_equal(pesos, [0.25, 0.75])
+        self.assertEqual(aporte_inicial, 10.0)
+        self.assertIsNone(aporte_mensal)
+        self.assertEqual(retorno, 99.5)
+
+
+class TestOtimizarPortfolioComCache(unittest.TestCase):
+    """Testes para uso do cache em otimizar_portfolio."""
+
+    def setUp(self):
+        """Configura instância e limpa o cache global."""
+        self.investment = OptimizedInvestment(inflacao=6.0)
+        self.estrategias = {'A': [100.0, 110.0, 120.0], 'B': [100.0, 105.0, 130.0]}
+        cache_otimizacao.limpar()
+
+    def test_requisicao_repetida_nao_executa_otimizacao(self):
+        """Testa que a segunda chamada idêntica é atendida pelo cache."""
+        with patch.object(OptimizedInvestment, '_otimizar_apenas_pesos',
+                          wraps=self.investment._otimizar_apenas_pesos) as otimizar:
+            primeiro = self.investment.otimizar_portfolio(self.estrategias, anos=1)
+            segundo = OptimizedInvestment(inflacao=4.0).otimizar_portfolio(self.estrategias, anos=1)
+
+        self.assertEqual(otimizar.call_count, 1)
+        np.testing.assert_array_equal(primeiro[0], segundo[0])
+        self.assertEqual(primeiro[3], segundo[3])
+        self.assertEqual(cache_otimizacao.acertos, 1)
+
+    def test_anos_fora_da_chave(self):
+        """Testa que o mesmo problema com outro período de validação usa o cache."""
+        with patch.object(OptimizedInvestment, '_otimizar_apenas_pesos',
+                          wraps=self.investment._otimizar_apenas_pesos) as otimizar:
+            self.investment.otimizar_portfolio(self.estrategias, anos=1)
+            self.investment.otimizar_portfolio(self.estrategias, anos=2)
+
+        self.assertEqual(otimizar.call_count, 1)
+
+    def test_usar_cache_falso_ignora_cache(self):
+        """Testa que usar_cache=False sempre executa a otimização."""
+        with patch.object(OptimizedInvestment, '_otimizar_apenas_pesos',
+                          wraps=self.investment._otimizar_apenas_pesos) as otimizar:
+            self.investment.otimizar_portfolio(self.estrategias, anos=1, usar_cache=False)
+            self.investment.otimizar_portfolio(self.estrategias, anos=1, usar_cache=False)
+
+        self.assertEqual(otimizar.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
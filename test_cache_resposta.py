@@ -0,0 +1,123 @@
+"""
+Testes unitários para o cache de respostas da API.
+
+Testa ResponseCache (TTL, LRU, renderização única e camada em disco) e as
+funções de chave e ETag.
+"""
+
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+from backend.cache import ResponseCache, canonical_key, etag_for, etag_matches
+
+
+class TestChaveEtag(unittest.TestCase):
+    """Testes para canonical_key, etag_for e etag_matches."""
+
+    def test_chave_canonica(self):
+        """Testa que a chave ignora a ordem dos campos e depende dos valores."""
+        chave = canonical_key('cdi', {'anos': 10, 'taxa_cdi': 10.5})
+
+        self.assertEqual(chave, canonical_key('cdi', {'taxa_cdi': 10.5, 'anos': 10}))
+        self.assertNotEqual(chave, canonical_key('ipca', {'anos': 10, 'taxa_cdi': 10.5}))
+        self.assertNotEqual(chave, canonical_key('cdi', {'anos': 11, 'taxa_cdi': 10.5}))
+        self.assertNotEqual(chave, canonical_key('cdi', {'anos': 10, 'taxa_cdi': 10.5}, formato='x'))
+
+    def test_if_none_match(self):
+        """Testa correspondência com listas, curinga e ETags fracas."""
+        etag = etag_for('abc')
+
+        self.assertEqual(etag, '"abc"')
+        self.assertTrue(etag_matches('"abc"', etag))
+        self.assertTrue(etag_matches('"x", W/"abc"', etag))
+        self.assertTrue(etag_matches('*', etag))
+        self.assertFalse(etag_matches('"x"', etag))
+        self.assertFalse(etag_matches(None, etag))
+
+
+class TestResponseCache(unittest.TestCase):
+    """Testes para ResponseCache."""
+
+    def test_eviccao_lru(self):
+        """Testa que o item menos recentemente usado é removido."""
+        cache = ResponseCache(max_entries=2)
+        cache.put('a', {'v': 1})
+        cache.put('b', {'v': 2})
+        cache.get('a')
+        cache.put('c', {'v': 3})
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 1)
+
+    def test_expiracao(self):
+        """Testa que entradas expiram após o TTL."""
+        cache = ResponseCache(ttl=10.0)
+        with patch('backend.cache.time.monotonic', return_value=100.0):
+            cache.put('a', {'v': 1})
+        with patch('backend.cache.time.monotonic', return_value=105.0):
+            self.assertIsNotNone(cache.get('a'))
+        with patch('backend.cache.time.monotonic', return_value=110.0):
+            self.assertIsNone(cache.get('a'))
+
+    def test_corpo_renderizado_uma_vez(self):
+        """Testa que cada tipo de mídia é serializado uma única vez."""
+        entrada = ResponseCache().put('a', {'v': 1})
+        render = MagicMock(return_value=b'{"v":1}')
+
+        entrada.body('application/json', render)
+        corpo = entrada.body('application/json', render)
+
+        self.assertEqual(corpo, b'{"v":1}')
+        render.assert_called_once_with({'v': 1})
+
+
+class TestCacheEmDisco(unittest.TestCase):
+    """Testes para a camada em disco compartilhada entre processos."""
+
+    def setUp(self):
+        """Configura um diretório temporário."""
+        self.diretorio = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def test_compartilhado_entre_instancias(self):
+        """Testa que uma entrada gravada por um processo é lida por outro."""
+        escritor = ResponseCache(ttl=60, directory=self.diretorio.name)
+        leitor = ResponseCache(ttl=60, directory=self.diretorio.name)
+        escritor.put('chave', {'historico': np.array([1.0, 2.0]), 'patrimonio_final': 2.0})
+
+        entrada = leitor.get('chave')
+
+        np.testing.assert_array_equal(entrada.payload['historico'], [1.0, 2.0])
+        self.assertEqual(entrada.payload['patrimonio_final'], 2.0)
+        self.assertEqual(leitor.stats()['disk_hits'], 1)
+        self.assertIs(leitor.get('chave'), entrada)
+        self.assertEqual(leitor.stats()['disk_hits'], 1)
+
+    def test_expiracao_em_disco(self):
+        """Testa que arquivos expirados são ignorados e removidos."""
+        cache = ResponseCache(ttl=0.01, directory=self.diretorio.name)
+        cache.put('chave', {'patrimonio_final': 1.0})
+        time.sleep(0.02)
+
+        self.assertIsNone(ResponseCache(ttl=0.01, directory=self.diretorio.name).get('chave'))
+        cache.put('outra', {'patrimonio_final': 1.0})
+        time.sleep(0.02)
+        self.assertEqual(cache.prune(), 1)
+
+    def test_sem_diretorio(self):
+        """Testa que sem diretório o cache permanece apenas em memória."""
+        cache = ResponseCache()
+        cache.put('chave', {'patrimonio_final': 1.0})
+
+        self.assertIsNone(ResponseCache().get('chave'))
+        self.assertEqual(cache.prune(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
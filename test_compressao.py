@@ -0,0 +1,142 @@
+"""
+Testes unitários para a compressão negociada de respostas.
+
+Testa CompressionMiddleware e funções auxiliares de backend/compression.py
+com uma aplicação Starlette mínima.
+"""
+
+import unittest
+import zlib
+from unittest.mock import patch
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from backend import compression
+from backend.compression import (
+    CompressionMiddleware, GzipStream, choose_encoding, strip_etag_encoding, etag_with_encoding
+)
+
+CORPO_GRANDE = b'{"historico":[' + b','.join(str(100000.0 + i * 1.5).encode() for i in range(500)) + b']}'
+
+
+async def grande(request):
+    return Response(CORPO_GRANDE, media_type='application/json', headers={'ETag': '"abc"'})
+
+
+async def pequeno(request):
+    return Response(b'{"ok":true}', media_type='application/json')
+
+
+async def imagem(request):
+    return Response(CORPO_GRANDE, media_type='image/jpeg')
+
+
+async def fluxo(request):
+    async def linhas():
+        for i in range(50):
+            yield b'{"index":%d,"patrimonio_final":123456.789}\n' % i
+    return StreamingResponse(linhas(), media_type='application/x-ndjson')
+
+
+def criar_cliente(**opcoes):
+    """Aplicação mínima envolvida pelo middleware."""
+    app = Starlette(routes=[
+        Route('/grande', grande), Route('/pequeno', pequeno),
+        Route('/imagem', imagem), Route('/fluxo', fluxo)
+    ])
+    app.add_middleware(CompressionMiddleware, **opcoes)
+    return TestClient(app)
+
+
+class TestNegociacaoCodificacao(unittest.TestCase):
+    """Testes para choose_encoding e ETags por codificação."""
+
+    def test_escolha(self):
+        """Testa preferência do servidor e valores q."""
+        with patch.object(compression, 'brotli', None):
+            self.assertEqual(choose_encoding('gzip, br'), 'gzip')
+        with patch.object(compression, 'brotli', object()):
+            self.assertEqual(choose_encoding('gzip, br'), 'br')
+            self.assertEqual(choose_encoding('gzip, br;q=0.5'), 'gzip')
+            self.assertEqual(choose_encoding('*'), 'br')
+        self.assertIsNone(choose_encoding('identity'))
+        self.assertIsNone(choose_encoding('gzip;q=0'))
+        self.assertIsNone(choose_encoding(''))
+
+    def test_etag(self):
+        """Testa sufixo de codificação na ETag e sua remoção no If-None-Match."""
+        self.assertEqual(etag_with_encoding('"abc"', 'gzip'), '"abc-gzip"')
+
+        header, restaurados = strip_etag_encoding('"x", "abc-gzip"', 'gzip')
+
+        self.assertEqual(header, '"x", "abc"')
+        self.assertEqual(restaurados, {'"abc"': '"abc-gzip"'})
+
+    def test_fluxo_gzip_decodificavel_por_bloco(self):
+        """Testa que cada bloco comprimido pode ser decodificado imediatamente."""
+        fluxo = GzipStream(1)
+        descompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+        self.assertEqual(descompressor.decompress(fluxo.compress(b'primeiro\n')), b'primeiro\n')
+        self.assertEqual(descompressor.decompress(fluxo.compress(b'segundo\n')), b'segundo\n')
+        descompressor.decompress(fluxo.finish())
+        self.assertTrue(descompressor.eof)
+
+
+class TestCompressionMiddleware(unittest.TestCase):
+    """Testes para CompressionMiddleware."""
+
+    def setUp(self):
+        """Configura cliente com compressão apenas gzip."""
+        self.patch_brotli = patch.object(compression, 'brotli', None)
+        self.patch_brotli.start()
+        self.client = criar_cliente(minimum_size=1024)
+
+    def tearDown(self):
+        self.patch_brotli.stop()
+
+    def test_resposta_grande_comprimida(self):
+        """Testa compressão gzip com ETag própria e Vary."""
+        response = self.client.get('/grande', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.content, CORPO_GRANDE)
+        self.assertEqual(response.headers['ETag'], '"abc-gzip"')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertLess(int(response.headers['Content-Length']), len(CORPO_GRANDE))
+
+    def test_abaixo_do_limite_e_tipos_excluidos(self):
+        """Testa que respostas pequenas e imagens não são comprimidas."""
+        pequeno = self.client.get('/pequeno', headers={'Accept-Encoding': 'gzip'})
+        imagem = self.client.get('/imagem', headers={'Accept-Encoding': 'gzip'})
+        identidade = self.client.get('/grande', headers={'Accept-Encoding': 'identity'})
+
+        self.assertNotIn('Content-Encoding', pequeno.headers)
+        self.assertNotIn('Content-Encoding', imagem.headers)
+        self.assertNotIn('Content-Encoding', identidade.headers)
+        self.assertEqual(identidade.headers['ETag'], '"abc"')
+
+    def test_streaming(self):
+        """Testa compressão incremental de NDJSON sem Content-Length."""
+        response = self.client.get('/fluxo', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertEqual(len(response.text.splitlines()), 50)
+
+    @unittest.skipUnless(compression.brotli is not None, 'brotli não instalado')
+    def test_brotli(self):
+        """Testa que brotli é preferido quando instalado e aceito."""
+        self.patch_brotli.stop()
+        try:
+            response = criar_cliente().get('/grande', headers={'Accept-Encoding': 'gzip, br'})
+        finally:
+            self.patch_brotli.start()
+
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(response.headers['ETag'], '"abc-br"')
+
+
+if __name__ == '__main__':
+    unittest.main()
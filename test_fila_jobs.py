@@ -0,0 +1,184 @@
+"""
+Testes unitários para a fila durável de jobs em segundo plano.
+
+Testa JobStore, a codificação compacta de resultados, process_next e
+JobWorkers de backend/jobs.py.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+import numpy as np
+from backend import jobs, tasks
+from backend.formats import render_json
+
+
+PARAMETROS_CDI = {
+    'aporte_inicial': 100000.0, 'aporte_mensal': 2000.0, 'anos': 10, 'taxa_cdi': 10.5,
+    'inflacao_anual': 4.5, 'ir_renda_fixa': 15.0, 'ir_aluguel': 27.5
+}
+
+
+class TestCodificacaoResultado(unittest.TestCase):
+    """Testes para encode_result e decode_result."""
+
+    def test_ida_e_volta(self):
+        """Testa que arrays, listas e escalares voltam idênticos."""
+        resultado = {
+            'historico': np.linspace(1.0, 2.0, 120), 'patrimonio_final': 2.0, 'nome': 'cdi',
+            'pesos': np.eye(3), 'lista': [1.5, 2.5], 'inteiros': [1, 2], 'vazio': [], 'nada': None
+        }
+
+        decodificado = jobs.decode_result(jobs.encode_result(resultado))
+
+        np.testing.assert_array_equal(decodificado['historico'], resultado['historico'])
+        np.testing.assert_array_equal(decodificado['pesos'], resultado['pesos'])
+        np.testing.assert_array_equal(decodificado['lista'], [1.5, 2.5])
+        self.assertEqual(decodificado['inteiros'], [1, 2])
+        self.assertEqual(decodificado['vazio'], [])
+        self.assertEqual((decodificado['patrimonio_final'], decodificado['nome'], decodificado['nada']),
+                         (2.0, 'cdi', None))
+
+    def test_menor_que_json(self):
+        """Testa que o resultado codificado ocupa menos que o JSON equivalente."""
+        resultado = tasks.run_simulation('cdi', dict(PARAMETROS_CDI, anos=100))
+
+        self.assertLess(len(jobs.encode_result(resultado)), len(render_json(resultado)) / 2)
+
+
+class TestJobStore(unittest.TestCase):
+    """Testes para JobStore e process_next."""
+
+    def setUp(self):
+        """Configura um banco SQLite temporário."""
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.diretorio.name, 'jobs.db')
+        self.store = jobs.JobStore(self.caminho)
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def test_ciclo_de_vida(self):
+        """Testa que um job passa de queued para done com o resultado do simulador."""
+        job_id = self.store.submit('cdi', PARAMETROS_CDI)
+        self.assertEqual(self.store.get(job_id)['status'], 'queued')
+
+        self.assertTrue(jobs.process_next(self.store))
+        self.assertFalse(jobs.process_next(self.store))
+
+        status = self.store.get(job_id)
+        self.assertEqual((status['status'], status['progress'], status['attempts']), ('done', 1.0, 1))
+        np.testing.assert_array_equal(self.store.result(job_id)['historico'],
+                                      tasks.run_simulation('cdi', PARAMETROS_CDI)['historico'])
+
+    def test_persistencia_entre_instancias(self):
+        """Testa que jobs sobrevivem à recriação do store (reinício da API)."""
+        job_id = self.store.submit('ipca', dict(PARAMETROS_CDI, taxa_ipca=6.0))
+
+        reaberto = jobs.JobStore(self.caminho)
+
+        self.assertTrue(jobs.process_next(reaberto))
+        self.assertEqual(self.store.get(job_id)['status'], 'done')
+
+    def test_lote_com_progresso(self):
+        """Testa job em lote com resultados na ordem do pedido e progresso por bloco."""
+        itens = [{'strategy': 'cdi', 'params': dict(PARAMETROS_CDI, taxa_cdi=8.0 + i)} for i in range(5)]
+        job_id = self.store.submit('batch', {'simulacoes': itens})
+        progressos = []
+
+        with patch.object(jobs, 'JOB_BATCH_CHUNK_SIZE', 2):
+            jobs.execute('batch', {'simulacoes': itens}, progressos.append)
+            jobs.process_next(self.store)
+
+        self.assertEqual(progressos, [0.4, 0.8, 1.0])
+        resultados = self.store.result(job_id)['resultados']
+        self.assertEqual([r['index'] for r in resultados], list(range(5)))
+
+    def test_falha(self):
+        """Testa que exceções do simulador marcam o job como failed."""
+        job_id = self.store.submit('optimize', {
+            'estrategias': {'A': [1.0, 2.0], 'B': [1.0]}, 'anos': 1, 'optimize_aportes': False,
+            'aporte_bounds': None, 'inflacao_anual': 4.5
+        })
+
+        jobs.process_next(self.store)
+
+        status = self.store.get(job_id)
+        self.assertEqual(status['status'], 'failed')
+        self.assertTrue(status['error'])
+        self.assertIsNone(self.store.result(job_id))
+
+    def test_lease_expirado_e_retomado(self):
+        """Testa que um job cujo worker sumiu é retomado e falha após max_attempts."""
+        store = jobs.JobStore(self.caminho, lease=0.0, max_attempts=2)
+        job_id = store.submit('cdi', PARAMETROS_CDI)
+
+        self.assertEqual(store.claim()[0], job_id)
+        time.sleep(0.01)
+        self.assertEqual(store.claim()[0], job_id)
+        time.sleep(0.01)
+        self.assertIsNone(store.claim())
+
+        status = store.get(job_id)
+        self.assertEqual((status['status'], status['attempts']), ('failed', 2))
+
+    def test_worker_com_lease_vencido_nao_sobrescreve(self):
+        """Testa que só a posse mais recente de um job retomado grava resultado ou falha."""
+        store = jobs.JobStore(self.caminho, lease=0.0)
+        job_id = store.submit('cdi', PARAMETROS_CDI)
+        *_, primeira = store.claim()
+        time.sleep(0.01)
+        *_, segunda = store.claim()
+
+        self.assertFalse(store.complete(job_id, primeira, {'origem': 'antiga'}))
+        self.assertFalse(store.fail(job_id, primeira, 'worker antigo'))
+        self.assertTrue(store.complete(job_id, segunda, {'origem': 'nova'}))
+        self.assertFalse(store.fail(job_id, segunda, 'depois de concluído'))
+
+        self.assertEqual(store.get(job_id)['status'], 'done')
+        self.assertEqual(store.result(job_id), {'origem': 'nova'})
+
+    def test_expiracao(self):
+        """Testa que resultados expirados não são devolvidos e são removidos."""
+        store = jobs.JobStore(self.caminho, result_ttl=0.0)
+        job_id = store.submit('cdi', PARAMETROS_CDI)
+        jobs.process_next(store)
+        time.sleep(0.01)
+
+        self.assertEqual(store.get(job_id)['status'], 'expired')
+        self.assertIsNone(store.result(job_id))
+        self.assertEqual(store.purge_expired(), 1)
+        self.assertIsNone(store.get(job_id))
+
+    def test_tipo_desconhecido(self):
+        """Testa erro ao enfileirar um tipo de job inexistente."""
+        with self.assertRaises(ValueError):
+            self.store.submit('cripto', {})
+
+
+class TestJobWorkers(unittest.TestCase):
+    """Testes para os processos de worker."""
+
+    def test_processos_executam_jobs(self):
+        """Testa que um processo worker drena a fila e para quando solicitado."""
+        with tempfile.TemporaryDirectory() as diretorio:
+            store = jobs.JobStore(os.path.join(diretorio, 'jobs.db'))
+            job_id = store.submit('cdi', PARAMETROS_CDI)
+            workers = jobs.JobWorkers(store, processes=1, poll_interval=0.05)
+
+            workers.start()
+            try:
+                limite = time.monotonic() + 30
+                while store.get(job_id)['status'] != 'done' and time.monotonic() < limite:
+                    time.sleep(0.05)
+            finally:
+                workers.stop()
+
+            self.assertEqual(store.get(job_id)['status'], 'done')
+            self.assertEqual(workers.alive, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Testes unitários para os formatos de resposta da API.
+
+Testa a negociação de conteúdo e os codificadores JSON, Arrow, msgpack e
+float32 de backend/formats.py.
+"""
+
+import io
+import json
+import unittest
+from unittest.mock import patch
+import numpy as np
+from backend import formats
+from backend.formats import (
+    JSON, NDJSON, ARROW, MSGPACK, FLOAT32, SIMULATION_MEDIA_TYPES, BATCH_MEDIA_TYPES,
+    BatchEncoder, negotiate, render_json, render_simulation, render_frontier, simulation_headers
+)
+
+
+class TestNegociacao(unittest.TestCase):
+    """Testes para negotiate."""
+
+    def test_padrao_json(self):
+        """Testa que sem Accept ou com curinga a resposta é JSON."""
+        self.assertEqual(negotiate(None, SIMULATION_MEDIA_TYPES), JSON)
+        self.assertEqual(negotiate('*/*', SIMULATION_MEDIA_TYPES), JSON)
+        self.assertEqual(negotiate('application/*', SIMULATION_MEDIA_TYPES), JSON)
+
+    def test_preferencias_q(self):
+        """Testa escolha pelo valor q e pelo tipo mais específico."""
+        self.assertEqual(negotiate(f'{FLOAT32}', SIMULATION_MEDIA_TYPES), FLOAT32)
+        self.assertEqual(negotiate(f'{JSON};q=0.5, {FLOAT32}', SIMULATION_MEDIA_TYPES), FLOAT32)
+        self.assertEqual(negotiate(f'*/*;q=0.1, {FLOAT32};q=0', SIMULATION_MEDIA_TYPES), JSON)
+        self.assertIsNone(negotiate('text/html', SIMULATION_MEDIA_TYPES))
+
+    def test_formato_indisponivel(self):
+        """Testa que formatos sem dependência instalada não são oferecidos."""
+        with patch.object(formats, 'msgpack', None):
+            self.assertIsNone(negotiate(MSGPACK, SIMULATION_MEDIA_TYPES))
+            self.assertEqual(negotiate(f'{MSGPACK}, {JSON};q=0.5', SIMULATION_MEDIA_TYPES), JSON)
+
+
+class TestCodificadores(unittest.TestCase):
+    """Testes para os codificadores de simulação, fronteira e lote."""
+
+    def setUp(self):
+        """Configura payloads de exemplo."""
+        self.payload = {
+            'historico': [100.0, 101.5, 103.25], 'meses': None, 'patrimonio_final': 103.25,
+            'rentabilidade_total': 3.25, 'rentabilidade_anual': 3.25,
+            'saved_to_database': False, 'simulation_id': None
+        }
+        self.fronteira = {
+            'estrategias': ['A', 'B'], 'aversoes': [10.0, 1.0], 'pesos': [[1.0, 0.0], [0.4, 0.6]],
+            'valores_esperados': [1.1, 1.3], 'riscos': [0.0, 0.2]
+        }
+
+    def test_json_numpy_com_e_sem_orjson(self):
+        """Testa que arrays NumPy geram o mesmo JSON com orjson e com a biblioteca padrão."""
+        payload = dict(self.payload, historico=np.array(self.payload['historico']), patrimonio_final=np.float64(103.25))
+
+        rapido = render_json(payload)
+        with patch.object(formats, 'orjson', None):
+            padrao = render_json(payload)
+
+        self.assertEqual(json.loads(rapido), json.loads(padrao))
+        self.assertEqual(json.loads(padrao)['historico'], self.payload['historico'])
+
+    def test_float32(self):
+        """Testa histórico como float32 little-endian e resumo no cabeçalho."""
+        corpo = render_simulation(self.payload, FLOAT32)
+        resumo = json.loads(simulation_headers(self.payload, FLOAT32)['X-Summary'])
+
+        np.testing.assert_array_equal(np.frombuffer(corpo, dtype='<f4'), np.float32(self.payload['historico']))
+        self.assertEqual(resumo['patrimonio_final'], 103.25)
+        self.assertNotIn('historico', resumo)
+        self.assertEqual(simulation_headers(self.payload, JSON), {})
+
+    @unittest.skipUnless(formats.pa is not None, 'pyarrow não instalado')
+    def test_arrow(self):
+        """Testa colunas e metadados do stream Arrow."""
+        pa = formats.pa
+        tabela = pa.ipc.open_stream(render_simulation(self.payload, ARROW)).read_all()
+        fronteira = pa.ipc.open_stream(render_frontier(self.fronteira, ARROW)).read_all()
+
+        self.assertEqual(tabela.column('patrimonio').to_pylist(), self.payload['historico'])
+        self.assertEqual(tabela.column('mes').to_pylist(), [1, 2, 3])
+        self.assertEqual(json.loads(tabela.schema.metadata[b'summary'])['patrimonio_final'], 103.25)
+        self.assertEqual(fronteira.column('peso:B').to_pylist(), [0.0, 0.6])
+
+    @unittest.skipUnless(formats.msgpack is not None, 'msgpack não instalado')
+    def test_msgpack(self):
+        """Testa ida e volta do payload em msgpack."""
+        self.assertEqual(formats.msgpack.unpackb(render_simulation(self.payload, MSGPACK)), self.payload)
+
+    def test_lote_ndjson(self):
+        """Testa codificação NDJSON incremental."""
+        encoder = BatchEncoder(NDJSON)
+        corpo = encoder.encode([{'index': 0, 'patrimonio_final': 1.0}, {'index': 1, 'error': 'x'}]) + encoder.close()
+
+        self.assertEqual([json.loads(linha)['index'] for linha in corpo.splitlines()], [0, 1])
+
+    @unittest.skipUnless(formats.pa is not None, 'pyarrow não instalado')
+    def test_lote_arrow(self):
+        """Testa um stream Arrow com um record batch por bloco."""
+        encoder = BatchEncoder(ARROW)
+        corpo = encoder.encode([{'index': 0, 'strategy': 'cdi', 'historico': [1.0, 2.0], 'patrimonio_final': 2.0}])
+        corpo += encoder.encode([{'index': 1, 'strategy': 'cdi', 'error': 'falhou'}])
+        corpo += encoder.close()
+
+        leitor = formats.pa.ipc.open_stream(io.BytesIO(corpo))
+        lotes = list(leitor)
+        self.assertEqual(len(lotes), 2)
+        self.assertEqual(lotes[0].column('historico').to_pylist(), [[1.0, 2.0]])
+        self.assertEqual(lotes[1].column('error').to_pylist(), ['falhou'])
+
+
+if __name__ == '__main__':
+    unittest.main()
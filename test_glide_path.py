@@ -0,0 +1,94 @@
+"""
+Testes unitários para otimização de glide path (alocação variável por ano).
+
+Testa OptimizedInvestment.otimizar_glide_path e o gradiente analítico da
+sua função objetivo.
+"""
+
+import unittest
+from unittest.mock import patch
+import numpy as np
+from scipy.optimize import check_grad
+from core import OptimizedInvestment
+
+
+class TestGlidePath(unittest.TestCase):
+    """Testes para otimização de glide path."""
+
+    def setUp(self):
+        """Configura instância e estratégias com desempenho que muda no tempo."""
+        self.investment = OptimizedInvestment(inflacao=6.0)
+        meses = 120
+        # 'Imovel' rende mais nos primeiros 5 anos, 'RendaFixa' nos últimos 5
+        taxa_imovel = np.where(np.arange(meses) < 60, 0.015, 0.002)
+        taxa_renda_fixa = np.full(meses, 0.008)
+        self.estrategias = {
+            'Imovel': (100000 * np.cumprod(1 + taxa_imovel)).tolist(),
+            'RendaFixa': (100000 * np.cumprod(1 + taxa_renda_fixa)).tolist()
+        }
+
+    def test_alocacao_muda_ao_longo_do_tempo(self):
+        """Testa que o glide path migra de imóveis para renda fixa."""
+        pesos, historico, retorno_final = self.investment.otimizar_glide_path(
+            self.estrategias, anos=10, suavidade=0.01
+        )
+
+        self.assertEqual(pesos.shape, (10, 2))
+        np.testing.assert_allclose(pesos.sum(axis=1), 1.0, atol=1e-10)
+        self.assertGreater(pesos[0, 0], 0.9)
+        self.assertGreater(pesos[-1, 1], 0.9)
+        self.assertEqual(len(historico), 120)
+        self.assertEqual(retorno_final, historico[-1])
+
+    def test_supera_melhor_alocacao_estatica(self):
+        """Testa que o glide path rende mais que qualquer estratégia isolada."""
+        _, _, retorno_final = self.investment.otimizar_glide_path(self.estrategias, anos=10, suavidade=0.01)
+
+        melhor_estatico = max(historico[-1] for historico in self.estrategias.values())
+        self.assertGreater(retorno_final, melhor_estatico)
+
+    def test_respeita_turnover_maximo(self):
+        """Testa que a realocação entre anos consecutivos respeita o limite."""
+        pesos, _, _ = self.investment.otimizar_glide_path(
+            self.estrategias, anos=10, suavidade=0.0, turnover_maximo=0.2
+        )
+
+        turnover = 0.5 * np.abs(np.diff(pesos, axis=0)).sum(axis=1)
+        self.assertTrue(np.all(turnover <= 0.2 + 1e-3))
+
+    def test_turnover_inatingivel(self):
+        """Testa erro quando a penalidade não consegue impor o turnover máximo."""
+        with patch.object(OptimizedInvestment, 'PENALIDADES_TURNOVER', (1e-6,)):
+            with self.assertRaisesRegex(RuntimeError, 'Turnover máximo'):
+                self.investment.otimizar_glide_path(self.estrategias, anos=10, suavidade=0.0, turnover_maximo=0.0)
+
+    def test_gradiente_analitico(self):
+        """Testa o gradiente analítico contra diferenças finitas."""
+        historicos = np.array(list(self.estrategias.values())).T
+        crescimentos = historicos[1:] / historicos[:-1]
+        ano_periodo = np.arange(len(crescimentos)) // 12
+        inicio_anos = np.arange(ano_periodo[-1] + 1) * 12
+        args = (crescimentos, historicos[0], ano_periodo, inicio_anos, 0.5, 0.1, 100.0)
+        parametros = np.random.default_rng(3).uniform(0.1, 1.0, len(inicio_anos) * 2)
+
+        erro = check_grad(
+            lambda x: self.investment._objetivo_glide_path(x, *args)[0],
+            lambda x: self.investment._objetivo_glide_path(x, *args)[1],
+            parametros
+        )
+        norma = np.linalg.norm(self.investment._objetivo_glide_path(parametros, *args)[1])
+
+        self.assertLess(erro / norma, 1e-5)
+
+    def test_parametros_invalidos(self):
+        """Testa validação dos parâmetros."""
+        with self.assertRaises(ValueError):
+            self.investment.otimizar_glide_path({'A': [100.0, -5.0, 110.0]}, anos=1)
+        with self.assertRaises(ValueError):
+            self.investment.otimizar_glide_path(self.estrategias, anos=10, turnover_maximo=1.5)
+        with self.assertRaises(ValueError):
+            self.investment.otimizar_glide_path(self.estrategias, anos=10, suavidade=-1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
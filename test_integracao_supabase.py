@@ -0,0 +1,306 @@
+"""
+Testes unitários para a integração com o Supabase.
+
+Testa SupabaseIntegration, UserIdCache, a codificação compacta de
+resultados e as funções de conveniência de supabase-integration.py contra
+um cliente Supabase falso, em memória.
+"""
+
+import importlib.util
+import json
+import os
+import unittest
+import numpy as np
+from backend import tasks
+
+
+def carregar_modulo():
+    """Importa supabase-integration.py (o hífen impede o import comum)."""
+    caminho = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'supabase-integration.py')
+    spec = importlib.util.spec_from_file_location('supabase_integration_teste', caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+integracao = carregar_modulo()
+
+
+class Resposta:
+    def __init__(self, data):
+        self.data = data
+
+
+class TabelaFalsa:
+    """Subconjunto da API de consulta do supabase-py usado pela integração."""
+
+    def __init__(self, banco, nome):
+        self.banco = banco
+        self.nome = nome
+        self.filtros = []
+        self.linhas = None
+
+    def insert(self, linhas):
+        self.linhas = linhas if isinstance(linhas, list) else [linhas]
+        return self
+
+    def select(self, *_args, **_kwargs):
+        return self
+
+    def eq(self, coluna, valor):
+        self.filtros.append((coluna, valor))
+        return self
+
+    def order(self, *_args, **_kwargs):
+        return self
+
+    def limit(self, *_args):
+        return self
+
+    def execute(self):
+        if self.banco.fora_do_ar:
+            raise ConnectionError('banco fora do ar')
+        self.banco.requisicoes.append((self.nome, 'insert' if self.linhas is not None else 'select'))
+        tabela = self.banco.tabelas.setdefault(self.nome, [])
+        if self.linhas is None:
+            return Resposta([dict(l) for l in tabela if all(l.get(c) == v for c, v in self.filtros)])
+        if any(self.banco.rejeitar(linha) for linha in self.linhas):
+            raise ValueError('violação de restrição')
+        novas = [dict(linha, id=linha.get('id') or f'{self.nome}-{len(tabela) + i}')
+                 for i, linha in enumerate(self.linhas)]
+        tabela.extend(novas)
+        return Resposta(novas)
+
+
+class SupabaseFalso:
+    def __init__(self, rejeitar=lambda linha: False):
+        self.tabelas = {}
+        self.requisicoes = []
+        self.rejeitar = rejeitar
+        self.fora_do_ar = False
+
+    def table(self, nome):
+        return TabelaFalsa(self, nome)
+
+
+class TestInsercaoEmLote(unittest.TestCase):
+    """Testes para save_simulations_bulk, save_portfolios_bulk e save_simulation_results."""
+
+    def setUp(self):
+        """Conecta a instância global a um banco falso."""
+        self.banco = SupabaseFalso()
+        self.anterior = integracao.supabase_client.supabase
+        integracao.supabase_client.supabase = self.banco
+        integracao.supabase_client.user_ids.clear()
+
+    def tearDown(self):
+        integracao.supabase_client.supabase = self.anterior
+
+    def simulacoes(self, quantidade):
+        return [{'user_id': 'u1', 'strategy': 'CDI', 'parameters': {'anos': i},
+                 'result': {'patrimonio_final': float(i)}} for i in range(quantidade)]
+
+    def test_uma_requisicao_por_bloco(self):
+        """Testa que as linhas são enviadas em blocos de chunk_size."""
+        resultado = integracao.supabase_client.save_simulations_bulk(self.simulacoes(5), chunk_size=2)
+
+        self.assertEqual(len(resultado['inserted']), 5)
+        self.assertEqual(resultado['failed'], [])
+        self.assertEqual(self.banco.requisicoes, [('simulations', 'insert')] * 3)
+
+    def test_falha_parcial(self):
+        """Testa que um bloco rejeitado é reportado sem interromper os demais."""
+        self.banco.rejeitar = lambda linha: linha['parameters'] == '{"anos": 2}'
+
+        resultado = integracao.supabase_client.save_simulations_bulk(self.simulacoes(5), chunk_size=2)
+
+        self.assertEqual(len(resultado['inserted']), 3)
+        self.assertEqual([f['index'] for f in resultado['failed']], [2, 3])
+        self.assertIn('violação', resultado['failed'][0]['error'])
+
+    def test_portfolios(self):
+        """Testa a inserção em lote de portfólios."""
+        portfolios = [{'user_id': 'u1', 'name': f'P{i}', 'strategies': {'CDI': []},
+                       'optimal_weights': {'CDI': 1.0}, 'final_return': 1.5} for i in range(3)]
+
+        resultado = integracao.supabase_client.save_portfolios_bulk(portfolios)
+
+        self.assertEqual([p['name'] for p in resultado['inserted']], ['P0', 'P1', 'P2'])
+        self.assertEqual(self.banco.requisicoes, [('portfolios', 'insert')])
+
+    def test_desconectado(self):
+        """Testa que sem conexão todas as linhas são reportadas como falhas."""
+        integracao.supabase_client.supabase = None
+
+        resultado = integracao.supabase_client.save_simulations_bulk(self.simulacoes(2))
+
+        self.assertEqual([f['index'] for f in resultado['failed']], [0, 1])
+
+    def test_resultados_com_usuarios(self):
+        """Testa a função de conveniência: usuários por email ou anônimos por registro, ids preservados."""
+        registros = [
+            {'strategy': 'CDI', 'parameters': {}, 'result': {}, 'simulation_id': 's1'},
+            {'strategy': 'CDI', 'parameters': {}, 'result': {}, 'simulation_id': 's2'},
+            {'strategy': 'CDI', 'parameters': {}, 'result': {}, 'user_email': 'a@b.com'},
+        ]
+
+        salvos = integracao.save_simulation_results(registros)
+
+        self.assertEqual(salvos, [True, True, True])
+        self.assertEqual(len(self.banco.tabelas['users']), 3)
+        self.assertEqual([s['id'] for s in self.banco.tabelas['simulations']][:2], ['s1', 's2'])
+        self.assertEqual(self.banco.requisicoes.count(('simulations', 'insert')), 1)
+
+
+class TestCacheUsuarios(unittest.TestCase):
+    """Testes para UserIdCache e a resolução de usuários com cache."""
+
+    def setUp(self):
+        """Conecta a instância global a um banco falso com cache vazio."""
+        self.banco = SupabaseFalso()
+        self.anterior = integracao.supabase_client.supabase
+        integracao.supabase_client.supabase = self.banco
+        integracao.supabase_client.user_ids.clear()
+
+    def tearDown(self):
+        integracao.supabase_client.supabase = self.anterior
+
+    def consultas_de_usuario(self):
+        return self.banco.requisicoes.count(('users', 'select'))
+
+    def salvar(self, **kwargs):
+        return integracao.save_simulation_result('CDI', {}, {}, **kwargs)
+
+    def test_email_consultado_uma_vez(self):
+        """Testa que salvamentos repetidos do mesmo email não consultam users de novo."""
+        for _ in range(3):
+            self.assertTrue(self.salvar(user_email='a@b.com'))
+
+        self.assertEqual(self.consultas_de_usuario(), 1)
+        self.assertEqual(self.banco.requisicoes.count(('users', 'insert')), 1)
+        self.assertEqual(self.banco.requisicoes.count(('simulations', 'insert')), 3)
+
+    def test_ausencia_em_cache(self):
+        """Testa cache negativo no histórico e sua substituição quando o usuário é criado."""
+        self.assertEqual(integracao.get_simulation_history('novo@b.com'), [])
+        self.assertEqual(integracao.get_simulation_history('novo@b.com'), [])
+        self.assertEqual(self.consultas_de_usuario(), 1)
+
+        self.assertTrue(self.salvar(user_email='novo@b.com'))
+
+        self.assertEqual(len(integracao.get_simulation_history('novo@b.com')), 1)
+        self.assertEqual(self.consultas_de_usuario(), 1)
+
+    def test_usuario_anonimo_por_sessao(self):
+        """Testa que simulações anônimas de uma sessão reutilizam o mesmo usuário."""
+        for sessao in ('s1', 's1', 's2', 's1'):
+            self.assertTrue(self.salvar(session_id=sessao))
+
+        emails = sorted(usuario['email'] for usuario in self.banco.tabelas['users'])
+        self.assertEqual(emails, ['anonymous_s1', 'anonymous_s2'])
+        usuarios = {s['user_id'] for s in self.banco.tabelas['simulations']}
+        self.assertEqual(len(usuarios), 2)
+
+    def test_anonimo_sem_sessao_nao_compartilha_usuario(self):
+        """Testa que simulações anônimas sem sessão não caem no mesmo usuário."""
+        for _ in range(3):
+            self.assertTrue(self.salvar())
+
+        usuarios = [s['user_id'] for s in self.banco.tabelas['simulations']]
+        self.assertEqual(len(set(usuarios)), 3)
+
+    def test_falha_nao_fica_em_cache(self):
+        """Testa que um erro de conexão não é guardado como ausência."""
+        self.banco.fora_do_ar = True
+        self.assertFalse(self.salvar(user_email='a@b.com'))
+
+        self.banco.fora_do_ar = False
+        self.assertTrue(self.salvar(user_email='a@b.com'))
+
+    def test_expiracao_e_lru(self):
+        """Testa TTL, TTL negativo e remoção do email menos recente."""
+        cache = integracao.UserIdCache(max_entries=2, ttl=60.0, negative_ttl=0.0)
+        cache.put('a', 'id-a')
+        cache.put('b', 'id-b')
+        self.assertEqual(cache.get('a'), (True, 'id-a'))
+
+        cache.put('ausente', None)
+
+        self.assertEqual(cache.get('ausente'), (False, None))
+        self.assertEqual(cache.get('b'), (False, None))
+        self.assertEqual(cache.get('a'), (True, 'id-a'))
+
+
+class TestCodificacaoResultado(unittest.TestCase):
+    """Testes para encode_simulation_result e decode_simulation_result."""
+
+    def setUp(self):
+        """Gera um resultado real de 30 anos de CDI."""
+        self.resultado = tasks.run_simulation('cdi', {
+            'aporte_inicial': 100000.0, 'aporte_mensal': 3000.0, 'anos': 30, 'taxa_cdi': 10.5,
+            'inflacao_anual': 4.5, 'ir_renda_fixa': 15.0, 'ir_aluguel': 27.5
+        })
+
+    def test_delta_exato_ate_o_centavo(self):
+        """Testa ida e volta da codificação delta com erro máximo de meio centavo."""
+        decodificado = integracao.decode_simulation_result(
+            integracao.encode_simulation_result(self.resultado, 'delta'))
+
+        np.testing.assert_allclose(decodificado['historico'], self.resultado['historico'], rtol=0, atol=0.005)
+        self.assertEqual(decodificado['patrimonio_final'], self.resultado['patrimonio_final'])
+
+    def test_float32_e_inteiros(self):
+        """Testa float32 e séries inteiras, que voltam inteiras."""
+        resultado = dict(self.resultado, meses=list(range(1, 361, 3)))
+
+        decodificado = integracao.decode_simulation_result(
+            integracao.encode_simulation_result(resultado, 'float32'))
+        delta = integracao.decode_simulation_result(integracao.encode_simulation_result(resultado, 'delta'))
+
+        np.testing.assert_allclose(decodificado['historico'], resultado['historico'], rtol=1e-7)
+        self.assertEqual(delta['meses'], resultado['meses'])
+
+    def test_resumo_em_json_e_tamanho(self):
+        """Testa que o resumo fica em JSON puro e o histórico ocupa uma fração do JSON."""
+        codificado = integracao.encode_simulation_result(self.resultado, 'delta')
+
+        self.assertEqual(codificado['rentabilidade_anual'], self.resultado['rentabilidade_anual'])
+        self.assertNotIn('historico', codificado)
+        self.assertLess(len(json.dumps(codificado)), len(json.dumps(self.resultado)) / 8)
+
+    def test_formato_antigo(self):
+        """Testa que resultados gravados como texto JSON continuam legíveis."""
+        self.assertEqual(integracao.decode_simulation_result(json.dumps(self.resultado)), self.resultado)
+        self.assertEqual(integracao.encode_simulation_result(self.resultado, 'json'), json.dumps(self.resultado))
+
+    def test_json_com_arrays_numpy(self):
+        """Testa a codificação json de um resultado do lote, com histórico em ndarray."""
+        resultado = tasks.run_simulation_batch('cdi', [{
+            'aporte_inicial': 100000.0, 'aporte_mensal': 3000.0, 'anos': 5, 'taxa_cdi': 10.5,
+            'inflacao_anual': 4.5, 'ir_renda_fixa': 15.0, 'ir_aluguel': 27.5
+        }])[0]
+        self.assertIsInstance(resultado['historico'], np.ndarray)
+
+        decodificado = integracao.decode_simulation_result(integracao.encode_simulation_result(resultado, 'json'))
+
+        self.assertEqual(decodificado['historico'], resultado['historico'].tolist())
+        self.assertEqual(decodificado['patrimonio_final'], resultado['patrimonio_final'])
+
+    def test_decodificacao_na_leitura(self):
+        """Testa que get_user_simulations devolve o resultado decodificado."""
+        banco = SupabaseFalso()
+        anterior = integracao.supabase_client.supabase
+        integracao.supabase_client.supabase = banco
+        try:
+            integracao.supabase_client.save_simulation('u1', 'CDI', {}, self.resultado)
+            integracao.supabase_client.save_simulation('u1', 'CDI', {}, self.resultado, encoding='json')
+            linhas = integracao.supabase_client.get_user_simulations('u1')
+        finally:
+            integracao.supabase_client.supabase = anterior
+
+        self.assertIn('arrays', banco.tabelas['simulations'][0]['result'])
+        self.assertEqual([len(linha['result']['historico']) for linha in linhas], [360, 360])
+
+
+if __name__ == '__main__':
+    unittest.main()
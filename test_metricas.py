@@ -0,0 +1,85 @@
+"""
+Testes unitários para as métricas em processo da API.
+
+Testa Registry, Counter, Gauge, Histogram e o formato de texto do Prometheus
+de backend/metrics.py.
+"""
+
+import unittest
+from backend.metrics import CallbackCounter, Registry
+
+
+class TestMetricas(unittest.TestCase):
+    """Testes para o registro de métricas."""
+
+    def setUp(self):
+        """Configura um registro vazio."""
+        self.registro = Registry()
+
+    def test_contador_por_rotulos(self):
+        """Testa que cada combinação de rótulos tem sua própria série."""
+        contador = self.registro.counter('req_total', 'Requisições', ('rota',))
+        contador.inc(rota='/a')
+        contador.inc(2, rota='/a')
+        contador.inc(rota='/b')
+
+        self.assertEqual(contador.value(rota='/a'), 3)
+        texto = self.registro.render()
+        self.assertIn('# TYPE req_total counter', texto)
+        self.assertIn('req_total{rota="/a"} 3', texto)
+        self.assertIn('req_total{rota="/b"} 1', texto)
+
+    def test_histograma_cumulativo(self):
+        """Testa buckets cumulativos, soma e contagem do histograma."""
+        histograma = self.registro.histogram('lat', 'Latência', ('rota',), buckets=(0.1, 1.0))
+        for valor in (0.05, 0.1, 0.5, 2.0):
+            histograma.observe(valor, rota='/a')
+
+        texto = self.registro.render()
+        self.assertIn('lat_bucket{rota="/a",le="0.1"} 2', texto)
+        self.assertIn('lat_bucket{rota="/a",le="1"} 3', texto)
+        self.assertIn('lat_bucket{rota="/a",le="+Inf"} 4', texto)
+        self.assertIn('lat_sum{rota="/a"} 2.65', texto)
+        self.assertIn('lat_count{rota="/a"} 4', texto)
+        self.assertEqual(histograma.count(rota='/a'), 4)
+
+    def test_histograma_cronometra_bloco(self):
+        """Testa que time() registra uma observação mesmo com exceção."""
+        histograma = self.registro.histogram('etapa', 'Etapas', ('etapa',))
+
+        with self.assertRaises(ValueError):
+            with histograma.time(etapa='kernel'):
+                raise ValueError()
+
+        self.assertEqual(histograma.count(etapa='kernel'), 1)
+
+    def test_valores_lidos_na_coleta(self):
+        """Testa gauges e contadores calculados no momento da coleta."""
+        estado = {'fila': 3, 'acertos': 7}
+        self.registro.gauge('fila', 'Profundidade', callback=lambda: [({}, estado['fila'])])
+        self.registro.register(CallbackCounter(
+            'acertos_total', 'Acertos', callback=lambda: [({}, estado['acertos'])]))
+
+        estado['fila'] = 5
+        texto = self.registro.render()
+
+        self.assertIn('fila 5', texto)
+        self.assertIn('# TYPE acertos_total counter', texto)
+        self.assertIn('acertos_total 7', texto)
+
+    def test_escape_de_rotulos(self):
+        """Testa o escape de aspas e barras nos valores dos rótulos."""
+        self.registro.gauge('g', 'Gauge', ('nome',)).set(1, nome='a"b\\c')
+
+        self.assertIn('g{nome="a\\"b\\\\c"} 1', self.registro.render())
+
+    def test_nome_duplicado(self):
+        """Testa erro ao registrar duas métricas com o mesmo nome."""
+        self.registro.counter('x', 'X')
+
+        with self.assertRaises(ValueError):
+            self.registro.gauge('x', 'X')
+
+
+if __name__ == '__main__':
+    unittest.main()
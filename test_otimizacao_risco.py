@@ -0,0 +1,173 @@
+"""
+Testes unitários para otimização de portfólio sensível a risco.
+
+Testa os objetivos de média-variância e CVaR de
+OptimizedInvestment.otimizar_portfolio_risco sobre matrizes de cenários.
+"""
+
+import unittest
+import numpy as np
+from scipy.optimize import linprog
+from scipy import sparse
+from core import OptimizedInvestment
+
+
+def cvar_lp_completo(cenarios: np.ndarray, aversao_risco: float, nivel_confianca: float) -> float:
+    """Resolve o LP de Rockafellar–Uryasev completo e retorna o valor ótimo."""
+    num_cenarios, num_estrategias = cenarios.shape
+    coef_cauda = aversao_risco / ((1 - nivel_confianca) * num_cenarios)
+    custos = np.concatenate([-cenarios.mean(axis=0), [aversao_risco], np.full(num_cenarios, coef_cauda)])
+    a_ub = sparse.hstack([
+        sparse.csr_matrix(-cenarios),
+        sparse.csr_matrix(-np.ones((num_cenarios, 1))),
+        -sparse.identity(num_cenarios, format='csr')
+    ], format='csr')
+    a_eq = np.concatenate([np.ones(num_estrategias), [0.0], np.zeros(num_cenarios)])[None, :]
+    limites = [(0, 1)] * num_estrategias + [(None, None)] + [(0, None)] * num_cenarios
+    resultado = linprog(custos, A_ub=a_ub, b_ub=np.zeros(num_cenarios), A_eq=a_eq, b_eq=[1.0],
+                        bounds=limites, method='highs')
+    return resultado.fun
+
+
+class TestOtimizacaoRisco(unittest.TestCase):
+    """Testes para otimização de média-variância e CVaR."""
+
+    def setUp(self):
+        """Configura instância e cenários para testes."""
+        self.investment = OptimizedInvestment(inflacao=6.0)
+        rng = np.random.default_rng(42)
+        # Estratégia A: menor retorno e baixa volatilidade; B: maior retorno e alta volatilidade
+        self.cenarios = np.column_stack([
+            rng.normal(1.10, 0.02, 2000),
+            rng.normal(1.25, 0.30, 2000),
+            rng.normal(1.15, 0.10, 2000)
+        ]) * 100000
+
+    def test_media_variancia_sem_aversao_escolhe_maior_media(self):
+        """Testa que sem aversão ao risco toda alocação vai para a maior média."""
+        pesos, valor_esperado, risco = self.investment.otimizar_portfolio_risco(
+            self.cenarios, objetivo='media_variancia', aversao_risco=0.0
+        )
+
+        np.testing.assert_allclose(pesos, [0.0, 1.0, 0.0], atol=1e-6)
+        self.assertAlmostEqual(valor_esperado, self.cenarios[:, 1].mean(), places=2)
+        self.assertAlmostEqual(risco, self.cenarios[:, 1].std(ddof=1), places=2)
+
+    def test_media_variancia_aversao_alta_reduz_risco(self):
+        """Testa que maior aversão ao risco diversifica e reduz o desvio padrão."""
+        _, valor_baixo, risco_baixo = self.investment.otimizar_portfolio_risco(
+            self.cenarios, aversao_risco=0.5
+        )
+        pesos, valor_alto, risco_alto = self.investment.otimizar_portfolio_risco(
+            self.cenarios, aversao_risco=200.0
+        )
+
+        self.assertAlmostEqual(np.sum(pesos), 1.0, places=10)
+        self.assertTrue(np.all(pesos >= 0))
+        self.assertLess(risco_alto, risco_baixo)
+        self.assertLess(valor_alto, valor_baixo)
+        # Com aversão muito alta, a estratégia de baixa volatilidade domina
+        self.assertGreater(pesos[0], 0.5)
+
+    def test_cvar_coincide_com_lp_completo(self):
+        """Testa que a geração de cenários reproduz o ótimo do LP completo."""
+        for aversao, nivel in [(1.0, 0.95), (5.0, 0.9), (0.2, 0.99)]:
+            pesos, valor_esperado, cvar = self.investment.otimizar_portfolio_risco(
+                self.cenarios, objetivo='cvar', aversao_risco=aversao, nivel_confianca=nivel
+            )
+
+            escala = np.mean(np.abs(self.cenarios))
+            valor_obtido = (-valor_esperado + aversao * cvar) / escala
+            valor_lp = cvar_lp_completo(self.cenarios / escala, aversao, nivel)
+
+            self.assertAlmostEqual(np.sum(pesos), 1.0, places=10)
+            self.assertAlmostEqual(valor_obtido, valor_lp, places=6)
+
+    def test_cvar_calculado_nos_piores_cenarios(self):
+        """Testa que o risco retornado é a média da perda nos piores cenários."""
+        pesos, _, cvar = self.investment.otimizar_portfolio_risco(
+            self.cenarios, objetivo='cvar', aversao_risco=1.0, nivel_confianca=0.95
+        )
+
+        valores = np.sort(self.cenarios @ pesos)
+        cvar_esperado = -valores[:100].mean()  # 5% de 2000 cenários
+
+        self.assertAlmostEqual(cvar, cvar_esperado, places=4)
+
+    def test_aceita_dicionario_de_cenarios(self):
+        """Testa entrada como dicionário de estratégias."""
+        cenarios = {'A': self.cenarios[:, 0].tolist(), 'B': self.cenarios[:, 1].tolist()}
+
+        pesos, _, _ = self.investment.otimizar_portfolio_risco(cenarios, aversao_risco=0.0)
+
+        np.testing.assert_allclose(pesos, [0.0, 1.0], atol=1e-6)
+
+    def test_parametros_invalidos(self):
+        """Testa validação dos parâmetros."""
+        with self.assertRaises(ValueError):
+            self.investment.otimizar_portfolio_risco(self.cenarios, objetivo='sharpe')
+        with self.assertRaises(ValueError):
+            self.investment.otimizar_portfolio_risco(self.cenarios, aversao_risco=-1.0)
+        with self.assertRaises(ValueError):
+            self.investment.otimizar_portfolio_risco(self.cenarios, objetivo='cvar', nivel_confianca=1.0)
+        with self.assertRaises(ValueError):
+            self.investment.otimizar_portfolio_risco(self.cenarios[:1])
+        with self.assertRaises(ValueError):
+            self.investment.otimizar_portfolio_risco({'A': [1.0, 2.0], 'B': [1.0]})
+        with self.assertRaises(ValueError):
+            self.investment.otimizar_portfolio_risco([[1.0, np.nan], [2.0, 3.0]])
+
+
+class TestFronteiraEficiente(unittest.TestCase):
+    """Testes para cálculo da fronteira eficiente."""
+
+    def setUp(self):
+        """Configura instância e cenários para testes."""
+        self.investment = OptimizedInvestment(inflacao=6.0)
+        rng = np.random.default_rng(7)
+        self.cenarios = np.column_stack([
+            rng.normal(1.10, 0.02, 1000),
+            rng.normal(1.25, 0.30, 1000),
+            rng.normal(1.15, 0.10, 1000)
+        ]) * 100000
+
+    def test_formato_e_monotonicidade(self):
+        """Testa formato dos arrays e que risco e retorno crescem ao longo da fronteira."""
+        aversoes, pesos, valores, riscos = self.investment.fronteira_eficiente(self.cenarios, num_pontos=20)
+
+        self.assertEqual(aversoes.shape, (20,))
+        self.assertEqual(pesos.shape, (20, 3))
+        np.testing.assert_allclose(pesos.sum(axis=1), 1.0, atol=1e-10)
+        self.assertTrue(np.all(np.diff(aversoes) < 0))
+        self.assertTrue(np.all(np.diff(valores) >= -1e-6))
+        self.assertTrue(np.all(np.diff(riscos) >= -1e-6))
+
+    def test_pontos_coincidem_com_otimizacao_individual(self):
+        """Testa que cada ponto equivale a uma otimização média-variância isolada."""
+        aversoes, pesos, valores, riscos = self.investment.fronteira_eficiente(self.cenarios, num_pontos=5)
+
+        for i in (0, 2, 4):
+            pesos_isolados, valor, risco = self.investment.otimizar_portfolio_risco(
+                self.cenarios, aversao_risco=aversoes[i]
+            )
+            np.testing.assert_allclose(pesos[i], pesos_isolados, atol=1e-4)
+            self.assertAlmostEqual(valores[i] / valor, 1.0, places=6)
+            self.assertAlmostEqual(riscos[i] / risco, 1.0, places=4)
+
+    def test_extremos_da_fronteira(self):
+        """Testa que as extremidades são a mínima variância e o máximo retorno."""
+        _, pesos, _, _ = self.investment.fronteira_eficiente(self.cenarios, num_pontos=10)
+
+        self.assertGreater(pesos[0, 0], 0.8)
+        np.testing.assert_allclose(pesos[-1], [0.0, 1.0, 0.0], atol=1e-3)
+
+    def test_parametros_invalidos(self):
+        """Testa validação dos parâmetros."""
+        with self.assertRaises(ValueError):
+            self.investment.fronteira_eficiente(self.cenarios, num_pontos=1)
+        with self.assertRaises(ValueError):
+            self.investment.fronteira_eficiente(self.cenarios, aversao_min=10.0, aversao_max=1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
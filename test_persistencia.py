@@ -0,0 +1,135 @@
+"""
+Testes unitários para a persistência write-behind.
+
+Testa WriteBehindQueue e SQLiteStatusStore de backend/persistence.py.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from backend.persistence import SQLiteStatusStore, WriteBehindQueue
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    """Testes para WriteBehindQueue."""
+
+    def setUp(self):
+        """Configura um gravador falso que registra os lotes recebidos."""
+        self.lotes = []
+
+    def gravar(self, registros):
+        self.lotes.append(registros)
+        return [registro['valor'] >= 0 for registro in registros]
+
+    def test_submissao_nao_espera_o_banco(self):
+        """Testa que submit retorna um id na hora e o gravador roda em segundo plano."""
+        def gravar_lento(registros):
+            time.sleep(0.2)
+            return [True] * len(registros)
+
+        async def cenario():
+            fila = WriteBehindQueue(gravar_lento, flush_interval=0.01)
+            fila.start()
+            inicio = time.perf_counter()
+            registro_id = fila.submit({'valor': 1})
+            duracao = time.perf_counter() - inicio
+            status_inicial = fila.status(registro_id)
+            await fila.stop()
+            return duracao, status_inicial, fila.status(registro_id)
+
+        duracao, status_inicial, status_final = asyncio.run(cenario())
+
+        self.assertLess(duracao, 0.05)
+        self.assertEqual((status_inicial, status_final), ('pending', 'saved'))
+
+    def test_lotes_e_falhas_parciais(self):
+        """Testa agrupamento em lotes e status por registro."""
+        async def cenario():
+            fila = WriteBehindQueue(self.gravar, batch_size=3, flush_interval=0.05)
+            fila.start()
+            ids = [fila.submit({'valor': valor}) for valor in (1, -1, 2, 3, 4)]
+            limite = time.monotonic() + 5
+            while fila.depth and time.monotonic() < limite:
+                await asyncio.sleep(0.01)
+            await fila.stop()
+            return fila, ids
+
+        fila, ids = asyncio.run(cenario())
+
+        self.assertEqual([len(lote) for lote in self.lotes], [3, 2])
+        self.assertEqual([registro['id'] for lote in self.lotes for registro in lote], ids)
+        self.assertEqual([fila.status(i) for i in ids], ['saved', 'failed', 'saved', 'saved', 'saved'])
+        self.assertEqual((fila.stats()['saved'], fila.stats()['failed']), (4, 1))
+
+    def test_fila_cheia_descarta(self):
+        """Testa que registros além da capacidade são descartados sem bloquear."""
+        fila = WriteBehindQueue(self.gravar, max_size=2)
+
+        ids = [fila.submit({'valor': valor}) for valor in range(3)]
+
+        self.assertEqual([fila.status(i) for i in ids], ['pending', 'pending', 'dropped'])
+        self.assertEqual((fila.depth, fila.dropped), (2, 1))
+
+    def test_erro_do_gravador(self):
+        """Testa que uma exceção no gravador marca o lote como failed."""
+        def gravar_com_erro(registros):
+            raise ConnectionError('banco indisponível')
+
+        fila = WriteBehindQueue(gravar_com_erro)
+        registro_id = fila.submit({'valor': 1})
+
+        self.assertEqual(asyncio.run(fila.flush()), 1)
+        self.assertEqual(fila.status(registro_id), 'failed')
+
+    def test_parada_grava_pendentes(self):
+        """Testa que stop grava o que ainda está na fila."""
+        fila = WriteBehindQueue(self.gravar, batch_size=2)
+        ids = [fila.submit({'valor': valor}) for valor in range(5)]
+
+        asyncio.run(fila.stop())
+
+        self.assertEqual([fila.status(i) for i in ids], ['saved'] * 5)
+        self.assertEqual(fila.depth, 0)
+
+
+class TestSQLiteStatusStore(unittest.TestCase):
+    """Testes para SQLiteStatusStore."""
+
+    def setUp(self):
+        """Cria um banco temporário."""
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.diretorio.name, 'persistence.db')
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def test_status_visivel_entre_filas(self):
+        """Testa que filas sobre o mesmo banco enxergam os status uma da outra."""
+        gravadora = WriteBehindQueue(lambda registros: [True] * len(registros),
+                                     status_store=SQLiteStatusStore(self.caminho))
+        leitora = WriteBehindQueue(lambda registros: [], status_store=SQLiteStatusStore(self.caminho))
+
+        async def cenario():
+            registro_id = gravadora.submit({'valor': 1})
+            antes = await leitora.lookup(registro_id)
+            await gravadora.publish()
+            pendente = await leitora.lookup(registro_id)
+            await gravadora.flush()
+            return antes, pendente, await leitora.lookup(registro_id), await leitora.lookup('inexistente')
+
+        self.assertEqual(asyncio.run(cenario()), (None, 'pending', 'saved', None))
+
+    def test_expiracao(self):
+        """Testa que status mais antigos que o ttl são esquecidos na próxima gravação."""
+        store = SQLiteStatusStore(self.caminho, ttl=0.05)
+        store.set([('antigo', 'saved')])
+        time.sleep(0.1)
+        store.set([('novo', 'pending')])
+
+        self.assertEqual((store.get('antigo'), store.get('novo')), (None, 'pending'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+Testes unitários para o acompanhamento de progresso da API.
+
+Testa sse_event e RunningBands de backend/progress.py.
+"""
+
+import json
+import unittest
+import numpy as np
+from backend.progress import RunningBands, sse_event
+
+
+class TestProgresso(unittest.TestCase):
+    """Testes para eventos SSE e bandas de percentis parciais."""
+
+    def test_evento_sse(self):
+        """Testa o formato de um evento server-sent."""
+        evento = sse_event('progress', {'percent': 50.0})
+
+        self.assertTrue(evento.startswith(b'event: progress\ndata: '))
+        self.assertTrue(evento.endswith(b'\n\n'))
+        self.assertEqual(json.loads(evento.split(b'data: ')[1]), {'percent': 50.0})
+
+    def test_bandas_acumuladas(self):
+        """Testa percentis do patrimônio final e bandas anuais com prazos diferentes."""
+        bandas = RunningBands(percentiles=(0, 50, 100))
+        bandas.add([np.arange(1.0, 25.0), np.arange(1.0, 25.0) * 2])
+        bandas.add([np.arange(1.0, 13.0) * 3])
+
+        resumo = bandas.snapshot()
+
+        self.assertEqual(resumo['completed'], 3)
+        self.assertEqual(resumo['patrimonio_final'], {'p0': 24.0, 'p50': 36.0, 'p100': 48.0})
+        self.assertEqual(resumo['bandas']['meses'], [12, 24])
+        self.assertEqual(resumo['bandas']['p50'], [24.0, 36.0])
+        self.assertEqual(resumo['bandas']['p100'], [36.0, 48.0])
+
+    def test_vazio(self):
+        """Testa resumo antes de qualquer simulação concluída."""
+        self.assertEqual(RunningBands().snapshot(), {'completed': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Testes unitários para redução e projeção de históricos nas respostas da API.
+
+Testa as funções de backend/shaping.py (resolução, LTTB, min/max e campos).
+"""
+
+import unittest
+import numpy as np
+from backend.shaping import (
+    resolution_indices, lttb_indices, minmax_indices, parse_fields, shape_payload, SUMMARY_FIELDS
+)
+
+
+class TestReducaoHistorico(unittest.TestCase):
+    """Testes para redução de históricos."""
+
+    def setUp(self):
+        """Configura payload com histórico de 10 anos e um pico isolado."""
+        self.historico = list(100.0 + np.arange(120.0))
+        self.historico[50] = 10000.0
+        self.payload = {
+            'historico': self.historico, 'meses': None, 'patrimonio_final': self.historico[-1],
+            'rentabilidade_total': 1.0, 'rentabilidade_anual': 0.1,
+            'saved_to_database': False, 'simulation_id': None
+        }
+
+    def test_resolucao(self):
+        """Testa índices de fim de período, mantendo sempre o último mês."""
+        np.testing.assert_array_equal(resolution_indices(120, 'annual'), np.arange(11, 120, 12))
+        np.testing.assert_array_equal(resolution_indices(30, 'annual'), [11, 23, 29])
+        np.testing.assert_array_equal(resolution_indices(7, 'quarterly'), [2, 5, 6])
+        np.testing.assert_array_equal(resolution_indices(5, 'monthly'), np.arange(5))
+
+    def test_lttb_mantem_extremos_e_pico(self):
+        """Testa que o LTTB mantém as pontas e o pico e respeita o número de pontos."""
+        y = np.array(self.historico)
+        indices = lttb_indices(np.arange(120.0), y, 20)
+
+        self.assertEqual(len(indices), 20)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 119)
+        self.assertIn(50, indices)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_minmax_mantem_extremos(self):
+        """Testa que min/max mantém o pico e não excede o número de pontos."""
+        indices = minmax_indices(np.array(self.historico), 11)
+
+        self.assertLessEqual(len(indices), 11)
+        self.assertIn(50, indices)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 119)
+
+    def test_shape_payload(self):
+        """Testa resolução anual seguida de redução, com meses 1-based."""
+        anual = shape_payload(self.payload, resolution='annual')
+        reduzido = shape_payload(self.payload, points=10)
+
+        self.assertEqual(anual['meses'], list(range(12, 121, 12)))
+        self.assertEqual(anual['historico'], [self.historico[m - 1] for m in anual['meses']])
+        self.assertEqual(len(reduzido['historico']), 10)
+        self.assertEqual(reduzido['meses'][-1], 120)
+        self.assertEqual(self.payload['historico'], self.historico)
+
+    def test_campos(self):
+        """Testa a projeção de campos e o atalho summary."""
+        self.assertEqual(parse_fields('summary'), SUMMARY_FIELDS)
+        self.assertEqual(parse_fields('patrimonio_final, historico'), ('patrimonio_final', 'historico'))
+        self.assertIsNone(parse_fields(''))
+        with self.assertRaises(ValueError):
+            parse_fields('inexistente')
+
+        resumo = shape_payload(self.payload, fields=parse_fields('summary'))
+        self.assertNotIn('historico', resumo)
+        self.assertEqual(resumo['patrimonio_final'], self.historico[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
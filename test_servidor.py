@@ -0,0 +1,118 @@
+"""
+Testes do inicializador de produção com processos pré-forkados.
+
+Sobe backend/serve.py e verifica a distribuição das requisições, o cache
+compartilhado e o encerramento gracioso, sem processos órfãos.
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+import httpx
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'prefork requer os.fork')
+class TestServidorPrefork(unittest.TestCase):
+    """Testes para backend.serve."""
+
+    def setUp(self):
+        """Reserva uma porta livre e um diretório temporário."""
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.porta = sock.getsockname()[1]
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.url = f'http://127.0.0.1:{self.porta}'
+        self.processo = None
+
+    def iniciar(self, workers, **variaveis):
+        """Sobe o servidor com o número de workers e variáveis de ambiente dados."""
+        ambiente = dict(os.environ, SIMULATION_CACHE_DIR=self.diretorio.name,
+                        JOBS_DB=os.path.join(self.diretorio.name, 'jobs.db'), WARMUP='0', **variaveis)
+        self.processo = subprocess.Popen(
+            [sys.executable, '-m', 'backend.serve', '--workers', str(workers), '--host', '127.0.0.1',
+             '--port', str(self.porta), '--log-level', 'warning'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), env=ambiente
+        )
+
+    def descendentes(self):
+        """Pids de todos os processos descendentes do servidor."""
+        pais = {}
+        for entrada in os.listdir('/proc'):
+            try:
+                with open(f'/proc/{entrada}/stat') as f:
+                    pais[int(entrada)] = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (ValueError, OSError):
+                continue
+        encontrados, fronteira = set(), {self.processo.pid}
+        while fronteira:
+            fronteira = {pid for pid, pai in pais.items() if pai in fronteira} - encontrados
+            encontrados |= fronteira
+        return encontrados
+
+    def tearDown(self):
+        if self.processo is not None and self.processo.poll() is None:
+            self.processo.kill()
+            self.processo.wait()
+        self.diretorio.cleanup()
+
+    def pids_dos_workers(self):
+        pids = set()
+        limite = time.monotonic() + 30
+        while len(pids) < 2 and time.monotonic() < limite:
+            try:
+                pids.add(httpx.get(f'{self.url}/health').json()['pid'])
+            except httpx.TransportError:
+                time.sleep(0.1)
+        return pids
+
+    def test_workers_cache_e_encerramento(self):
+        """Testa dois workers, acerto de cache entre processos e saída limpa com SIGTERM."""
+        self.iniciar(2)
+        pids = self.pids_dos_workers()
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(self.processo.pid, pids)
+        executores = httpx.get(f'{self.url}/health').json()['executors']
+        self.assertEqual({e['kind'] for nome, e in executores.items()}, {'thread'})
+
+        parametros = {'aporte_inicial': 1000.0, 'aporte_mensal': 100.0, 'anos': 5, 'taxa_cdi': 10.0}
+        caches = [httpx.post(f'{self.url}/simulate/cdi', json=parametros).headers['x-cache'] for _ in range(6)]
+        self.assertEqual(caches, ['MISS'] + ['HIT'] * 5)
+
+        self.processo.send_signal(signal.SIGTERM)
+        self.assertEqual(self.processo.wait(timeout=30), 0)
+
+    @unittest.skipUnless(os.path.isdir('/proc'), 'requer /proc')
+    def test_pool_de_processos_encerrado(self):
+        """Testa que os processos do pool não sobrevivem ao servidor após SIGTERM."""
+        self.iniciar(1, SIMULATION_EXECUTOR='process', SIMULATION_WORKERS='2', JOB_WORKERS='0')
+        imovel = {'aporte_inicial': 1000.0, 'aporte_mensal': 100.0, 'anos': 5, 'valor_imovel': 300000.0,
+                  'entrada': 60000.0, 'parcelas': 120, 'taxa_juros': 9.0, 'valorizacao': 5.0,
+                  'aluguel_mensal': 1500.0}
+        limite = time.monotonic() + 30
+        while time.monotonic() < limite:
+            try:
+                resposta = httpx.post(f'{self.url}/simulate/real-estate/ready', json=imovel, timeout=30)
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        self.assertEqual(resposta.status_code, 200)
+        filhos = self.descendentes()
+        self.assertGreaterEqual(len(filhos), 1)
+
+        # Sem prefork, o uvicorn encerra e repassa o SIGTERM ao próprio processo
+        self.processo.send_signal(signal.SIGTERM)
+        self.assertIn(self.processo.wait(timeout=30), (0, -signal.SIGTERM))
+
+        limite = time.monotonic() + 5
+        while any(os.path.exists(f'/proc/{pid}') for pid in filhos) and time.monotonic() < limite:
+            time.sleep(0.05)
+        self.assertEqual([pid for pid in filhos if os.path.exists(f'/proc/{pid}')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Testes unitários para a simulação vetorizada em lote.
+
+Compara simular_lote_* com os métodos de OptimizedInvestment cenário a cenário.
+"""
+
+import unittest
+import numpy as np
+from core import (
+    OptimizedInvestment, simular_lote_cdi, simular_lote_ipca,
+    simular_lote_imovel, simular_lote_misto
+)
+
+
+class TestSimulacaoLote(unittest.TestCase):
+    """Testes para as funções simular_lote_*."""
+
+    def setUp(self):
+        """Configura cenários aleatórios com parâmetros e prazos diferentes."""
+        rng = np.random.default_rng(7)
+        n = 12
+        self.aportes_iniciais = rng.uniform(1000, 100000, n)
+        self.aportes_mensais = rng.uniform(0, 3000, n)
+        self.taxas = rng.uniform(1, 15, n)
+        self.anos = rng.integers(1, 20, n)
+        self.inflacao = rng.uniform(0, 10, n)
+        self.ir_renda_fixa = rng.uniform(0, 30, n)
+        self.ir_aluguel = rng.uniform(0, 30, n)
+        self.valores_imovel = rng.uniform(200000, 1000000, n)
+        self.entradas = self.valores_imovel * rng.uniform(0.1, 0.5, n)
+        self.parcelas = rng.integers(12, 240, n)
+        self.valorizacao = rng.uniform(0, 10, n)
+        self.alugueis = rng.uniform(500, 5000, n)
+        self.anos_construcao = rng.integers(0, 4, n)
+
+    def simulador(self, i):
+        """Simulador individual com a inflação e o IR do cenário i."""
+        return OptimizedInvestment(self.inflacao[i], self.ir_renda_fixa[i], self.ir_aluguel[i])
+
+    def assertHistoricosIguais(self, lote, esperados):
+        """Compara históricos com tolerância de arredondamento."""
+        self.assertEqual(len(lote), len(esperados))
+        for historico, esperado in zip(lote, esperados):
+            self.assertEqual(len(historico), len(esperado))
+            np.testing.assert_allclose(historico, esperado, rtol=1e-12)
+
+    def test_cdi(self):
+        """Testa CDI com e sem imposto no final."""
+        for imposto_final in (False, True):
+            lote = simular_lote_cdi(self.aportes_iniciais, self.aportes_mensais, self.taxas, self.anos,
+                                    self.inflacao, self.ir_renda_fixa, imposto_final)
+            esperados = [
+                self.simulador(i).investimento_cdi(self.aportes_iniciais[i], self.aportes_mensais[i],
+                                                   self.taxas[i], int(self.anos[i]), imposto_final)
+                for i in range(len(self.anos))
+            ]
+            self.assertHistoricosIguais(lote, esperados)
+
+    def test_ipca(self):
+        """Testa IPCA+ com o imposto no final (padrão)."""
+        lote = simular_lote_ipca(self.aportes_iniciais, self.aportes_mensais, self.taxas, self.anos,
+                                 self.inflacao, self.ir_renda_fixa)
+        esperados = [
+            self.simulador(i).investimento_ipca(self.aportes_iniciais[i], self.aportes_mensais[i],
+                                                self.taxas[i], int(self.anos[i]))
+            for i in range(len(self.anos))
+        ]
+        self.assertHistoricosIguais(lote, esperados)
+
+    def test_imovel_planta_e_pronto(self):
+        """Testa imóvel na planta e, com construção zero, imóvel pronto."""
+        planta = simular_lote_imovel(self.valores_imovel, self.entradas, self.parcelas, self.valorizacao,
+                                     self.alugueis, self.anos_construcao, self.inflacao, self.ir_aluguel)
+        pronto = simular_lote_imovel(self.valores_imovel, self.entradas, self.parcelas, self.valorizacao,
+                                     self.alugueis, np.zeros(len(self.parcelas)), self.inflacao, self.ir_aluguel)
+
+        self.assertHistoricosIguais(planta, [
+            self.simulador(i).compra_financiada_planta(
+                self.valores_imovel[i], self.entradas[i], int(self.parcelas[i]), 9.0, self.valorizacao[i],
+                self.alugueis[i], int(self.anos_construcao[i]))
+            for i in range(len(self.parcelas))
+        ])
+        self.assertHistoricosIguais(pronto, [
+            self.simulador(i).compra_financiada_pronto(
+                self.valores_imovel[i], self.entradas[i], int(self.parcelas[i]), 9.0, self.valorizacao[i],
+                self.alugueis[i])
+            for i in range(len(self.parcelas))
+        ])
+
+    def test_misto(self):
+        """Testa a estratégia mista imóvel + CDI."""
+        lote = simular_lote_misto(self.valores_imovel, self.entradas, self.parcelas, self.taxas,
+                                  self.aportes_mensais, self.valorizacao, self.inflacao, self.ir_renda_fixa)
+        esperados = [
+            self.simulador(i).compra_e_renda_fixa(
+                self.valores_imovel[i], self.entradas[i], int(self.parcelas[i]), 9.0, self.taxas[i],
+                self.aportes_mensais[i], self.valorizacao[i])
+            for i in range(len(self.parcelas))
+        ]
+        self.assertHistoricosIguais(lote, esperados)
+
+
+if __name__ == '__main__':
+    unittest.main()
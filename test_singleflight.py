@@ -0,0 +1,101 @@
+"""
+Testes unitários para a coalescência de requisições (single-flight).
+
+Testa SingleFlight de backend/singleflight.py.
+"""
+
+import asyncio
+import unittest
+from backend.singleflight import SingleFlight
+from backend.workers import ClientDisconnectedError
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Testes para SingleFlight."""
+
+    def setUp(self):
+        """Configura instância e contador de execuções."""
+        self.flights = SingleFlight()
+        self.execucoes = 0
+
+    async def calcular(self, valor, atraso=0.05):
+        self.execucoes += 1
+        await asyncio.sleep(atraso)
+        return valor
+
+    def test_chamadas_concorrentes_compartilham_resultado(self):
+        """Testa que chamadas simultâneas com a mesma chave executam uma vez."""
+        async def cenario():
+            return await asyncio.gather(*[self.flights.do('k', lambda: self.calcular(42)) for _ in range(5)])
+
+        resultados = asyncio.run(cenario())
+
+        self.assertEqual(resultados, [42] * 5)
+        self.assertEqual(self.execucoes, 1)
+        self.assertEqual(self.flights.stats(), {'leaders': 1, 'waiters': 4, 'in_flight': 0, 'coalesce_ratio': 0.8})
+
+    def test_chaves_diferentes_e_chamadas_sequenciais(self):
+        """Testa que chaves diferentes e chamadas posteriores não são coalescidas."""
+        async def cenario():
+            await asyncio.gather(self.flights.do('a', lambda: self.calcular(1)),
+                                 self.flights.do('b', lambda: self.calcular(2)))
+            return await self.flights.do('a', lambda: self.calcular(3))
+
+        self.assertEqual(asyncio.run(cenario()), 3)
+        self.assertEqual(self.execucoes, 3)
+
+    def test_excecao_propagada(self):
+        """Testa que a exceção do líder chega a todos que aguardam."""
+        async def falhar():
+            await asyncio.sleep(0.01)
+            raise ValueError('falhou')
+
+        async def cenario():
+            return await asyncio.gather(*[self.flights.do('k', falhar) for _ in range(3)], return_exceptions=True)
+
+        erros = asyncio.run(cenario())
+
+        self.assertTrue(all(isinstance(erro, ValueError) for erro in erros))
+
+    def test_desconexao_de_um_cliente_nao_afeta_outros(self):
+        """Testa que o cálculo continua enquanto houver alguém aguardando."""
+        async def desconectado():
+            return True
+
+        async def cenario():
+            primeiro = self.flights.do('k', lambda: self.calcular(7, atraso=0.1),
+                                       is_disconnected=desconectado, poll_interval=0.01)
+            segundo = self.flights.do('k', lambda: self.calcular(8))
+            return await asyncio.gather(primeiro, segundo, return_exceptions=True)
+
+        primeiro, segundo = asyncio.run(cenario())
+
+        self.assertIsInstance(primeiro, ClientDisconnectedError)
+        self.assertEqual(segundo, 7)
+
+    def test_todos_desconectados_cancela(self):
+        """Testa que o cálculo é cancelado quando ninguém mais aguarda."""
+        async def desconectado():
+            return True
+
+        async def cenario():
+            tarefa = None
+
+            async def lento():
+                nonlocal tarefa
+                tarefa = asyncio.current_task()
+                await asyncio.sleep(10)
+
+            with self.assertRaises(ClientDisconnectedError):
+                await self.flights.do('k', lento, is_disconnected=desconectado, poll_interval=0.01)
+            await asyncio.sleep(0)
+            return tarefa
+
+        tarefa = asyncio.run(cenario())
+
+        self.assertTrue(tarefa.cancelled())
+        self.assertEqual(self.flights.in_flight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+Teste de regressão do tempo de importação da API.
+
+Mede `python -X importtime` do ponto de entrada backend.api em um
+interpretador novo e compara com o orçamento de benchmark_api.py.
+"""
+
+import unittest
+import benchmark_api
+import core
+
+
+class TestTempoImportacao(unittest.TestCase):
+    """Testes para o custo de inicialização a frio."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Mede a importação uma vez, ficando com a execução mais rápida de três."""
+        execucoes = [benchmark_api.import_times('backend.api') for _ in range(3)]
+        cls.tempos = min(execucoes, key=lambda tempos: tempos['backend.api'][1])
+
+    def test_modulos_pesados_nao_importados(self):
+        """Testa que matplotlib, scipy.optimize e supabase só carregam no primeiro uso."""
+        for modulo in benchmark_api.LAZY_MODULES:
+            with self.subTest(modulo=modulo):
+                self.assertNotIn(modulo, self.tempos)
+
+    def test_orcamento(self):
+        """Testa que a importação de backend.api cabe no orçamento (IMPORT_TIME_BUDGET_MS)."""
+        total_ms = self.tempos['backend.api'][1] / 1e3
+
+        self.assertLessEqual(total_ms, benchmark_api.IMPORT_TIME_BUDGET_MS)
+
+    def test_scipy_carregado_sob_demanda(self):
+        """Testa que as otimizações continuam usando scipy após a importação tardia."""
+        simulador = core.OptimizedInvestment(inflacao=4.5)
+        historicos = {
+            'CDI': simulador.investimento_cdi(1000.0, 100.0, 10.5, 2),
+            'IPCA': simulador.investimento_ipca(1000.0, 100.0, 6.0, 2),
+        }
+
+        pesos, _, _, retorno = simulador.otimizar_portfolio(historicos, 2)
+
+        self.assertAlmostEqual(float(sum(pesos)), 1.0, places=6)
+        self.assertGreater(retorno, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Testes dos pools de trabalho limitados da API.
+
+Testa BoundedExecutor: limite de fila, timeout, cancelamento por desconexão
+e encerramento dos pools.
+"""
+
+import asyncio
+import os
+import time
+import unittest
+from backend.workers import BoundedExecutor, QueueFullError, ClientDisconnectedError, available_cpus
+
+
+def dormir(segundos: float) -> float:
+    """Tarefa de teste que apenas espera."""
+    time.sleep(segundos)
+    return segundos
+
+
+class RequisicaoDesconectada:
+    """Requisição falsa cujo cliente já desconectou."""
+
+    async def is_disconnected(self) -> bool:
+        return True
+
+
+class TestBoundedExecutor(unittest.TestCase):
+    """Testes para BoundedExecutor."""
+
+    def setUp(self):
+        """Configura executor de threads com um worker e sem fila."""
+        self.executor = BoundedExecutor("teste", kind="thread", max_workers=1, max_queue=0)
+
+    def tearDown(self):
+        """Encerra o pool."""
+        self.executor.shutdown()
+
+    def test_executa_e_libera_vaga(self):
+        """Testa que o resultado é retornado e a vaga é liberada."""
+        resultado = asyncio.run(self.executor.run(dormir, 0.01))
+
+        self.assertEqual(resultado, 0.01)
+        self.assertEqual(self.executor.queue_depth, 0)
+
+    def test_fila_cheia(self):
+        """Testa que submissões acima da capacidade falham imediatamente."""
+        async def cenario():
+            primeira = asyncio.ensure_future(self.executor.run(dormir, 0.2))
+            await asyncio.sleep(0.01)
+            with self.assertRaises(QueueFullError):
+                await self.executor.run(dormir, 0.01)
+            await primeira
+
+        asyncio.run(cenario())
+
+    def test_timeout(self):
+        """Testa que o tempo limite é respeitado."""
+        inicio = time.monotonic()
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(self.executor.run(dormir, 0.5, timeout=0.05))
+
+        self.assertLess(time.monotonic() - inicio, 0.6)
+
+    def test_desconexao_do_cliente(self):
+        """Testa que a espera termina quando o cliente desconecta."""
+        with self.assertRaises(ClientDisconnectedError):
+            asyncio.run(self.executor.run(dormir, 0.3, request=RequisicaoDesconectada(), poll_interval=0.01))
+
+    def test_encerramento_aguarda_processos(self):
+        """Testa que shutdown encerra e aguarda os processos do pool."""
+        executor = BoundedExecutor("teste", kind="process", max_workers=2, max_queue=0)
+        asyncio.run(executor.run(dormir, 0.01))
+        processos = list(executor._executor._processes.values())
+
+        executor.shutdown()
+
+        self.assertEqual([p.is_alive() for p in processos], [False] * len(processos))
+
+    def test_cpus_disponiveis(self):
+        """Testa que a contagem de CPUs respeita a afinidade do processo."""
+        self.assertGreaterEqual(available_cpus(), 1)
+        self.assertLessEqual(available_cpus(), os.cpu_count())
+
+    def test_tipo_invalido(self):
+        """Testa erro com tipo de executor desconhecido."""
+        with self.assertRaises(ValueError):
+            BoundedExecutor("teste", kind="gpu")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,7 +12,10 @@ from typing import List, Dict, Optional
 
 def plotar_historico_planta_pronto(historico_planta: List[float], 
                                   historico_pronto: List[float], 
-                                  meses: int) -> None:
+                                  meses: int,
+                                  caminho_saida: str = 'outputs/comparacao_imoveis.jpg',
+                                  exibir: bool = True,
+                                  dpi: int = 300) -> None:
     """
     Plota comparação visual entre investimento em imóvel na planta vs imóvel pronto.
     
@@ -29,13 +32,18 @@ def plotar_historico_planta_pronto(historico_planta: List[float],
                                       Deve ter exatamente 'meses' elementos.
         meses (int): Número total de meses da simulação. Deve ser positivo e
                     corresponder ao tamanho das listas de histórico.
+        caminho_saida (str, optional): Arquivo de saída; o formato (jpg, png, svg)
+                                     segue a extensão. Defaults to 'outputs/comparacao_imoveis.jpg'.
+        exibir (bool, optional): Se True, exibe o gráfico na tela. A API passa False
+                               para renderizar sem interface gráfica. Defaults to True.
+        dpi (int, optional): Resolução do arquivo salvo. Defaults to 300.
     
     Returns:
         None: A função não retorna valor, mas gera e salva o gráfico.
     
     Side Effects:
-        - Cria arquivo 'outputs/comparacao_imoveis.jpg' com o gráfico
-        - Exibe o gráfico na tela (plt.show())
+        - Cria o arquivo 'caminho_saida' com o gráfico
+        - Exibe o gráfico na tela (plt.show()) se 'exibir' for True
         - Imprime mensagem de confirmação no console
         - Cria diretório 'outputs/' se não existir
     
@@ -89,18 +97,25 @@ def plotar_historico_planta_pronto(historico_planta: List[float],
     plt.tight_layout()
     
     # Salva em alta resolução
-    plt.savefig('outputs/comparacao_imoveis.jpg', dpi=300, bbox_inches='tight', 
+    plt.savefig(caminho_saida, dpi=dpi, bbox_inches='tight', 
                 facecolor='white', edgecolor='none')
     
     # Exibe o gráfico
-    plt.show()
+    if exibir:
+        plt.show()
     
-    print("Gráfico salvo em: outputs/comparacao_imoveis.jpg")
+    # Libera a figura: processos de longa duração renderizam muitos gráficos
+    plt.close()
+    
+    print(f"Gráfico salvo em: {caminho_saida}")
 
 
 def plotar_cenarios(cenarios: Dict[str, List[float]], 
                    anos: int, 
-                   pesos_otimizados: Optional[np.ndarray] = None) -> None:
+                   pesos_otimizados: Optional[np.ndarray] = None,
+                   caminho_saida: str = 'outputs/cenarios_investimento.jpg',
+                   exibir: bool = True,
+                   dpi: int = 300) -> None:
     """
     Plota múltiplos cenários de investimento em um único gráfico comparativo.
     
@@ -120,13 +135,18 @@ def plotar_cenarios(cenarios: Dict[str, List[float]],
                                                           na mesma ordem das chaves do
                                                           dicionário cenarios. Se fornecido,
                                                           será exibido no título. Defaults to None.
+        caminho_saida (str, optional): Arquivo de saída; o formato (jpg, png, svg)
+                                     segue a extensão. Defaults to 'outputs/cenarios_investimento.jpg'.
+        exibir (bool, optional): Se True, exibe o gráfico na tela. A API passa False
+                               para renderizar sem interface gráfica. Defaults to True.
+        dpi (int, optional): Resolução do arquivo salvo. Defaults to 300.
     
     Returns:
         None: A função não retorna valor, mas gera e salva o gráfico.
     
     Side Effects:
-        - Cria arquivo 'outputs/cenarios_investimento.jpg' com o gráfico
-        - Exibe o gráfico na tela (plt.show())
+        - Cria o arquivo 'caminho_saida' com o gráfico
+        - Exibe o gráfico na tela (plt.show()) se 'exibir' for True
         - Imprime mensagem de confirmação no console
         - Imprime avisos se dados inconsistentes forem encontrados
         - Cria diretório 'outputs/' se não existir
@@ -249,10 +269,14 @@ def plotar_cenarios(cenarios: Dict[str, List[float]],
     plt.tight_layout()
     
     # Salva em alta resolução
-    plt.savefig('outputs/cenarios_investimento.jpg', dpi=300, bbox_inches='tight', 
+    plt.savefig(caminho_saida, dpi=dpi, bbox_inches='tight', 
                 facecolor='white', edgecolor='none')
     
     # Exibe o gráfico
-    plt.show()
+    if exibir:
+        plt.show()
+    
+    # Libera a figura: processos de longa duração renderizam muitos gráficos
+    plt.close()
     
-    print("Gráfico salvo em: outputs/cenarios_investimento.jpg")
\ No newline at end of file
+    print(f"Gráfico salvo em: {caminho_saida}")
\ No newline at end of file